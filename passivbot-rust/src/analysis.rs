@@ -1,90 +1,343 @@
 use crate::types::{Analysis, Equities, Fill};
+use serde::{Deserialize, Serialize};
 use std::cmp::Ordering;
 use std::collections::HashMap;
 
-fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
-    if fills.len() <= 1 {
-        return Analysis::default();
+/// Currency in which fill balances and pnls are read. BTC values are derived from the
+/// USD fields on the fly, so the BTC analysis needs no converted copy of the fills.
+#[derive(Clone, Copy, Debug, PartialEq, Serialize, Deserialize)]
+pub enum Denomination {
+    Usd,
+    Btc,
+}
+
+impl Denomination {
+    #[inline]
+    fn balance(self, fill: &Fill) -> f64 {
+        match self {
+            Denomination::Usd => fill.balance_usd_total,
+            Denomination::Btc => fill.balance_usd_total / fill.btc_price,
+        }
+    }
+
+    #[inline]
+    fn pnl(self, fill: &Fill) -> f64 {
+        match self {
+            Denomination::Usd => fill.pnl,
+            Denomination::Btc => fill.pnl / fill.btc_price,
+        }
     }
-    // Calculate daily equities
-    let mut daily_eqs = Vec::new(); // stores last equity of each day
-    let mut daily_eqs_mins = Vec::new(); // stores min equity of each day
-
-    let mut current_day = 0;
-    let mut current_min = equities[0];
-    let mut last_equity = equities[0];
-
-    for (i, &equity) in equities.iter().enumerate() {
-        let day = i / 1440;
-        if day > current_day {
-            daily_eqs.push(last_equity);
-            daily_eqs_mins.push(current_min);
-            current_day = day;
-            current_min = equity;
+}
+
+/// Orders floats ascending with NaNs last.
+fn cmp_nan_last(a: &f64, b: &f64) -> Ordering {
+    a.partial_cmp(b).unwrap_or_else(|| {
+        if a.is_nan() && b.is_nan() {
+            Ordering::Equal
+        } else if a.is_nan() {
+            Ordering::Greater
         } else {
-            current_min = current_min.min(equity);
+            Ordering::Less
         }
-        last_equity = equity;
+    })
+}
+
+/// Median of a non-empty slice via selection; reorders `values`.
+fn median_in_place(values: &mut [f64]) -> f64 {
+    let len = values.len();
+    let (lower, &mut upper, _) = values.select_nth_unstable_by(len / 2, cmp_nan_last);
+    if len % 2 == 0 {
+        let below = lower
+            .iter()
+            .copied()
+            .reduce(|a, b| {
+                if cmp_nan_last(&a, &b) == Ordering::Less {
+                    b
+                } else {
+                    a
+                }
+            })
+            .unwrap();
+        (below + upper) / 2.0
+    } else {
+        upper
     }
+}
 
-    // Push final day’s values
-    if !equities.is_empty() {
-        daily_eqs.push(last_equity);
-        daily_eqs_mins.push(current_min);
+/// Moves the `n` smallest values, in ascending order, to the front of `values`.
+fn partial_sort_in_place(values: &mut [f64], n: usize) {
+    let n = n.min(values.len());
+    if n < values.len() {
+        values.select_nth_unstable_by(n, cmp_nan_last);
     }
+    values[..n].sort_by(cmp_nan_last);
+}
+
+/// Last and minimum equity of each day of an equity series, accumulated one minute at a
+/// time so the per-minute series itself need not be kept.
+#[derive(Clone, Debug, Default, Serialize, Deserialize)]
+struct DailyEquities {
+    n: usize,
+    daily_eqs: Vec<f64>,      // last equity of each completed day
+    daily_eqs_mins: Vec<f64>, // min equity of each completed day
+    current_min: f64,
+    last_equity: f64,
+}
+
+impl DailyEquities {
+    fn add(&mut self, equity: f64, rows_per_day: usize) {
+        if self.n == 0 {
+            self.current_min = equity;
+            self.last_equity = equity;
+        }
+        // one entry per completed day, so the current day is the number of entries
+        if self.n / rows_per_day > self.daily_eqs.len() {
+            self.daily_eqs.push(self.last_equity);
+            self.daily_eqs_mins.push(self.current_min);
+            self.current_min = equity;
+        } else {
+            self.current_min = self.current_min.min(equity);
+        }
+        self.last_equity = equity;
+        self.n += 1;
+    }
+
+    /// Daily last and min equities, including the final, possibly partial, day.
+    fn series(&self) -> (Vec<f64>, Vec<f64>) {
+        let mut daily_eqs = Vec::with_capacity(self.daily_eqs.len() + 1);
+        let mut daily_eqs_mins = Vec::with_capacity(self.daily_eqs.len() + 1);
+        daily_eqs.extend_from_slice(&self.daily_eqs);
+        daily_eqs_mins.extend_from_slice(&self.daily_eqs_mins);
+        if self.n > 0 {
+            daily_eqs.push(self.last_equity);
+            daily_eqs_mins.push(self.current_min);
+        }
+        (daily_eqs, daily_eqs_mins)
+    }
+
+    /// The same series from the start of day `day` on; empty if that is past its end.
+    fn from_day(&self, day: usize, rows_per_day: usize) -> DailyEquities {
+        if day * rows_per_day >= self.n {
+            return DailyEquities::default();
+        }
+        DailyEquities {
+            n: self.n - day * rows_per_day,
+            daily_eqs: self.daily_eqs[day..].to_vec(),
+            daily_eqs_mins: self.daily_eqs_mins[day..].to_vec(),
+            current_min: self.current_min,
+            last_equity: self.last_equity,
+        }
+    }
+}
+
+/// Running stats of the relative difference between equity and the balance after the
+/// latest fill. Equities before the first fill are compared with that fill's balance, so
+/// they wait in `pending` until it arrives.
+#[derive(Clone, Debug, Default, Serialize, Deserialize)]
+struct EquityBalanceDiffs {
+    last_balance: Option<f64>,
+    pending: Vec<f64>,
+    pos_max: f64,
+    pos_sum: f64,
+    n_pos: usize,
+    neg_max: f64,
+    neg_sum: f64,
+    n_neg: usize,
+}
+
+impl EquityBalanceDiffs {
+    fn add_balance(&mut self, balance: f64) {
+        self.last_balance = Some(balance);
+        for equity in std::mem::take(&mut self.pending) {
+            self.add_diff(equity, balance);
+        }
+    }
+
+    fn add_equity(&mut self, equity: f64) {
+        match self.last_balance {
+            Some(balance) => self.add_diff(equity, balance),
+            None => self.pending.push(equity),
+        }
+    }
+
+    fn add_diff(&mut self, equity: f64, balance: f64) {
+        let ebd = (equity - balance) / balance;
+        if ebd > 0.0 {
+            self.pos_max = f64::max(self.pos_max, ebd);
+            self.pos_sum += ebd;
+            self.n_pos += 1;
+        } else if ebd < 0.0 {
+            self.neg_max = f64::max(self.neg_max, ebd.abs());
+            self.neg_sum += ebd.abs();
+            self.n_neg += 1;
+        }
+    }
+}
+
+/// Everything the analysis needs from one denomination's equity curve, fed minute by
+/// minute: the daily equities of the whole curve and of the suffixes the weighted (`_w`)
+/// metrics average over, plus the equity-balance differences of the whole curve.
+///
+/// Suffix boundaries are fixed from `n_planned` up front; for a backtest that ends early
+/// they therefore differ from those computed on the truncated curve. Each equity covers
+/// `minutes_per_row` minutes, as do the fill indexes.
+#[derive(Clone, Debug, Serialize, Deserialize)]
+pub struct EquityStats {
+    denomination: Denomination,
+    minutes_per_row: usize,
+    n: usize,
+    /// First minute of each daily series: 0, then the last half, third, ... tenth.
+    starts: Vec<usize>,
+    days: Vec<DailyEquities>,
+    diffs: EquityBalanceDiffs,
+    /// Only the whole curve is gathered; see `open_ended`.
+    open_ended: bool,
+}
+
+/// First minute of the whole curve and of each suffix of a curve of `n` equities.
+fn suffix_starts(n: usize) -> Vec<usize> {
+    std::iter::once(0)
+        .chain((1..10).map(|i| {
+            // fraction of the data kept: i=1 => last half, i=2 => last third, etc.
+            let fraction = 1.0 / (1.0 + i as f64);
+            (n as f64 - fraction * (n as f64)).round() as usize
+        }))
+        .collect()
+}
+
+impl EquityStats {
+    pub fn new(n_planned: usize, denomination: Denomination, minutes_per_row: usize) -> Self {
+        let starts = suffix_starts(n_planned);
+        EquityStats {
+            denomination,
+            minutes_per_row,
+            n: 0,
+            days: vec![DailyEquities::default(); starts.len()],
+            starts,
+            diffs: EquityBalanceDiffs::default(),
+            open_ended: false,
+        }
+    }
+
+    /// Stats of a curve whose final length is not known up front, such as that of a
+    /// resumable backtest. Only the whole curve's daily equities are gathered; at analysis
+    /// the suffixes are cut from them at the day boundary nearest to where each would start
+    /// on a curve of the final length, so the `_w` metrics can differ slightly from `new`.
+    pub fn open_ended(denomination: Denomination, minutes_per_row: usize) -> Self {
+        EquityStats {
+            denomination,
+            minutes_per_row,
+            n: 0,
+            starts: vec![0],
+            days: vec![DailyEquities::default()],
+            diffs: EquityBalanceDiffs::default(),
+            open_ended: true,
+        }
+    }
+
+    /// Stats of an `open_ended` curve with its day-aligned suffixes filled in.
+    fn with_day_aligned_suffixes(&self) -> Self {
+        let rows_per_day = 1440 / self.minutes_per_row;
+        let whole = &self.days[0];
+        let mut starts = vec![0];
+        let mut days = vec![whole.clone()];
+        for &start in suffix_starts(self.n).iter().skip(1) {
+            let day = (start + rows_per_day / 2) / rows_per_day;
+            starts.push(day * rows_per_day);
+            days.push(whole.from_day(day, rows_per_day));
+        }
+        EquityStats {
+            denomination: self.denomination,
+            minutes_per_row: self.minutes_per_row,
+            n: self.n,
+            starts,
+            days,
+            diffs: self.diffs.clone(),
+            open_ended: false,
+        }
+    }
+
+    fn from_series(
+        fills: &[Fill],
+        equities: &[f64],
+        denomination: Denomination,
+        minutes_per_row: usize,
+    ) -> Self {
+        let mut stats = EquityStats::new(equities.len(), denomination, minutes_per_row);
+        let mut fill_iter = fills.iter().peekable();
+        for (i, &equity) in equities.iter().enumerate() {
+            while let Some(fill) = fill_iter.next_if(|fill| fill.index <= i) {
+                stats.add_fill(fill);
+            }
+            stats.add_equity(equity);
+        }
+        stats
+    }
+
+    pub fn add_fill(&mut self, fill: &Fill) {
+        self.diffs.add_balance(self.denomination.balance(fill));
+    }
+
+    pub fn add_equity(&mut self, equity: f64) {
+        let rows_per_day = 1440 / self.minutes_per_row;
+        for (days, &start) in self.days.iter_mut().zip(self.starts.iter()) {
+            if self.n >= start {
+                days.add(equity, rows_per_day);
+            }
+        }
+        self.diffs.add_equity(equity);
+        self.n += 1;
+    }
+}
+
+fn analyze_backtest_basic(
+    fills: &[Fill],
+    days: &DailyEquities,
+    diffs: &EquityBalanceDiffs,
+    denomination: Denomination,
+    minutes_per_row: usize,
+) -> Analysis {
+    if fills.len() <= 1 {
+        return Analysis::default();
+    }
+    let (daily_eqs, daily_eqs_mins) = days.series();
 
     // Calculate daily percentage changes
-    let daily_eqs_pct_change: Vec<f64> =
+    let mut daily_eqs_pct_change: Vec<f64> =
         daily_eqs.windows(2).map(|w| (w[1] - w[0]) / w[0]).collect();
-    let daily_eqs_mins_pct_change: Vec<f64> = daily_eqs_mins
+    let mut daily_eqs_mins_pct_change: Vec<f64> = daily_eqs_mins
         .windows(2)
         .map(|w| (w[1] - w[0]) / w[0])
         .collect();
+    // with less than two days of data, e.g. a backtest aborted early, there are no daily
+    // returns: the metrics of daily returns stay zero, the others are computed as usual
+    let has_daily_returns = !daily_eqs_mins_pct_change.is_empty();
 
     // Calculate ADG and standard metrics
     let (gain, adg) = smoothed_terminal_geometric_gain_and_adg(&daily_eqs);
-    let mdg = {
-        let mut sorted_pct_change = daily_eqs_pct_change.clone();
-        sorted_pct_change.sort_by(|a, b| {
-            a.partial_cmp(b).unwrap_or_else(|| {
-                if a.is_nan() && b.is_nan() {
-                    Ordering::Equal
-                } else if a.is_nan() {
-                    Ordering::Greater
-                } else {
-                    Ordering::Less
-                }
-            })
-        });
-        if sorted_pct_change.len() % 2 == 0 {
-            (sorted_pct_change[sorted_pct_change.len() / 2 - 1]
-                + sorted_pct_change[sorted_pct_change.len() / 2])
-                / 2.0
-        } else {
-            sorted_pct_change[sorted_pct_change.len() / 2]
-        }
-    };
 
     // Calculate variance and standard deviation
-    let variance = daily_eqs_mins_pct_change
-        .iter()
-        .map(|&x| (x - adg).powi(2))
-        .sum::<f64>()
-        / daily_eqs_mins_pct_change.len() as f64;
+    let variance = if has_daily_returns {
+        daily_eqs_mins_pct_change
+            .iter()
+            .map(|&x| (x - adg).powi(2))
+            .sum::<f64>()
+            / daily_eqs_mins_pct_change.len() as f64
+    } else {
+        0.0
+    };
     let std_dev = variance.sqrt();
 
     // Calculate Sharpe Ratio
     let sharpe_ratio = if std_dev != 0.0 { adg / std_dev } else { 0.0 };
 
     // Calculate Sortino Ratio (using downside deviation)
-    let downside_returns: Vec<f64> = daily_eqs_mins_pct_change
+    let (downside_sum_sq, n_downside) = daily_eqs_mins_pct_change
         .iter()
         .filter(|&&x| x < 0.0)
-        .cloned()
-        .collect();
-    let downside_deviation = if !downside_returns.is_empty() {
-        (downside_returns.iter().map(|x| x.powi(2)).sum::<f64>() / downside_returns.len() as f64)
-            .sqrt()
+        .fold((0.0, 0usize), |(sum_sq, n), &x| (sum_sq + x.powi(2), n + 1));
+    let downside_deviation = if n_downside > 0 {
+        (downside_sum_sq / n_downside as f64).sqrt()
     } else {
         0.0
     };
@@ -105,64 +358,49 @@ fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
                     (gains, losses + ret.abs())
                 }
             });
-    let omega_ratio = if losses_sum != 0.0 {
+    let omega_ratio = if !has_daily_returns {
+        0.0
+    } else if losses_sum != 0.0 {
         gains_sum / losses_sum
     } else {
         f64::INFINITY
     };
 
+    // order statistics below reorder the daily series in place, so they come after the sums
+    let mdg = if has_daily_returns {
+        median_in_place(&mut daily_eqs_pct_change)
+    } else {
+        0.0
+    };
+
     // Calculate Expected Shortfall (99%)
-    let expected_shortfall_1pct = {
-        let mut sorted_returns = daily_eqs_mins_pct_change.clone();
-        sorted_returns.sort_by(|a, b| {
-            a.partial_cmp(b).unwrap_or_else(|| {
-                if a.is_nan() && b.is_nan() {
-                    Ordering::Equal
-                } else if a.is_nan() {
-                    Ordering::Greater
-                } else {
-                    Ordering::Less
-                }
-            })
-        });
+    let expected_shortfall_1pct = if !has_daily_returns {
+        0.0
+    } else {
         let cutoff_index = (daily_eqs_mins_pct_change.len() as f64 * 0.01) as usize;
+        partial_sort_in_place(&mut daily_eqs_mins_pct_change, cutoff_index.max(1));
         if cutoff_index > 0 {
-            sorted_returns[..cutoff_index]
+            daily_eqs_mins_pct_change[..cutoff_index]
                 .iter()
                 .map(|x| x.abs())
                 .sum::<f64>()
                 / cutoff_index as f64
         } else {
-            sorted_returns[0].abs()
+            daily_eqs_mins_pct_change[0].abs()
         }
     };
 
     // Calculate drawdowns
-    let drawdowns = calc_drawdowns(&daily_eqs_mins);
-    let drawdown_worst_mean_1pct = {
-        let mut sorted_drawdowns = drawdowns.clone();
-        sorted_drawdowns.sort_by(|a, b| {
-            a.partial_cmp(b).unwrap_or_else(|| {
-                if a.is_nan() && b.is_nan() {
-                    Ordering::Equal
-                } else if a.is_nan() {
-                    Ordering::Greater
-                } else {
-                    Ordering::Less
-                }
-            })
-        });
-        let cutoff_index = std::cmp::max(1, (sorted_drawdowns.len() as f64 * 0.01) as usize);
-        let worst_n = std::cmp::min(cutoff_index, sorted_drawdowns.len());
-        sorted_drawdowns[..worst_n]
-            .iter()
-            .map(|x| x.abs())
-            .sum::<f64>()
-            / worst_n as f64
-    };
+    let mut drawdowns = calc_drawdowns(&daily_eqs_mins);
     let drawdown_worst = drawdowns
         .iter()
         .fold(f64::NEG_INFINITY, |a, &b| f64::max(a, b.abs()));
+    let drawdown_worst_mean_1pct = {
+        let cutoff_index = std::cmp::max(1, (drawdowns.len() as f64 * 0.01) as usize);
+        let worst_n = std::cmp::min(cutoff_index, drawdowns.len());
+        partial_sort_in_place(&mut drawdowns, worst_n);
+        drawdowns[..worst_n].iter().map(|x| x.abs()).sum::<f64>() / worst_n as f64
+    };
 
     // Calculate Sterling Ratio (using average of worst 1% drawdowns)
     let sterling_ratio = {
@@ -179,56 +417,28 @@ fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
         0.0
     };
 
-    // Calculate equity-balance differences
-    let mut bal_eq = Vec::with_capacity(equities.len());
-    let mut fill_iter = fills.iter().peekable();
-    let mut last_balance = fills[0].balance_usd_total;
-
-    for (i, &equity) in equities.iter().enumerate() {
-        while let Some(fill) = fill_iter.peek() {
-            if fill.index <= i {
-                last_balance = fill.balance_usd_total;
-                fill_iter.next();
-            } else {
-                break;
-            }
-        }
-        bal_eq.push((last_balance, equity));
-    }
-
-    // Calculate equity-balance differences with separate positive and negative tracking
-    let mut ebds_pos = Vec::new();
-    let mut ebds_neg = Vec::new();
-
-    for &(balance, equity) in bal_eq.iter() {
-        let ebd = (equity - balance) / balance;
-        if ebd > 0.0 {
-            ebds_pos.push(ebd);
-        } else if ebd < 0.0 {
-            ebds_neg.push(ebd);
-        }
-    }
-
-    let equity_balance_diff_pos_max = ebds_pos.iter().fold(0.0, |max, &x| f64::max(max, x));
-    let equity_balance_diff_pos_mean = if !ebds_pos.is_empty() {
-        ebds_pos.iter().sum::<f64>() / ebds_pos.len() as f64
+    // Equity-balance differences, tracked separately for positive and negative
+    let equity_balance_diff_pos_max = diffs.pos_max;
+    let equity_balance_diff_pos_mean = if diffs.n_pos > 0 {
+        diffs.pos_sum / diffs.n_pos as f64
     } else {
         0.0
     };
 
-    let equity_balance_diff_neg_max = ebds_neg.iter().fold(0.0, |max, &x| f64::max(max, x.abs()));
-    let equity_balance_diff_neg_mean = if !ebds_neg.is_empty() {
-        ebds_neg.iter().map(|x| x.abs()).sum::<f64>() / ebds_neg.len() as f64
+    let equity_balance_diff_neg_max = diffs.neg_max;
+    let equity_balance_diff_neg_mean = if diffs.n_neg > 0 {
+        diffs.neg_sum / diffs.n_neg as f64
     } else {
         0.0
     };
 
     // Calculate profit factor
     let (total_profit, total_loss) = fills.iter().fold((0.0, 0.0), |(profit, loss), fill| {
-        if fill.pnl > 0.0 {
-            (profit + fill.pnl, loss)
+        let pnl = denomination.pnl(fill);
+        if pnl > 0.0 {
+            (profit + pnl, loss)
         } else {
-            (profit, loss + fill.pnl.abs())
+            (profit, loss + pnl.abs())
         }
     });
     let loss_profit_ratio = if total_profit == 0.0 {
@@ -238,40 +448,29 @@ fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
     };
 
     // Calculate position durations and position_unchanged_hours_max
-    let mut positions_opened: HashMap<String, usize> = HashMap::new(); // Tracks position open time
+    let mut positions_opened: HashMap<(&str, bool), usize> = HashMap::new(); // Tracks position open time
     let mut durations: Vec<usize> = Vec::new(); // Total position durations
-    let mut last_fill_time: HashMap<String, usize> = HashMap::new(); // Last fill time per position
-    let mut unchanged_durations: Vec<usize> = Vec::new(); // Durations of unchanged periods
+    let mut last_fill_time: HashMap<(&str, bool), usize> = HashMap::new(); // Last fill time per position
+    let mut max_unchanged_duration: Option<usize> = None; // Longest unchanged period
 
     for fill in fills {
-        let side = if fill.order_type.is_long() {
-            "long"
-        } else {
-            "short"
-        };
-        let key = format!("{}_{}", fill.coin, side);
+        let key = (fill.coin.as_str(), fill.order_type.is_long());
 
         // Record the opening time if the position is new
-        if !positions_opened.contains_key(&key) {
-            positions_opened.insert(key.clone(), fill.index);
-            last_fill_time.insert(key.clone(), fill.index); // Initialize last fill time
-        }
+        let opened_at = *positions_opened.entry(key).or_insert(fill.index);
+        let last_time = last_fill_time.entry(key).or_insert(fill.index);
 
-        // Calculate unchanged duration since the last fill
-        if let Some(&last_time) = last_fill_time.get(&key) {
-            let unchanged_duration = fill.index - last_time;
-            unchanged_durations.push(unchanged_duration);
-        }
-        // Update the last fill time
-        last_fill_time.insert(key.clone(), fill.index);
+        // Calculate unchanged duration since the last fill, then update the last fill time
+        let unchanged_duration = fill.index - *last_time;
+        max_unchanged_duration =
+            Some(max_unchanged_duration.map_or(unchanged_duration, |m| m.max(unchanged_duration)));
+        *last_time = fill.index;
 
         // If the position is fully closed, calculate total duration and reset
         if fill.position_size == 0.0 {
-            if let Some(&start_idx) = positions_opened.get(&key) {
-                durations.push(fill.index - start_idx);
-                positions_opened.remove(&key);
-                last_fill_time.remove(&key); // Reset tracking
-            }
+            durations.push(fill.index - opened_at);
+            positions_opened.remove(&key);
+            last_fill_time.remove(&key); // Reset tracking
         }
     }
 
@@ -280,49 +479,49 @@ fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
     for (key, &start_idx) in positions_opened.iter() {
         durations.push(last_index - start_idx); // Total duration for open positions
         if let Some(&last_time) = last_fill_time.get(key) {
-            unchanged_durations.push(last_index - last_time); // Unchanged duration till end
+            let unchanged_duration = last_index - last_time; // Unchanged duration till end
+            max_unchanged_duration = Some(
+                max_unchanged_duration.map_or(unchanged_duration, |m| m.max(unchanged_duration)),
+            );
         }
     }
 
     // Calculate duration statistics
-    let n_days = (equities.len() as f64) / 1440.0; // Convert minutes to days
+    let rows_per_hour = 60.0 / minutes_per_row as f64;
+    let n_days = (days.n as f64) / (24.0 * rows_per_hour); // Convert rows to days
     let positions_held_per_day = durations.len() as f64 / n_days;
 
     let position_held_hours_mean = if !durations.is_empty() {
-        durations.iter().sum::<usize>() as f64 / (durations.len() as f64 * 60.0)
+        durations.iter().sum::<usize>() as f64 / (durations.len() as f64 * rows_per_hour)
     } else {
         0.0
     };
 
     let position_held_hours_max = if !durations.is_empty() {
-        *durations.iter().max().unwrap() as f64 / 60.0
+        *durations.iter().max().unwrap() as f64 / rows_per_hour
     } else {
         0.0
     };
 
     let position_held_hours_median = if !durations.is_empty() {
-        let mut sorted_durations = durations.clone();
-        sorted_durations.sort_unstable();
-        let mid = sorted_durations.len() / 2;
-        if sorted_durations.len() % 2 == 0 {
-            (sorted_durations[mid - 1] + sorted_durations[mid]) as f64 / (2.0 * 60.0)
+        let len = durations.len();
+        let (lower, &mut upper, _) = durations.select_nth_unstable(len / 2);
+        if len % 2 == 0 {
+            (lower.iter().max().unwrap() + upper) as f64 / (2.0 * rows_per_hour)
         } else {
-            sorted_durations[mid] as f64 / 60.0
+            upper as f64 / rows_per_hour
         }
     } else {
         0.0
     };
 
-    let position_unchanged_hours_max = if !unchanged_durations.is_empty() {
-        *unchanged_durations.iter().max().unwrap() as f64 / 60.0
-    } else {
-        0.0
-    };
+    let position_unchanged_hours_max =
+        max_unchanged_duration.map_or(0.0, |m| m as f64 / rows_per_hour);
     let equity_choppiness = calc_equity_choppiness(&daily_eqs);
     let equity_jerkiness = calc_equity_jerkiness(&daily_eqs);
     let exponential_fit_error = calc_exponential_fit_error(&daily_eqs);
 
-    let volume_pct_per_day_avg = calc_avg_volume_pct_per_day(fills);
+    let volume_pct_per_day_avg = avg_volume_pct_per_day(fills, denomination, minutes_per_row);
 
     let mut analysis = Analysis::default();
     analysis.adg = adg;
@@ -354,45 +553,53 @@ fn analyze_backtest_basic(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
     analysis
 }
 
-pub fn analyze_backtest(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
-    let mut analysis = analyze_backtest_basic(fills, equities);
+pub fn analyze_backtest(fills: &[Fill], equities: &[f64]) -> Analysis {
+    analyze_equity_stats(
+        fills,
+        &EquityStats::from_series(fills, equities, Denomination::Usd, 1),
+    )
+}
+
+/// Analyzes a backtest from its fills and the `EquityStats` of one denomination.
+pub fn analyze_equity_stats(fills: &[Fill], stats: &EquityStats) -> Analysis {
+    let aligned;
+    let stats = if stats.open_ended {
+        aligned = stats.with_day_aligned_suffixes();
+        &aligned
+    } else {
+        stats
+    };
+    let (denomination, minutes_per_row) = (stats.denomination, stats.minutes_per_row);
+    let mut analysis = analyze_backtest_basic(
+        fills,
+        &stats.days[0],
+        &stats.diffs,
+        denomination,
+        minutes_per_row,
+    );
 
     if fills.len() <= 1 {
         return analysis;
     }
 
-    let n = equities.len();
     let mut subset_analyses = Vec::with_capacity(10);
     subset_analyses.push(analysis.clone());
+    // the weighted metrics below use no equity-balance differences, so subsets skip them
+    let no_diffs = EquityBalanceDiffs::default();
 
-    for i in 1..10 {
-        // fraction of the data we want to keep:
-        //  i=1 => fraction = 0.5       => last half
-        //  i=2 => fraction = 0.3333    => last third
-        //  i=3 => fraction = 0.25      => last quarter
-        //  etc.
-        let fraction = 1.0 / (1.0 + i as f64);
-
-        // start index for slicing the 'last' fraction
-        let start_idx = (n as f64 - fraction * (n as f64)).round() as usize;
-
-        // slice from start_idx to the end
-        let subset_equities = &equities[start_idx..];
-        if subset_equities.len() == 0 {
+    for (days, &start_idx) in stats.days.iter().zip(stats.starts.iter()).skip(1) {
+        if days.n == 0 {
             break;
         }
 
-        // filter fills that happened after or at start_idx
-        let subset_fills: Vec<Fill> = fills
-            .iter()
-            .filter(|fill| fill.index >= start_idx)
-            .cloned()
-            .collect();
+        // fills are in chronological order, so those at or after start_idx form a suffix
+        let subset_fills = &fills[fills.partition_point(|fill| fill.index < start_idx)..];
         if subset_fills.len() == 0 {
             break;
         }
 
-        let subset_analysis = analyze_backtest_basic(&subset_fills, &subset_equities.to_vec());
+        let subset_analysis =
+            analyze_backtest_basic(subset_fills, days, &no_diffs, denomination, minutes_per_row);
         subset_analyses.push(subset_analysis);
     }
 
@@ -438,22 +645,33 @@ pub fn analyze_backtest(fills: &[Fill], equities: &Vec<f64>) -> Analysis {
 
 /// Returns (Analysis in USD, Analysis in BTC).
 /// If `balance.use_btc_collateral == false`, both are identical.
+/// Each equity row and fill index covers `minutes_per_row` minutes.
 pub fn analyze_backtest_pair(
     fills: &[Fill],
     equities: &Equities,
     use_btc_collateral: bool,
+    minutes_per_row: usize,
 ) -> (Analysis, Analysis) {
-    let analysis_usd = analyze_backtest(fills, &equities.usd);
-    if !use_btc_collateral {
-        return (analysis_usd.clone(), analysis_usd);
-    }
-    let mut btc_fills = fills.to_vec();
-    for fill in btc_fills.iter_mut() {
-        fill.balance_usd_total /= fill.btc_price; // Use actual BTC balance if available
-        fill.pnl = fill.pnl / fill.btc_price; // Convert PNL to BTC
+    let stats_usd =
+        EquityStats::from_series(fills, &equities.usd, Denomination::Usd, minutes_per_row);
+    let stats_btc = use_btc_collateral.then(|| {
+        EquityStats::from_series(fills, &equities.btc, Denomination::Btc, minutes_per_row)
+    });
+    analyze_equity_stats_pair(fills, &stats_usd, stats_btc.as_ref())
+}
+
+/// Like `analyze_backtest_pair`, from equity stats gathered during the run. Without BTC
+/// stats the BTC analysis is a copy of the USD one.
+pub fn analyze_equity_stats_pair(
+    fills: &[Fill],
+    stats_usd: &EquityStats,
+    stats_btc: Option<&EquityStats>,
+) -> (Analysis, Analysis) {
+    let analysis_usd = analyze_equity_stats(fills, stats_usd);
+    match stats_btc {
+        Some(stats_btc) => (analysis_usd, analyze_equity_stats(fills, stats_btc)),
+        None => (analysis_usd.clone(), analysis_usd),
     }
-    let analysis_btc = analyze_backtest(&btc_fills, &equities.btc);
-    (analysis_usd, analysis_btc)
 }
 
 fn calc_drawdowns(equity_series: &[f64]) -> Vec<f64> {
@@ -574,24 +792,200 @@ pub fn smoothed_terminal_geometric_gain_and_adg(daily_eqs: &[f64]) -> (f64, f64)
 /// Calculates average volume per day as a percentage of balance.
 /// For each fill: abs(qty) * price / balance_at_fill
 pub fn calc_avg_volume_pct_per_day(fills: &[Fill]) -> f64 {
-    if fills.is_empty() {
+    avg_volume_pct_per_day(fills, Denomination::Usd, 1)
+}
+
+fn avg_volume_pct_per_day(
+    fills: &[Fill],
+    denomination: Denomination,
+    minutes_per_row: usize,
+) -> f64 {
+    // fills are in chronological order, so each day's fills are contiguous
+    let mut total = 0.0;
+    let mut n_days = 0usize;
+    let mut day_total = 0.0;
+    let mut current_day = None;
+    for fill in fills {
+        let day = fill.index / (1440 / minutes_per_row);
+        if current_day != Some(day) {
+            if current_day.is_some() {
+                total += day_total;
+            }
+            current_day = Some(day);
+            day_total = 0.0;
+            n_days += 1;
+        }
+        day_total += (fill.fill_qty.abs() * fill.fill_price) / denomination.balance(fill);
+    }
+    if n_days == 0 {
         return 0.0;
     }
+    total += day_total;
+    total / n_days as f64
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::types::OrderType;
+
+    const ROWS_PER_DAY: usize = 1440;
+
+    /// A fixed ten-day curve with drawdowns that doesn't end on a day boundary, with fills
+    /// every 331 minutes: gains and losses, and positions that are closed now and then.
+    fn fixed_series() -> (Vec<Fill>, Vec<f64>) {
+        let n = 10 * ROWS_PER_DAY + 77;
+        let equities: Vec<f64> = (0..n)
+            .map(|i| {
+                let t = i as f64;
+                let trend = 1000.0 * (1.0 + 2e-5 * t) + 80.0 * (t / 2500.0).sin();
+                trend + 15.0 * (t / 97.0).sin() + 4.0 * (t / 13.0).cos()
+            })
+            .collect();
+        let mut balance = 1000.0;
+        let fills = (1..n)
+            .step_by(331)
+            .enumerate()
+            .map(|(j, index)| {
+                let pnl = if j % 3 == 2 { -2.5 } else { 1.5 };
+                balance += pnl;
+                let closed = j % 4 == 3;
+                Fill {
+                    index,
+                    coin: if j % 2 == 0 { "BTC" } else { "ETH" }.to_string(),
+                    pnl,
+                    fee_paid: -0.01,
+                    balance_usd_total: balance,
+                    balance_btc: 0.0,
+                    balance_usd: balance,
+                    btc_price: 50000.0,
+                    fill_qty: 0.1,
+                    fill_price: 100.0 + j as f64,
+                    position_size: if closed { 0.0 } else { 0.1 },
+                    position_price: 100.0,
+                    order_type: if closed {
+                        OrderType::CloseGridLong
+                    } else {
+                        OrderType::EntryGridNormalLong
+                    },
+                }
+            })
+            .collect();
+        (fills, equities)
+    }
 
-    // Use a HashMap to sum cost_pct per day
-    use std::collections::HashMap;
-    let mut daily_totals: HashMap<usize, f64> = HashMap::new();
+    /// Feeds the curve the way a backtest streams it: each minute's fills, then its equity.
+    fn stream(fills: &[Fill], equities: &[f64], mut stats: EquityStats) -> EquityStats {
+        let mut fill_iter = fills.iter().peekable();
+        for (k, &equity) in equities.iter().enumerate() {
+            while let Some(fill) = fill_iter.next_if(|fill| fill.index == k) {
+                stats.add_fill(fill);
+            }
+            stats.add_equity(equity);
+        }
+        stats
+    }
 
-    for fill in fills {
-        let day = fill.index / 1440;
-        let cost_pct = (fill.fill_qty.abs() * fill.fill_price) / fill.balance_usd_total;
-        *daily_totals.entry(day).or_insert(0.0) += cost_pct;
+    /// Last and min equity of each day of `equities`, computed directly.
+    fn chunked_daily(equities: &[f64]) -> (Vec<f64>, Vec<f64>) {
+        equities
+            .chunks(ROWS_PER_DAY)
+            .map(|day| {
+                let min = day.iter().copied().fold(f64::INFINITY, f64::min);
+                (*day.last().unwrap(), min)
+            })
+            .unzip()
     }
 
-    let total_days = daily_totals.len() as f64;
-    if total_days == 0.0 {
-        0.0
-    } else {
-        daily_totals.values().sum::<f64>() / total_days
+    fn to_json(analysis: &Analysis) -> String {
+        serde_json::to_string(analysis).unwrap()
+    }
+
+    #[test]
+    fn streamed_daily_equities_match_the_series() {
+        let (fills, equities) = fixed_series();
+        let stats = stream(
+            &fills,
+            &equities,
+            EquityStats::new(equities.len(), Denomination::Usd, 1),
+        );
+        for (days, &start) in stats.days.iter().zip(stats.starts.iter()) {
+            assert_eq!(days.series(), chunked_daily(&equities[start..]));
+        }
+    }
+
+    #[test]
+    fn streamed_equity_balance_diffs_match_the_series() {
+        let (fills, equities) = fixed_series();
+        let stats = stream(
+            &fills,
+            &equities,
+            EquityStats::new(equities.len(), Denomination::Usd, 1),
+        );
+        // before the first fill, equity is compared with that fill's balance
+        let balance_at = |k: usize| {
+            let i = fills.partition_point(|fill| fill.index <= k);
+            fills[i.max(1) - 1].balance_usd_total
+        };
+        let diffs: Vec<f64> = equities
+            .iter()
+            .enumerate()
+            .map(|(k, &equity)| (equity - balance_at(k)) / balance_at(k))
+            .collect();
+        let neg: Vec<f64> = diffs
+            .iter()
+            .filter(|&&d| d < 0.0)
+            .map(|d| d.abs())
+            .collect();
+        assert_eq!(stats.diffs.n_neg, neg.len());
+        assert_eq!(stats.diffs.neg_max, neg.iter().copied().fold(0.0, f64::max));
+        assert!((stats.diffs.neg_sum - neg.iter().sum::<f64>()).abs() < 1e-9);
+        assert_eq!(
+            stats.diffs.n_pos,
+            diffs.iter().filter(|&&d| d > 0.0).count()
+        );
+    }
+
+    #[test]
+    fn streamed_analysis_matches_analyze_backtest() {
+        let (fills, equities) = fixed_series();
+        let stats = stream(
+            &fills,
+            &equities,
+            EquityStats::new(equities.len(), Denomination::Usd, 1),
+        );
+        let analysis = analyze_equity_stats(&fills, &stats);
+        assert_eq!(
+            to_json(&analysis),
+            to_json(&analyze_backtest(&fills, &equities))
+        );
+        assert!(analysis.adg_w != 0.0 && analysis.drawdown_worst > 0.0);
+    }
+
+    #[test]
+    fn open_ended_stats_cut_suffixes_at_day_boundaries() {
+        let (fills, equities) = fixed_series();
+        let open_ended = stream(
+            &fills,
+            &equities,
+            EquityStats::open_ended(Denomination::Usd, 1),
+        );
+        let aligned = open_ended.with_day_aligned_suffixes();
+        assert_eq!(aligned.starts.len(), 10);
+        for (days, &start) in aligned.days.iter().zip(aligned.starts.iter()) {
+            assert_eq!(start % ROWS_PER_DAY, 0);
+            assert_eq!(days.series(), chunked_daily(&equities[start..]));
+        }
+        // only the weighted metrics depend on where the suffixes start
+        let expected = analyze_backtest(&fills, &equities);
+        let analysis = analyze_equity_stats(&fills, &open_ended);
+        assert_eq!(analysis.adg, expected.adg);
+        assert_eq!(analysis.sharpe_ratio, expected.sharpe_ratio);
+        assert_eq!(analysis.drawdown_worst, expected.drawdown_worst);
+        assert_eq!(
+            analysis.equity_balance_diff_neg_max,
+            expected.equity_balance_diff_neg_max
+        );
+        assert_eq!(analysis.loss_profit_ratio, expected.loss_profit_ratio);
     }
 }
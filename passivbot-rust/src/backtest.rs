@@ -1,3 +1,4 @@
+use crate::analysis::{Denomination, EquityStats};
 use crate::closes::{
     calc_closes_long, calc_closes_short, calc_next_close_long, calc_next_close_short,
 };
@@ -7,97 +8,143 @@ use crate::entries::{
     calc_next_entry_short,
 };
 use crate::types::{
-    BacktestParams, Balance, BotParams, BotParamsPair, EMABands, Equities, ExchangeParams, Fill,
-    Order, OrderBook, OrderType, Position, Positions, StateParams, TrailingPriceBundle,
+    BacktestParams, Balance, BotParams, BotParamsPair, CoinMap, CoinSet, EMABands, Equities,
+    ExchangeParams, Fill, HlcvElement, Order, OrderBook, OrderType, Position, Positions,
+    StateParams, TrailingPriceBundle,
 };
 use crate::utils::{
     calc_auto_unstuck_allowance, calc_new_psize_pprice, calc_pnl_long, calc_pnl_short,
     calc_pprice_diff_int, calc_wallet_exposure, cost_to_qty, hysteresis_rounding, qty_to_cost,
     round_, round_dn, round_up,
 };
-use ndarray::{s, ArrayView1, ArrayView3, Axis};
+use ndarray::{s, ArrayView1, ArrayView3};
+use serde::{Deserialize, Serialize};
 use std::cmp::Ordering;
-use std::collections::{HashMap, HashSet};
+use std::sync::{Arc, OnceLock};
+use std::time::{Duration, Instant};
 
+/// Alphas of the three long spans followed by those of the three short spans,
+/// in the same order as `EMAs`.
 #[derive(Clone, Default, Copy, Debug)]
 pub struct EmaAlphas {
-    pub long: Alphas,
-    pub short: Alphas,
+    pub alphas: [f64; 6],
+    pub alphas_inv: [f64; 6],
 }
 
-#[derive(Clone, Default, Copy, Debug)]
-pub struct Alphas {
-    pub alphas: [f64; 3],
-    pub alphas_inv: [f64; 3],
-}
-
-#[derive(Debug)]
-pub struct EMAs {
-    pub long: [f64; 3],
-    pub short: [f64; 3],
-}
+/// The three long EMAs followed by the three short EMAs of one coin. Being one array,
+/// a minute's update is a single 6-lane multiply-add that the compiler vectorizes.
+#[derive(Debug, Clone, Copy, Serialize, Deserialize)]
+pub struct EMAs(pub [f64; 6]);
 
-#[derive(Debug, Clone)]
+#[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct EffectiveNPositions {
     pub long: usize,
     pub short: usize,
 }
 
 impl EMAs {
+    #[inline]
+    fn update(&mut self, close_price: f64, alphas: &EmaAlphas) {
+        for z in 0..6 {
+            self.0[z] = close_price * alphas.alphas[z] + self.0[z] * alphas.alphas_inv[z];
+        }
+    }
+
     pub fn compute_bands(&self, pside: usize) -> EMABands {
-        let (upper, lower) = match pside {
-            LONG => (
-                *self
-                    .long
-                    .iter()
-                    .max_by(|a, b| a.partial_cmp(b).unwrap())
-                    .unwrap_or(&f64::MIN),
-                *self
-                    .long
-                    .iter()
-                    .min_by(|a, b| a.partial_cmp(b).unwrap())
-                    .unwrap_or(&f64::MAX),
-            ),
-            SHORT => (
-                *self
-                    .short
-                    .iter()
-                    .max_by(|a, b| a.partial_cmp(b).unwrap())
-                    .unwrap_or(&f64::MIN),
-                *self
-                    .short
-                    .iter()
-                    .min_by(|a, b| a.partial_cmp(b).unwrap())
-                    .unwrap_or(&f64::MAX),
-            ),
+        let emas = match pside {
+            LONG => &self.0[..3],
+            SHORT => &self.0[3..],
             _ => panic!("Invalid pside"),
         };
+        let upper = *emas
+            .iter()
+            .max_by(|a, b| a.partial_cmp(b).unwrap())
+            .unwrap_or(&f64::MIN);
+        let lower = *emas
+            .iter()
+            .min_by(|a, b| a.partial_cmp(b).unwrap())
+            .unwrap_or(&f64::MAX);
         EMABands { upper, lower }
     }
 }
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
 pub struct OpenOrders {
-    pub long: HashMap<usize, OpenOrderBundle>,
-    pub short: HashMap<usize, OpenOrderBundle>,
+    pub long: CoinMap<OpenOrderBundle>,
+    pub short: CoinMap<OpenOrderBundle>,
 }
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
 pub struct OpenOrderBundle {
     pub entries: Vec<Order>,
     pub closes: Vec<Order>,
 }
 
-#[derive(Default, Debug)]
+#[derive(Default, Debug, Clone, Serialize, Deserialize)]
 pub struct Actives {
-    long: HashSet<usize>,
-    short: HashSet<usize>,
+    long: CoinSet,
+    short: CoinSet,
 }
 
-#[derive(Default, Debug)]
+#[derive(Default, Debug, Clone, Serialize, Deserialize)]
 pub struct TrailingPrices {
-    pub long: HashMap<usize, TrailingPriceBundle>,
-    pub short: HashMap<usize, TrailingPriceBundle>,
+    pub long: Vec<TrailingPriceBundle>,
+    pub short: Vec<TrailingPriceBundle>,
+}
+
+/// Bit patterns of every input `calc_next_entry_*` / `calc_next_close_*` read for one
+/// coin and side. Exchange params and all bot params except the wallet exposure limit
+/// are fixed for the whole backtest, so equal inputs give bit-identical orders.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+struct OrderInputs([u64; 12]);
+
+impl OrderInputs {
+    fn new(
+        state_params: &StateParams,
+        wallet_exposure_limit: f64,
+        position: &Position,
+        trailing_price_bundle: &TrailingPriceBundle,
+        with_ema_bands: bool,
+    ) -> Self {
+        // close orders never read the EMA bands, so they are left out of their key
+        let (ema_upper, ema_lower) = if with_ema_bands {
+            (state_params.ema_bands.upper, state_params.ema_bands.lower)
+        } else {
+            (0.0, 0.0)
+        };
+        OrderInputs(
+            [
+                state_params.balance,
+                state_params.order_book.bid,
+                state_params.order_book.ask,
+                ema_upper,
+                ema_lower,
+                wallet_exposure_limit,
+                position.size,
+                position.price,
+                trailing_price_bundle.min_since_open,
+                trailing_price_bundle.max_since_min,
+                trailing_price_bundle.max_since_open,
+                trailing_price_bundle.min_since_max,
+            ]
+            .map(f64::to_bits),
+        )
+    }
+}
+
+/// Last next entry and next close computed for one coin and side, with their inputs.
+/// Idle coins often see unchanged inputs from one minute to the next (flat candles,
+/// sticky rounded balance), in which case the previous order is reused as is.
+#[derive(Debug, Default, Clone, Copy)]
+struct OrderMemo {
+    entry: Option<(OrderInputs, Order)>,
+    close: Option<(OrderInputs, Order)>,
+}
+
+#[derive(Default, Debug)]
+struct OrderMemos {
+    long: Vec<OrderMemo>,
+    short: Vec<OrderMemo>,
 }
 
 pub struct TrailingEnabled {
@@ -111,22 +158,425 @@ pub struct TradingEnabled {
     short: bool,
 }
 
-struct RollingSum {
-    long: Vec<f64>,
-    short: Vec<f64>,
-    prev_k_long: usize,
-    prev_k_short: usize,
+/// Per-dataset data shared read-only by every backtest run against the same HLCV array.
+/// Built once per dataset so batched evaluations don't repeat the per-coin setup work.
+/// The indexes of a window of a dataset (`window`) share the dataset's range tables.
+pub struct DatasetIndexes {
+    pub first_valid_timestamps: Vec<usize>,
+    pub last_valid_timestamps: Vec<usize>,
+    /// Per coin, the first row whose close differs from row 0's, or its first valid
+    /// timestamp if that comes earlier. Rows before a coin lists are front-filled with
+    /// its first close, so their EMAs need no per-minute update.
+    pub flat_close_until: Vec<usize>,
+    /// Sorted timestamps at which some coin lists, delists or stops being eligible.
+    coin_events: Vec<usize>,
+    /// Row of `tables` holding row 0 of this dataset, and the coin of `tables` of each coin.
+    row_offset: usize,
+    coins: Vec<usize>,
+    tables: Arc<RangeTables>,
+}
+
+/// Tables of a full HLCV array, shared by the indexes of its windows. Each is built on
+/// first use, so a backtest only pays for the ones it reads.
+struct RangeTables {
+    /// Only fast-forward needs them.
+    blocks: OnceLock<BlockTables>,
+    /// Only forager rankings need them.
+    prefix_sums: OnceLock<PrefixSums>,
 }
 
-pub struct Backtest<'a> {
-    hlcvs: &'a ArrayView3<'a, f64>,
+/// Coin-major max HIGH / min LOW per block of `FAST_FORWARD_BLOCK` rows.
+struct BlockTables {
+    high_max: Vec<f64>,
+    low_min: Vec<f64>,
+    n_blocks: usize,
+}
+
+/// Prefix sums of quote volume and of `(high - low) / close`.
+/// Costs 2 * n_coins * (n_timesteps + 1) f64, i.e. half the size of the HLCV array.
+struct PrefixSums {
+    volume: CumSums,
+    noisiness: CumSums,
+}
+
+/// Coin-major prefix sums of one per-row term, `n_timesteps + 1` entries per coin:
+/// entry `k` of a coin holds the compensated sum of its finite terms over rows `0..k`.
+/// Non-finite terms (e.g. noisiness at a 0 close) are kept apart, so that like a direct
+/// sum they only affect the windows that contain them.
+struct CumSums {
+    cumsum: Vec<f64>,
+    stride: usize,
+    /// Per coin, the rows with a non-finite term and the term, by row.
+    non_finite: Vec<Vec<(usize, f64)>>,
+    /// Per coin, the running sum and its Neumaier compensation while building.
+    running: Vec<(f64, f64)>,
+}
+
+/// Block size for the range max/min tables used by fast-forward.
+const FAST_FORWARD_BLOCK: usize = 64;
+
+/// Calls `f(k, idx)` for every row and coin, in memory order: minute by minute for the
+/// default (T, n_coins, 4) layout, coin by coin when the view is backed by a coin-major
+/// (n_coins, 4, T) file.
+fn for_each_in_memory_order<H: HlcvElement>(
+    hlcvs: &ArrayView3<H>,
+    mut f: impl FnMut(usize, usize),
+) {
+    let (n_timesteps, n_coins) = (hlcvs.shape()[0], hlcvs.shape()[1]);
+    if hlcvs.strides()[0] < hlcvs.strides()[1] {
+        for idx in 0..n_coins {
+            for k in 0..n_timesteps {
+                f(k, idx);
+            }
+        }
+    } else {
+        for k in 0..n_timesteps {
+            for idx in 0..n_coins {
+                f(k, idx);
+            }
+        }
+    }
+}
+
+impl CumSums {
+    fn new(n_coins: usize, n_timesteps: usize) -> Self {
+        CumSums {
+            cumsum: vec![0.0; n_coins * (n_timesteps + 1)],
+            stride: n_timesteps + 1,
+            non_finite: vec![Vec::new(); n_coins],
+            running: vec![(0.0, 0.0); n_coins],
+        }
+    }
+
+    /// Adds the term of row `k` of coin `idx`; each coin's rows must come in order.
+    #[inline]
+    fn push(&mut self, k: usize, idx: usize, term: f64) {
+        let (sum, compensation) = &mut self.running[idx];
+        if term.is_finite() {
+            let next = *sum + term;
+            *compensation += if sum.abs() >= term.abs() {
+                (*sum - next) + term
+            } else {
+                (term - next) + *sum
+            };
+            *sum = next;
+        } else {
+            self.non_finite[idx].push((k, term));
+        }
+        self.cumsum[idx * self.stride + k + 1] = *sum + *compensation;
+    }
+
+    /// Sum of the terms of rows `start..end` of coin `idx`.
+    #[inline]
+    fn sum(&self, idx: usize, start: usize, end: usize) -> f64 {
+        let base = idx * self.stride;
+        let finite = self.cumsum[base + end] - self.cumsum[base + start];
+        let non_finite = &self.non_finite[idx];
+        if non_finite.is_empty() {
+            return finite;
+        }
+        let first = non_finite.partition_point(|&(k, _)| k < start);
+        let last = non_finite.partition_point(|&(k, _)| k < end);
+        non_finite[first..last]
+            .iter()
+            .fold(finite, |sum, &(_, term)| sum + term)
+    }
+}
+
+impl PrefixSums {
+    fn new<H: HlcvElement>(hlcvs: &ArrayView3<H>) -> Self {
+        let (n_timesteps, n_coins) = (hlcvs.shape()[0], hlcvs.shape()[1]);
+        let mut volume = CumSums::new(n_coins, n_timesteps);
+        let mut noisiness = CumSums::new(n_coins, n_timesteps);
+        for_each_in_memory_order(hlcvs, |k, idx| {
+            let high = hlcvs[[k, idx, HIGH]].to_f64();
+            let low = hlcvs[[k, idx, LOW]].to_f64();
+            volume.push(k, idx, hlcvs[[k, idx, VOLUME]].to_f64());
+            noisiness.push(k, idx, (high - low) / hlcvs[[k, idx, CLOSE]].to_f64());
+        });
+        PrefixSums { volume, noisiness }
+    }
+}
+
+impl BlockTables {
+    fn new<H: HlcvElement>(hlcvs: &ArrayView3<H>) -> Self {
+        let (n_timesteps, n_coins) = (hlcvs.shape()[0], hlcvs.shape()[1]);
+        let n_blocks = (n_timesteps + FAST_FORWARD_BLOCK - 1) / FAST_FORWARD_BLOCK;
+        let mut high_max = vec![f64::MIN; n_coins * n_blocks];
+        let mut low_min = vec![f64::MAX; n_coins * n_blocks];
+        for_each_in_memory_order(hlcvs, |k, idx| {
+            let b = idx * n_blocks + k / FAST_FORWARD_BLOCK;
+            high_max[b] = high_max[b].max(hlcvs[[k, idx, HIGH]].to_f64());
+            low_min[b] = low_min[b].min(hlcvs[[k, idx, LOW]].to_f64());
+        });
+        BlockTables {
+            high_max,
+            low_min,
+            n_blocks,
+        }
+    }
+}
+
+/// Rolling volume and noisiness sums of one dataset, for the forager's coin rankings.
+pub struct ForagerSums<'a> {
+    prefix_sums: &'a PrefixSums,
+    row_offset: usize,
+    coins: &'a [usize],
+}
+
+impl ForagerSums<'_> {
+    /// Sum of quote volume over rows `start..end` for coin `idx`.
+    #[inline]
+    pub fn volume_sum(&self, idx: usize, start: usize, end: usize) -> f64 {
+        self.prefix_sums.volume.sum(
+            self.coins[idx],
+            self.row_offset + start,
+            self.row_offset + end,
+        )
+    }
+
+    /// Sum of `(high - low) / close` over rows `start..end` for coin `idx`.
+    #[inline]
+    pub fn noisiness_sum(&self, idx: usize, start: usize, end: usize) -> f64 {
+        self.prefix_sums.noisiness.sum(
+            self.coins[idx],
+            self.row_offset + start,
+            self.row_offset + end,
+        )
+    }
+}
+
+impl DatasetIndexes {
+    pub fn new<H: HlcvElement>(hlcvs: &ArrayView3<H>) -> Self {
+        let n_coins = hlcvs.shape()[1];
+        Self::with_tables(
+            hlcvs,
+            0,
+            (0..n_coins).collect(),
+            Arc::new(RangeTables {
+                blocks: OnceLock::new(),
+                prefix_sums: OnceLock::new(),
+            }),
+        )
+    }
+
+    /// Indexes of `hlcvs`, the rows `start..` of coins `coins` of `parent`, whose indexes
+    /// `self` are. Only the per-coin bounds are computed; the range tables are shared with
+    /// `self`, and its prefix sums, plus its block tables if `fast_forward`, are built now
+    /// if they aren't yet. Rolling sums therefore differ from those of `new` on a copy of
+    /// the window by rounding only.
+    pub fn window<H: HlcvElement>(
+        &self,
+        parent: &ArrayView3<H>,
+        hlcvs: &ArrayView3<H>,
+        start: usize,
+        coins: &[usize],
+        fast_forward: bool,
+    ) -> Self {
+        self.tables
+            .prefix_sums
+            .get_or_init(|| PrefixSums::new(parent));
+        if fast_forward {
+            self.tables.blocks.get_or_init(|| BlockTables::new(parent));
+        }
+        Self::with_tables(
+            hlcvs,
+            self.row_offset + start,
+            coins.iter().map(|&idx| self.coins[idx]).collect(),
+            self.tables.clone(),
+        )
+    }
+
+    fn with_tables<H: HlcvElement>(
+        hlcvs: &ArrayView3<H>,
+        row_offset: usize,
+        coins: Vec<usize>,
+        tables: Arc<RangeTables>,
+    ) -> Self {
+        let (first_valid_timestamps, last_valid_timestamps) = find_valid_timestamp_bounds(hlcvs);
+        let flat_close_until = (0..hlcvs.shape()[1])
+            .map(|idx| {
+                let first_close = hlcvs[[0, idx, CLOSE]].to_f64().to_bits();
+                let first_valid = first_valid_timestamps[idx];
+                (1..first_valid)
+                    .find(|&k| hlcvs[[k, idx, CLOSE]].to_f64().to_bits() != first_close)
+                    .unwrap_or(first_valid)
+            })
+            .collect();
+        let mut coin_events: Vec<usize> = first_valid_timestamps
+            .iter()
+            .chain(last_valid_timestamps.iter())
+            .flat_map(|&ts| [ts, ts + 1])
+            .collect();
+        coin_events.sort_unstable();
+        coin_events.dedup();
+        DatasetIndexes {
+            first_valid_timestamps,
+            last_valid_timestamps,
+            flat_close_until,
+            coin_events,
+            row_offset,
+            coins,
+            tables,
+        }
+    }
+
+    /// First timestamp after `k` at which some coin lists or delists.
+    #[inline]
+    pub fn next_coin_event(&self, k: usize) -> usize {
+        let i = self.coin_events.partition_point(|&ts| ts <= k);
+        self.coin_events.get(i).copied().unwrap_or(usize::MAX)
+    }
+
+    /// First timestamp in `start..end` where coin `idx` trades below `buy_price`
+    /// or above `sell_price`, i.e. where a resting buy at `buy_price` or sell at
+    /// `sell_price` would fill. Returns `end` if there is none.
+    pub fn next_crossing<H: HlcvElement>(
+        &self,
+        hlcvs: &ArrayView3<H>,
+        idx: usize,
+        start: usize,
+        end: usize,
+        buy_price: f64,
+        sell_price: f64,
+    ) -> usize {
+        // windows build their parent's tables up front, so only full arrays get here
+        let blocks = self.tables.blocks.get_or_init(|| BlockTables::new(hlcvs));
+        let first_block = self.coins[idx] * blocks.n_blocks;
+        let mut k = start;
+        while k < end {
+            // blocks are aligned to the rows of the full array
+            let row = self.row_offset + k;
+            if row % FAST_FORWARD_BLOCK == 0 && k + FAST_FORWARD_BLOCK <= end {
+                let b = first_block + row / FAST_FORWARD_BLOCK;
+                if blocks.low_min[b] >= buy_price && blocks.high_max[b] <= sell_price {
+                    k += FAST_FORWARD_BLOCK;
+                    continue;
+                }
+            }
+            if hlcvs[[k, idx, LOW]].to_f64() < buy_price
+                || hlcvs[[k, idx, HIGH]].to_f64() > sell_price
+            {
+                return k;
+            }
+            k += 1;
+        }
+        end
+    }
+
+    /// Rolling sums for the forager of a backtest on `hlcvs`, the data these indexes were
+    /// built from. The prefix sums behind them are built on the first call.
+    pub fn forager_sums<H: HlcvElement>(&self, hlcvs: &ArrayView3<H>) -> ForagerSums<'_> {
+        ForagerSums {
+            // windows build their parent's sums up front, so only full arrays get here
+            prefix_sums: self
+                .tables
+                .prefix_sums
+                .get_or_init(|| PrefixSums::new(hlcvs)),
+            row_offset: self.row_offset,
+            coins: &self.coins,
+        }
+    }
+}
+
+/// Running `drawdown_worst` over daily equity minimums, computed incrementally the same
+/// way as `calc_drawdowns` in the analysis. The current day's minimum so far can only
+/// fall further, so the running value never overstates the final one.
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
+struct DrawdownTracker {
+    rows_per_day: usize,
+    day: usize,
+    day_min: f64,
+    prev_day_min: Option<f64>,
+    cumulative_return: f64,
+    cumulative_max: f64,
+}
+
+impl DrawdownTracker {
+    fn new(equity: f64, rows_per_day: usize) -> Self {
+        DrawdownTracker {
+            rows_per_day,
+            day: 0,
+            day_min: equity,
+            prev_day_min: None,
+            cumulative_return: 1.0,
+            cumulative_max: 1.0,
+        }
+    }
+
+    /// Add the equity at index `i` and return the current drawdown (positive fraction).
+    fn update(&mut self, i: usize, equity: f64) -> f64 {
+        let day = i / self.rows_per_day;
+        if day > self.day {
+            if let Some(prev) = self.prev_day_min {
+                self.cumulative_return *= 1.0 + (self.day_min - prev) / prev;
+                self.cumulative_max = self.cumulative_max.max(self.cumulative_return);
+            }
+            self.prev_day_min = Some(self.day_min);
+            self.day = day;
+            self.day_min = equity;
+        } else {
+            self.day_min = self.day_min.min(equity);
+        }
+        match self.prev_day_min {
+            Some(prev) => {
+                let ret = self.cumulative_return * (1.0 + (self.day_min - prev) / prev);
+                let max = self.cumulative_max.max(ret);
+                ((ret - max) / max).abs()
+            }
+            None => 0.0,
+        }
+    }
+}
+
+/// State of a `Backtest` at the start of minute `k`, taken so that a later run on the
+/// same data extended at the end can continue from `k` instead of starting over.
+/// Per-dataset indexes (prefix sums, valid ranges) are rebuilt from the new data.
+///
+/// Equities are kept as the running stats the analysis needs plus every
+/// `sample_minutes`-th equity, never as the full per-minute curve. Fills are kept whole:
+/// the fill metrics and the returned fills cover the entire range.
+#[derive(Clone, Serialize, Deserialize)]
+pub struct BacktestCheckpoint {
+    /// First minute not yet simulated.
+    pub k: usize,
+    bot_params_original: Vec<BotParamsPair>,
+    exchange_params_list: Vec<ExchangeParams>,
+    backtest_params: BacktestParams,
+    /// `data_hash` of minutes `0..k`, compared against the new data.
+    data_hash: u64,
+    first_valid_timestamps: Vec<usize>,
+    last_valid_timestamps: Vec<Option<usize>>,
+    bot_params: Vec<BotParamsPair>,
+    effective_n_positions: EffectiveNPositions,
+    balance: Balance,
+    emas: Vec<EMAs>,
+    positions: Positions,
+    open_orders: OpenOrders,
+    trailing_prices: TrailingPrices,
+    actives: Actives,
+    pnl_cumsum_running: f64,
+    pnl_cumsum_max: f64,
+    fills: Vec<Fill>,
+    equities: Equities,
+    streamed_equities: StreamedEquities,
+    fast_forward_until: usize,
+    drawdown_usd: DrawdownTracker,
+    drawdown_btc: DrawdownTracker,
+    aborted_at: Option<usize>,
+}
+
+pub struct Backtest<'a, H: HlcvElement = f64> {
+    hlcvs: &'a ArrayView3<'a, H>,
     btc_usd_prices: &'a ArrayView1<'a, f64>, // Change to ArrayView1 (1D view)
+    indexes: &'a DatasetIndexes,
     bot_params_master: BotParamsPair,
     bot_params: Vec<BotParamsPair>,
     bot_params_original: Vec<BotParamsPair>,
     effective_n_positions: EffectiveNPositions,
     exchange_params_list: Vec<ExchangeParams>,
     backtest_params: BacktestParams,
+    minutes_per_row: usize,
     pub balance: Balance,
     n_coins: usize,
     ema_alphas: Vec<EmaAlphas>,
@@ -134,6 +584,7 @@ pub struct Backtest<'a> {
     positions: Positions,
     open_orders: OpenOrders,
     trailing_prices: TrailingPrices,
+    order_memos: OrderMemos,
     actives: Actives,
     pnl_cumsum_running: f64,
     pnl_cumsum_max: f64,
@@ -143,20 +594,107 @@ pub struct Backtest<'a> {
     any_trailing_long: bool,
     any_trailing_short: bool,
     equities: Equities,
-    last_valid_timestamps: HashMap<usize, usize>,
-    first_valid_timestamps: HashMap<usize, usize>,
-    did_fill_long: HashSet<usize>,
-    did_fill_short: HashSet<usize>,
+    last_valid_timestamps: Vec<Option<usize>>,
+    first_valid_timestamps: Vec<usize>,
+    did_fill_long: CoinSet,
+    did_fill_short: CoinSet,
     n_eligible_long: usize,
     n_eligible_short: usize,
-    rolling_volume_sum: RollingSum,
     volume_indices_buffer: Option<Vec<(f64, usize)>>,
+    coin_indices_buffer: Vec<usize>,
+    fast_forward_until: usize,
+    drawdown_usd: DrawdownTracker,
+    drawdown_btc: DrawdownTracker,
+    aborted_at: Option<usize>,
+    streamed_equities: Option<StreamedEquities>,
+    profile: Option<Box<BacktestProfile>>,
+}
+
+/// Equity stats gathered while the backtest runs, in place of every minute's equity.
+#[derive(Clone, Serialize, Deserialize)]
+struct StreamedEquities {
+    usd: EquityStats,
+    btc: Option<EquityStats>, // only with BTC collateral
+    /// Every `sample_minutes`-th equity is still kept in `Equities`; none if 0.
+    sample_minutes: usize,
+}
+
+/// Parts of a simulated minute timed by `BacktestProfile`.
+#[derive(Debug, Clone, Copy)]
+pub enum Phase {
+    CheckForFills,
+    UpdateEmas,
+    UpdateTrailingPrices,
+    UpdateNPositionsAndWalletExposureLimits,
+    UpdateOpenOrdersAll,
+    CalcUnstuckingClose,
+    UpdateEquities,
+    CalcFastForwardUntil,
 }
 
-impl<'a> Backtest<'a> {
+impl Phase {
+    pub const ALL: [Phase; 8] = [
+        Phase::CheckForFills,
+        Phase::UpdateEmas,
+        Phase::UpdateTrailingPrices,
+        Phase::UpdateNPositionsAndWalletExposureLimits,
+        Phase::UpdateOpenOrdersAll,
+        Phase::CalcUnstuckingClose,
+        Phase::UpdateEquities,
+        Phase::CalcFastForwardUntil,
+    ];
+
+    /// Name of the `Backtest` method the phase times.
+    pub fn name(self) -> &'static str {
+        match self {
+            Phase::CheckForFills => "check_for_fills",
+            Phase::UpdateEmas => "update_emas",
+            Phase::UpdateTrailingPrices => "update_trailing_prices",
+            Phase::UpdateNPositionsAndWalletExposureLimits => {
+                "update_n_positions_and_wallet_exposure_limits"
+            }
+            Phase::UpdateOpenOrdersAll => "update_open_orders_all",
+            Phase::CalcUnstuckingClose => "calc_unstucking_close",
+            Phase::UpdateEquities => "update_equities",
+            Phase::CalcFastForwardUntil => "calc_fast_forward_until",
+        }
+    }
+}
+
+/// Work done by a backtest, counted when profiling.
+#[derive(Debug, Default, Clone, Serialize)]
+pub struct ProfileCounters {
+    /// Minutes simulated in full, and inside fast-forwarded spans.
+    pub minutes_simulated: u64,
+    pub minutes_fast_forwarded: u64,
+    /// Open orders after each recalculation, summed over minutes.
+    pub orders_computed: u64,
+    /// Next entry/close calculations, and those answered from the order memos instead.
+    pub next_order_calcs: u64,
+    pub next_order_memo_hits: u64,
+    /// Full grid calculations (the next order would fill), and the orders they returned,
+    /// i.e. grid loop iterations that produced an order.
+    pub grid_calcs: u64,
+    pub grid_orders: u64,
+    /// Volume filter and noisiness rankings of forager candidates.
+    pub forager_rankings: u64,
+}
+
+/// Wall time and calls per `Phase`, plus work counters, of a backtest run with
+/// `Backtest::enable_profile`. Times are inclusive: `calc_unstucking_close` runs within
+/// `update_open_orders_all`.
+#[derive(Debug, Default, Clone)]
+pub struct BacktestProfile {
+    pub durations: [Duration; Phase::ALL.len()],
+    pub calls: [u64; Phase::ALL.len()],
+    pub counters: ProfileCounters,
+}
+
+impl<'a, H: HlcvElement> Backtest<'a, H> {
     pub fn new(
-        hlcvs: &'a ArrayView3<'a, f64>,
+        hlcvs: &'a ArrayView3<'a, H>,
         btc_usd_prices: &'a ArrayView1<'a, f64>,
+        indexes: &'a DatasetIndexes,
         bot_params: Vec<BotParamsPair>,
         exchange_params_list: Vec<ExchangeParams>,
         backtest_params: &BacktestParams,
@@ -176,26 +714,25 @@ impl<'a> Backtest<'a> {
 
         let n_coins = hlcvs.shape()[1];
         let initial_emas = (0..n_coins)
-            .map(|i| {
-                let close_price = hlcvs[[0, i, CLOSE]];
-                EMAs {
-                    long: [close_price; 3],
-                    short: [close_price; 3],
-                }
-            })
+            .map(|i| EMAs([hlcvs[[0, i, CLOSE]].to_f64(); 6]))
             .collect();
         let mut equities = Equities::default();
         equities.usd.push(backtest_params.starting_balance);
         equities.btc.push(balance.btc);
 
-        // init bot params
+        // Store original bot params to preserve dynamic WEL indicators
+        let bot_params_original = bot_params.clone();
+
+        // init bot params, with minute-denominated params in rows of this dataset
+        let minutes_per_row = backtest_params.fidelity_minutes.max(1);
+        let bot_params: Vec<BotParamsPair> = bot_params
+            .iter()
+            .map(|bp| bot_params_in_rows(bp, minutes_per_row))
+            .collect();
         let mut bot_params_master = bot_params[0].clone();
         bot_params_master.long.n_positions = n_coins.min(bot_params_master.long.n_positions);
         bot_params_master.short.n_positions = n_coins.min(bot_params_master.short.n_positions);
 
-        // Store original bot params to preserve dynamic WEL indicators
-        let bot_params_original = bot_params.clone();
-
         let n_eligible_long = bot_params_master.long.n_positions.max(
             (n_coins as f64 * (1.0 - bot_params_master.long.filter_volume_drop_pct)).round()
                 as usize,
@@ -227,20 +764,32 @@ impl<'a> Backtest<'a> {
         Backtest {
             hlcvs,
             btc_usd_prices,
+            indexes,
             bot_params_master: bot_params_master.clone(),
             bot_params: bot_params.clone(),
             bot_params_original,
             effective_n_positions,
             exchange_params_list,
             backtest_params: backtest_params.clone(),
+            minutes_per_row,
             balance,
             n_coins,
             ema_alphas,
             emas: initial_emas,
-            positions: Positions::default(),
-            open_orders: OpenOrders::default(),
+            positions: Positions {
+                long: CoinMap::with_capacity(n_coins),
+                short: CoinMap::with_capacity(n_coins),
+            },
+            open_orders: OpenOrders {
+                long: CoinMap::with_capacity(n_coins),
+                short: CoinMap::with_capacity(n_coins),
+            },
             trailing_prices: TrailingPrices::default(),
-            actives: Actives::default(),
+            order_memos: OrderMemos::default(),
+            actives: Actives {
+                long: CoinSet::with_capacity(n_coins),
+                short: CoinSet::with_capacity(n_coins),
+            },
             pnl_cumsum_running: 0.0,
             pnl_cumsum_max: 0.0,
             fills: Vec::new(),
@@ -258,61 +807,453 @@ impl<'a> Backtest<'a> {
             any_trailing_long,
             any_trailing_short,
             equities: equities,
-            last_valid_timestamps: HashMap::new(),
-            first_valid_timestamps: HashMap::new(),
-            did_fill_long: HashSet::new(),
-            did_fill_short: HashSet::new(),
+            last_valid_timestamps: vec![None; n_coins],
+            first_valid_timestamps: vec![0; n_coins],
+            did_fill_long: CoinSet::with_capacity(n_coins),
+            did_fill_short: CoinSet::with_capacity(n_coins),
             n_eligible_long,
             n_eligible_short,
-            rolling_volume_sum: RollingSum {
-                long: vec![0.0; n_coins],
-                short: vec![0.0; n_coins],
-                prev_k_long: 0,
-                prev_k_short: 0,
-            },
             volume_indices_buffer: Some(vec![(0.0, 0); n_coins]), // Initialize here
+            coin_indices_buffer: Vec::with_capacity(n_coins),
+            fast_forward_until: 0,
+            drawdown_usd: DrawdownTracker::default(),
+            drawdown_btc: DrawdownTracker::default(),
+            aborted_at: None,
+            streamed_equities: None,
+            profile: None,
+        }
+    }
+
+    /// Gather the equity stats the analysis needs while running instead of keeping every
+    /// minute's equity; `Equities` then holds only every `sample_minutes`-th minute, or
+    /// nothing if 0. Analyze the run with `equity_stats`. Call once, before running.
+    pub fn stream_equities(&mut self, sample_minutes: usize) {
+        let n_planned = self.hlcvs.shape()[0] - 1;
+        self.start_streaming(sample_minutes, |denomination, minutes_per_row| {
+            EquityStats::new(n_planned, denomination, minutes_per_row)
+        });
+    }
+
+    fn start_streaming(
+        &mut self,
+        sample_minutes: usize,
+        new_stats: impl Fn(Denomination, usize) -> EquityStats,
+    ) {
+        let mut usd = new_stats(Denomination::Usd, self.minutes_per_row);
+        usd.add_equity(self.backtest_params.starting_balance);
+        let btc = self.balance.use_btc_collateral.then(|| {
+            let mut btc = new_stats(Denomination::Btc, self.minutes_per_row);
+            btc.add_equity(self.balance.btc);
+            btc
+        });
+        if sample_minutes == 0 {
+            self.equities.usd.clear();
+            self.equities.btc.clear();
+        }
+        self.streamed_equities = Some(StreamedEquities {
+            usd,
+            btc,
+            sample_minutes,
+        });
+    }
+
+    /// USD and, with BTC collateral, BTC equity stats of a run set up by `stream_equities`.
+    pub fn equity_stats(&self) -> Option<(&EquityStats, Option<&EquityStats>)> {
+        self.streamed_equities
+            .as_ref()
+            .map(|streamed| (&streamed.usd, streamed.btc.as_ref()))
+    }
+
+    /// Time the phases of every simulated minute and count work done; see `profile`.
+    /// Results are unaffected. Call before running.
+    pub fn enable_profile(&mut self) {
+        self.profile = Some(Box::default());
+    }
+
+    /// Profile of a run set up by `enable_profile`.
+    pub fn profile(&self) -> Option<&BacktestProfile> {
+        self.profile.as_deref()
+    }
+
+    /// Runs `f`, adding its wall time to `phase` when profiling.
+    #[inline(always)]
+    fn timed<R>(&mut self, phase: Phase, f: impl FnOnce(&mut Self) -> R) -> R {
+        if self.profile.is_none() {
+            return f(self);
+        }
+        let start = Instant::now();
+        let result = f(self);
+        if let Some(profile) = self.profile.as_mut() {
+            profile.durations[phase as usize] += start.elapsed();
+            profile.calls[phase as usize] += 1;
+        }
+        result
+    }
+
+    /// Updates the profile counters when profiling.
+    #[inline(always)]
+    fn count(&mut self, update: impl FnOnce(&mut ProfileCounters)) {
+        if let Some(profile) = self.profile.as_mut() {
+            update(&mut profile.counters);
         }
     }
 
+    /// Minutes covered by each HLCV row, equity and fill index.
+    pub fn minutes_per_row(&self) -> usize {
+        self.minutes_per_row
+    }
+
     pub fn run(&mut self) -> (Vec<Fill>, Equities) {
         let n_timesteps = self.hlcvs.shape()[0];
+        self.prepare();
+        for k in 1..(n_timesteps - 1) {
+            self.step(k);
+            if self.aborted_at.is_some() {
+                break;
+            }
+        }
+        self.take_results()
+    }
+
+    /// Same as `run`, but continues from `resume_from` if given, and also returns a
+    /// checkpoint taken at `checkpoint_minute` for continuing once more data is appended.
+    ///
+    /// Equities are streamed into `EquityStats::open_ended` stats (see `equity_stats`),
+    /// keeping every `sample_minutes`-th equity, so the checkpoint holds no per-minute
+    /// curve. Fills and kept equities are identical to a full run on this data, except
+    /// that with `fast_forward_max_minutes` > 0 fast-forward spans may end at the resume
+    /// minute. Don't call `stream_equities` first.
+    pub fn run_resumable(
+        &mut self,
+        resume_from: Option<BacktestCheckpoint>,
+        sample_minutes: usize,
+    ) -> Result<(Vec<Fill>, Equities, BacktestCheckpoint), String> {
+        if self.streamed_equities.is_some() {
+            return Err("resumable runs stream their own equity stats".into());
+        }
+        let n_timesteps = self.hlcvs.shape()[0];
+        self.start_streaming(sample_minutes, EquityStats::open_ended);
+        self.prepare();
+        let start = match resume_from {
+            Some(checkpoint) => self.restore(checkpoint)?,
+            None => 1,
+        };
+        let checkpoint_k = self.checkpoint_minute().max(start);
+        let mut checkpoint = None;
+        let mut k = start;
+        while k < n_timesteps - 1 && self.aborted_at.is_none() {
+            if k == checkpoint_k {
+                checkpoint = Some(self.checkpoint(k));
+            }
+            self.step(k);
+            k += 1;
+        }
+        let checkpoint = checkpoint.unwrap_or_else(|| self.checkpoint(k));
+        let (fills, equities) = self.take_results();
+        Ok((fills, equities, checkpoint))
+    }
+
+    /// Last minute whose state cannot change when data is appended to this dataset:
+    /// the end of the data, or earlier if a coin's data ends within the final day.
+    /// Such a coin is treated as delisted only once more data follows, which changes
+    /// the simulation from its last valid minute on.
+    pub fn checkpoint_minute(&self) -> usize {
+        let n_timesteps = self.hlcvs.shape()[0];
+        (0..self.n_coins)
+            .filter(|&idx| self.last_valid_timestamps[idx].is_none())
+            .map(|idx| self.indexes.last_valid_timestamps[idx])
+            .fold(n_timesteps - 1, usize::min)
+            .max(1)
+    }
+
+    /// Hash of the HLCV rows and BTC/USD prices of minutes `0..k`. It only detects changed
+    /// data, so a fast word-wise mix (as in FxHash) suffices.
+    fn data_hash(&self, k: usize) -> u64 {
+        let mix = |hash: u64, value: f64| {
+            (hash.rotate_left(5) ^ value.to_bits()).wrapping_mul(0x517c_c1b7_2722_0a95)
+        };
+        let hash = self
+            .hlcvs
+            .slice(s![..k, .., ..])
+            .iter()
+            .fold(k as u64, |hash, &value| mix(hash, value.to_f64()));
+        self.btc_usd_prices
+            .slice(s![..k])
+            .iter()
+            .fold(hash, |hash, &price| mix(hash, price))
+    }
+
+    /// Snapshot of the simulation state at the start of minute `k` of a resumable run.
+    pub fn checkpoint(&self, k: usize) -> BacktestCheckpoint {
+        BacktestCheckpoint {
+            k,
+            bot_params_original: self.bot_params_original.clone(),
+            exchange_params_list: self.exchange_params_list.clone(),
+            backtest_params: self.backtest_params.clone(),
+            data_hash: self.data_hash(k),
+            first_valid_timestamps: self.first_valid_timestamps.clone(),
+            last_valid_timestamps: self.last_valid_timestamps.clone(),
+            bot_params: self.bot_params.clone(),
+            effective_n_positions: self.effective_n_positions.clone(),
+            balance: self.balance.clone(),
+            emas: self.emas.clone(),
+            positions: self.positions.clone(),
+            open_orders: self.open_orders.clone(),
+            trailing_prices: self.trailing_prices.clone(),
+            actives: self.actives.clone(),
+            pnl_cumsum_running: self.pnl_cumsum_running,
+            pnl_cumsum_max: self.pnl_cumsum_max,
+            fills: self.fills.clone(),
+            equities: self.equities.clone(),
+            streamed_equities: self
+                .streamed_equities
+                .clone()
+                .expect("checkpoints are taken in resumable runs, which stream equities"),
+            fast_forward_until: self.fast_forward_until,
+            drawdown_usd: self.drawdown_usd.clone(),
+            drawdown_btc: self.drawdown_btc.clone(),
+            aborted_at: self.aborted_at,
+        }
+    }
+
+    /// Load the state of `checkpoint`, taken on a prefix of this backtest's data with the
+    /// same parameters. Call after `prepare`; returns the first minute to simulate.
+    pub fn restore(&mut self, checkpoint: BacktestCheckpoint) -> Result<usize, String> {
+        let k = checkpoint.k;
+        let n_timesteps = self.hlcvs.shape()[0];
+        if checkpoint.bot_params_original != self.bot_params_original
+            || checkpoint.exchange_params_list != self.exchange_params_list
+            || checkpoint.backtest_params != self.backtest_params
+        {
+            return Err("checkpoint was taken with different parameters".to_string());
+        }
+        if k == 0 || k > n_timesteps - 1 {
+            return Err(format!(
+                "checkpoint minute {} is outside of the data ({} minutes)",
+                k, n_timesteps
+            ));
+        }
+        let sample_minutes = self.streamed_equities.as_ref().map(|s| s.sample_minutes);
+        if Some(checkpoint.streamed_equities.sample_minutes) != sample_minutes {
+            return Err("checkpoint was taken with a different equity sampling".to_string());
+        }
+        if checkpoint.balance.use_btc_collateral != self.balance.use_btc_collateral
+            || checkpoint.data_hash != self.data_hash(k)
+        {
+            return Err(format!("data differs from checkpoint before minute {}", k));
+        }
+        // listings and delistings only need to agree up to the checkpoint
         for idx in 0..self.n_coins {
-            self.trailing_prices
-                .long
-                .insert(idx, TrailingPriceBundle::default());
-            self.trailing_prices
-                .short
-                .insert(idx, TrailingPriceBundle::default());
+            let listed = |first: usize| first.min(k);
+            let delisted = |last: Option<usize>| last.unwrap_or(usize::MAX).min(k);
+            if listed(checkpoint.first_valid_timestamps[idx])
+                != listed(self.first_valid_timestamps[idx])
+                || delisted(checkpoint.last_valid_timestamps[idx])
+                    != delisted(self.last_valid_timestamps[idx])
+            {
+                return Err(format!(
+                    "valid range of {} before minute {} differs from checkpoint",
+                    self.backtest_params.coins[idx], k
+                ));
+            }
         }
+        self.bot_params = checkpoint.bot_params;
+        self.effective_n_positions = checkpoint.effective_n_positions;
+        self.balance = checkpoint.balance;
+        self.emas = checkpoint.emas;
+        self.positions = checkpoint.positions;
+        self.open_orders = checkpoint.open_orders;
+        self.trailing_prices = checkpoint.trailing_prices;
+        self.actives = checkpoint.actives;
+        self.pnl_cumsum_running = checkpoint.pnl_cumsum_running;
+        self.pnl_cumsum_max = checkpoint.pnl_cumsum_max;
+        self.fills = checkpoint.fills;
+        self.equities = checkpoint.equities;
+        self.streamed_equities = Some(checkpoint.streamed_equities);
+        self.fast_forward_until = checkpoint.fast_forward_until;
+        self.drawdown_usd = checkpoint.drawdown_usd;
+        self.drawdown_btc = checkpoint.drawdown_btc;
+        self.aborted_at = checkpoint.aborted_at;
+        Ok(k)
+    }
 
-        // --- find first & last valid candle for every coin (binary-search) ---
-        let (first_valid, last_valid) = find_valid_timestamp_bounds(&self.hlcvs);
+    /// Set up per-coin state before the first call to `step`.
+    pub fn prepare(&mut self) {
+        let n_timesteps = self.hlcvs.shape()[0];
+        // starting equities; with streamed equities the vectors may already be empty
+        let rows_per_day = 1440 / self.minutes_per_row;
+        self.drawdown_usd =
+            DrawdownTracker::new(self.backtest_params.starting_balance, rows_per_day);
+        self.drawdown_btc = DrawdownTracker::new(self.balance.btc, rows_per_day);
+        self.trailing_prices.long = (0..self.n_coins)
+            .map(|_| TrailingPriceBundle::default())
+            .collect();
+        self.trailing_prices.short = (0..self.n_coins)
+            .map(|_| TrailingPriceBundle::default())
+            .collect();
+        self.order_memos.long = vec![OrderMemo::default(); self.n_coins];
+        self.order_memos.short = vec![OrderMemo::default(); self.n_coins];
+
+        // `update_emas` skips a coin's flat leading rows. Their updates all apply the row-0
+        // close, so the EMAs settle on a fixed point within a few steps; run those here.
+        for (idx, emas) in self.emas.iter_mut().enumerate() {
+            let close_price = self.hlcvs[[0, idx, CLOSE]].to_f64();
+            for _ in 1..self.indexes.flat_close_until[idx] {
+                let previous = emas.0.map(f64::to_bits);
+                emas.update(close_price, &self.ema_alphas[idx]);
+                if emas.0.map(f64::to_bits) == previous {
+                    break;
+                }
+            }
+        }
+
+        // --- first & last valid candle for every coin (precomputed per dataset) ---
+        let first_valid = &self.indexes.first_valid_timestamps;
+        let last_valid = &self.indexes.last_valid_timestamps;
         for idx in 0..self.n_coins {
-            self.first_valid_timestamps.insert(idx, first_valid[idx]);
-            if n_timesteps - last_valid[idx] > 1400 {
+            self.first_valid_timestamps[idx] = first_valid[idx];
+            if n_timesteps - last_valid[idx] > 1400 / self.minutes_per_row {
                 // add only if delisted more than one day before last timestamp
-                self.last_valid_timestamps.insert(idx, last_valid[idx]); // keep same name for callers
+                self.last_valid_timestamps[idx] = Some(last_valid[idx]); // keep same name for callers
             }
         }
+    }
 
-        for k in 1..(n_timesteps - 1) {
-            self.check_for_fills(k);
-            self.update_emas(k);
-            self.update_rounded_balance(k);
-            self.update_trailing_prices(k);
-            self.update_n_positions_and_wallet_exposure_limits(k);
-            self.update_open_orders_all(k);
-            self.update_equities(k);
+    /// Simulate a single minute.
+    #[inline]
+    pub fn step(&mut self, k: usize) {
+        if self.aborted_at.is_some() {
+            return;
+        }
+        if k < self.fast_forward_until {
+            self.step_without_orders(k);
+            return;
+        }
+        self.timed(Phase::CheckForFills, |bt| bt.check_for_fills(k));
+        self.timed(Phase::UpdateEmas, |bt| bt.update_emas(k));
+        self.update_rounded_balance(k);
+        self.timed(Phase::UpdateTrailingPrices, |bt| {
+            bt.update_trailing_prices(k)
+        });
+        self.timed(Phase::UpdateNPositionsAndWalletExposureLimits, |bt| {
+            bt.update_n_positions_and_wallet_exposure_limits(k)
+        });
+        self.timed(Phase::UpdateOpenOrdersAll, |bt| {
+            bt.update_open_orders_all(k)
+        });
+        self.timed(Phase::UpdateEquities, |bt| bt.update_equities(k));
+        if self.backtest_params.fast_forward_max_minutes > 0 {
+            self.fast_forward_until = self.timed(Phase::CalcFastForwardUntil, |bt| {
+                bt.calc_fast_forward_until(k)
+            });
+        }
+        if self.profile.is_some() {
+            let orders_computed = self
+                .open_orders
+                .long
+                .iter()
+                .chain(self.open_orders.short.iter())
+                .map(|(_, bundle)| (bundle.entries.len() + bundle.closes.len()) as u64)
+                .sum::<u64>();
+            self.count(|counters| {
+                counters.minutes_simulated += 1;
+                counters.orders_computed += orders_computed;
+            });
         }
-        (self.fills.clone(), self.equities.clone())
+    }
+
+    /// Minute inside a fast-forwarded span: no order can fill, so fills and order
+    /// recalculation are skipped; EMAs, balance, trailing prices and equities still advance.
+    fn step_without_orders(&mut self, k: usize) {
+        self.did_fill_long.clear();
+        self.did_fill_short.clear();
+        self.timed(Phase::UpdateEmas, |bt| bt.update_emas(k));
+        self.update_rounded_balance(k);
+        self.timed(Phase::UpdateTrailingPrices, |bt| {
+            bt.update_trailing_prices(k)
+        });
+        self.timed(Phase::UpdateEquities, |bt| bt.update_equities(k));
+        self.count(|counters| counters.minutes_fast_forwarded += 1);
+    }
+
+    /// Opt-in approximation: the orders just computed at `k` are held unchanged and the
+    /// range max/min tables locate the first minute `j` one of them would fill.
+    /// Minutes `k + 1..j - 1` are then fast-forwarded and minute `j - 1` runs normally,
+    /// recomputing orders before the fill. Spans are capped by
+    /// `fast_forward_max_minutes` and by listings/delistings, and fast-forward is off
+    /// while a trailing-enabled coin or an unstuck close has open orders, since those
+    /// orders depend on every minute's prices.
+    /// Returns the first minute that must be simulated normally.
+    fn calc_fast_forward_until(&self, k: usize) -> usize {
+        let n_timesteps = self.hlcvs.shape()[0];
+        let max_rows = self.backtest_params.fast_forward_max_minutes / self.minutes_per_row;
+        let horizon = (k + 1 + max_rows)
+            .min(self.indexes.next_coin_event(k))
+            .min(n_timesteps - 1);
+        if horizon <= k + 1 {
+            return k + 1;
+        }
+        let mut first_crossing = horizon;
+        for (pside, open_orders) in [
+            (LONG, &self.open_orders.long),
+            (SHORT, &self.open_orders.short),
+        ] {
+            for (idx, bundle) in open_orders.iter() {
+                let trailing_enabled = match pside {
+                    LONG => self.trailing_enabled[idx].long,
+                    _ => self.trailing_enabled[idx].short,
+                };
+                if trailing_enabled {
+                    return k + 1;
+                }
+                let mut buy_price = f64::MIN;
+                let mut sell_price = f64::MAX;
+                for order in bundle.entries.iter().chain(bundle.closes.iter()) {
+                    match order.order_type {
+                        OrderType::CloseUnstuckLong | OrderType::CloseUnstuckShort => return k + 1,
+                        _ => {}
+                    }
+                    if order.qty > 0.0 {
+                        buy_price = buy_price.max(order.price);
+                    } else if order.qty < 0.0 {
+                        sell_price = sell_price.min(order.price);
+                    }
+                }
+                first_crossing = self.indexes.next_crossing(
+                    self.hlcvs,
+                    idx,
+                    k + 1,
+                    first_crossing,
+                    buy_price,
+                    sell_price,
+                );
+                if first_crossing <= k + 1 {
+                    return k + 1;
+                }
+            }
+        }
+        if first_crossing < horizon {
+            // run the minute before the fill normally so orders are recomputed first
+            first_crossing - 1
+        } else {
+            horizon
+        }
+    }
+
+    /// Move fills and equities out of the backtest once the run is complete.
+    pub fn take_results(&mut self) -> (Vec<Fill>, Equities) {
+        (
+            std::mem::take(&mut self.fills),
+            std::mem::take(&mut self.equities),
+        )
     }
 
     fn update_n_positions_and_wallet_exposure_limits(&mut self, k: usize) {
         let last_ts = self.hlcvs.shape()[0] - 1;
         let eligible: Vec<usize> = (0..self.n_coins)
             .filter(|&idx| {
-                let first = *self.first_valid_timestamps.get(&idx).unwrap_or(&0);
-                let last = *self.last_valid_timestamps.get(&idx).unwrap_or(&last_ts);
+                let first = self.first_valid_timestamps[idx];
+                let last = self.last_valid_timestamps[idx].unwrap_or(last_ts);
                 k >= first && k <= last
             })
             .collect();
@@ -395,11 +1336,19 @@ impl<'a> Backtest<'a> {
         if self.n_coins <= n_positions {
             return (0..self.n_coins).collect();
         }
-        let volume_filtered = self.filter_by_relative_volume(k, pside);
-        self.rank_by_noisiness(k, &volume_filtered, pside)
+        self.count(|counters| counters.forager_rankings += 1);
+        let indexes = self.indexes;
+        let sums = indexes.forager_sums(self.hlcvs);
+        let volume_filtered = self.filter_by_relative_volume(&sums, k, pside);
+        self.rank_by_noisiness(&sums, k, &volume_filtered, pside)
     }
 
-    fn filter_by_relative_volume(&mut self, k: usize, pside: usize) -> Vec<usize> {
+    fn filter_by_relative_volume(
+        &mut self,
+        sums: &ForagerSums,
+        k: usize,
+        pside: usize,
+    ) -> Vec<usize> {
         let window = match pside {
             LONG => self.bot_params_master.long.filter_volume_rolling_window,
             SHORT => self.bot_params_master.short.filter_volume_rolling_window,
@@ -407,35 +1356,10 @@ impl<'a> Backtest<'a> {
         };
         let start_k = k.saturating_sub(window);
 
-        let (rolling_volume_sum, prev_k) = match pside {
-            LONG => (
-                &mut self.rolling_volume_sum.long,
-                &mut self.rolling_volume_sum.prev_k_long,
-            ),
-            SHORT => (
-                &mut self.rolling_volume_sum.short,
-                &mut self.rolling_volume_sum.prev_k_short,
-            ),
-            _ => panic!("Invalid pside"),
-        };
-
         let volume_indices = self.volume_indices_buffer.as_mut().unwrap();
-
-        if k > window && k - *prev_k < window {
-            let safe_start = (*prev_k).saturating_sub(window);
-            for idx in 0..self.n_coins {
-                rolling_volume_sum[idx] -=
-                    self.hlcvs.slice(s![safe_start..start_k, idx, VOLUME]).sum();
-                rolling_volume_sum[idx] += self.hlcvs.slice(s![*prev_k..k, idx, VOLUME]).sum();
-                volume_indices[idx] = (rolling_volume_sum[idx], idx);
-            }
-        } else {
-            for idx in 0..self.n_coins {
-                rolling_volume_sum[idx] = self.hlcvs.slice(s![start_k..k, idx, VOLUME]).sum();
-                volume_indices[idx] = (rolling_volume_sum[idx], idx);
-            }
+        for idx in 0..self.n_coins {
+            volume_indices[idx] = (sums.volume_sum(idx, start_k, k), idx);
         }
-        *prev_k = k;
 
         volume_indices.sort_unstable_by(|a, b| b.0.partial_cmp(&a.0).unwrap_or(Ordering::Equal));
 
@@ -451,7 +1375,13 @@ impl<'a> Backtest<'a> {
             .collect()
     }
 
-    fn rank_by_noisiness(&self, k: usize, candidates: &[usize], pside: usize) -> Vec<usize> {
+    fn rank_by_noisiness(
+        &self,
+        sums: &ForagerSums,
+        k: usize,
+        candidates: &[usize],
+        pside: usize,
+    ) -> Vec<usize> {
         let bot_params = match pside {
             LONG => &self.bot_params_master.long,
             SHORT => &self.bot_params_master.short,
@@ -461,15 +1391,7 @@ impl<'a> Backtest<'a> {
 
         let mut noisinesses: Vec<(f64, usize)> = candidates
             .iter()
-            .map(|&idx| {
-                let noisiness: f64 = self
-                    .hlcvs
-                    .slice(s![start_k..k, idx, ..])
-                    .axis_iter(Axis(0))
-                    .map(|row| (row[HIGH] - row[LOW]) / row[CLOSE])
-                    .sum();
-                (noisiness, idx)
-            })
+            .map(|&idx| (sums.noisiness_sum(idx, start_k, k), idx))
             .collect();
 
         noisinesses.sort_unstable_by(|a, b| b.0.partial_cmp(&a.0).unwrap_or(Ordering::Equal));
@@ -477,7 +1399,7 @@ impl<'a> Backtest<'a> {
     }
 
     fn create_state_params(&self, k: usize, idx: usize, pside: usize) -> StateParams {
-        let close_price = self.hlcvs[[k, idx, CLOSE]];
+        let close_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
         StateParams {
             balance: self.balance.usd_total_rounded,
             order_book: OrderBook {
@@ -530,11 +1452,8 @@ impl<'a> Backtest<'a> {
         let mut equity_btc = self.balance.btc_total;
 
         // Add the unrealized PNL of all positions
-        let mut long_keys: Vec<usize> = self.positions.long.keys().cloned().collect();
-        long_keys.sort();
-        for idx in long_keys {
-            let position = &self.positions.long[&idx];
-            let current_price = self.hlcvs[[k, idx, CLOSE]];
+        for (idx, position) in self.positions.long.iter() {
+            let current_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
             let upnl = calc_pnl_long(
                 position.price,
                 current_price,
@@ -545,11 +1464,8 @@ impl<'a> Backtest<'a> {
             equity_btc += upnl / self.btc_usd_prices[k];
         }
 
-        let mut short_keys: Vec<usize> = self.positions.short.keys().cloned().collect();
-        short_keys.sort();
-        for idx in short_keys {
-            let position = &self.positions.short[&idx];
-            let current_price = self.hlcvs[[k, idx, CLOSE]];
+        for (idx, position) in self.positions.short.iter() {
+            let current_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
             let upnl = calc_pnl_short(
                 position.price,
                 current_price,
@@ -560,17 +1476,81 @@ impl<'a> Backtest<'a> {
             equity_btc += upnl / self.btc_usd_prices[k];
         }
 
-        // Finally push the results into the Equities struct
-        self.equities.usd.push(equity_usd);
-        self.equities.btc.push(equity_btc);
+        // Finally push the results into the Equities struct, or the streamed stats
+        match &mut self.streamed_equities {
+            None => {
+                self.equities.usd.push(equity_usd);
+                self.equities.btc.push(equity_btc);
+            }
+            Some(streamed) => {
+                streamed.usd.add_equity(equity_usd);
+                if let Some(btc) = &mut streamed.btc {
+                    btc.add_equity(equity_btc);
+                }
+                if streamed.sample_minutes > 0 && k % streamed.sample_minutes == 0 {
+                    self.equities.usd.push(equity_usd);
+                    self.equities.btc.push(equity_btc);
+                }
+            }
+        }
+        self.check_abort_thresholds(k, equity_usd, equity_btc);
+    }
+
+    fn record_fill(&mut self, fill: Fill) {
+        if let Some(streamed) = &mut self.streamed_equities {
+            streamed.usd.add_fill(&fill);
+            if let Some(btc) = &mut streamed.btc {
+                btc.add_fill(&fill);
+            }
+        }
+        self.fills.push(fill);
+    }
+
+    /// Flag the backtest as aborted once a running metric breaches its abort threshold.
+    fn check_abort_thresholds(&mut self, k: usize, equity_usd: f64, equity_btc: f64) {
+        let params = &self.backtest_params;
+        if params.abort_drawdown_worst > 0.0
+            && self.drawdown_usd.update(k, equity_usd) > params.abort_drawdown_worst
+        {
+            self.aborted_at = Some(k);
+        }
+        if params.abort_btc_drawdown_worst > 0.0
+            && self.balance.use_btc_collateral
+            && self.drawdown_btc.update(k, equity_btc) > params.abort_btc_drawdown_worst
+        {
+            self.aborted_at = Some(k);
+        }
+        if let Some(fill) = self.fills.last() {
+            let ebd_neg_usd = (fill.balance_usd_total - equity_usd) / fill.balance_usd_total;
+            if params.abort_equity_balance_diff_neg_max > 0.0
+                && ebd_neg_usd > params.abort_equity_balance_diff_neg_max
+            {
+                self.aborted_at = Some(k);
+            }
+            if params.abort_btc_equity_balance_diff_neg_max > 0.0 && self.balance.use_btc_collateral
+            {
+                let balance_btc = fill.balance_usd_total / fill.btc_price;
+                let ebd_neg_btc = (balance_btc - equity_btc) / balance_btc;
+                if ebd_neg_btc > params.abort_btc_equity_balance_diff_neg_max {
+                    self.aborted_at = Some(k);
+                }
+            }
+        }
+    }
+
+    /// Fraction of the dataset's timesteps that were simulated.
+    pub fn completion_ratio(&self) -> f64 {
+        match self.aborted_at {
+            Some(k) => k as f64 / self.hlcvs.shape()[0].saturating_sub(2).max(1) as f64,
+            None => 1.0,
+        }
     }
 
     fn update_actives_long(&mut self, k: usize) -> Vec<usize> {
         let n_positions = self.effective_n_positions.long;
 
-        let mut current_positions: Vec<usize> = self.positions.long.keys().cloned().collect();
-        current_positions.sort();
-        let preferred_coins = if current_positions.len() < n_positions {
+        let n_current_positions = self.positions.long.len();
+        let preferred_coins = if n_current_positions < n_positions {
             self.calc_preferred_coins(k, LONG)
         } else {
             Vec::new()
@@ -579,7 +1559,7 @@ impl<'a> Backtest<'a> {
         let actives = &mut self.actives.long;
         actives.clear();
 
-        for &idx in &current_positions {
+        for idx in self.positions.long.keys() {
             actives.insert(idx);
         }
 
@@ -599,10 +1579,9 @@ impl<'a> Backtest<'a> {
     fn update_actives_short(&mut self, k: usize) -> Vec<usize> {
         let n_positions = self.effective_n_positions.short;
 
-        let mut current_positions: Vec<usize> = self.positions.short.keys().cloned().collect();
-        current_positions.sort();
+        let n_current_positions = self.positions.short.len();
 
-        let preferred_coins = if current_positions.len() < n_positions {
+        let preferred_coins = if n_current_positions < n_positions {
             self.calc_preferred_coins(k, SHORT)
         } else {
             Vec::new()
@@ -611,7 +1590,7 @@ impl<'a> Backtest<'a> {
         let actives = &mut self.actives.short;
         actives.clear();
 
-        for &idx in &current_positions {
+        for idx in self.positions.short.keys() {
             actives.insert(idx);
         }
 
@@ -632,10 +1611,10 @@ impl<'a> Backtest<'a> {
         self.did_fill_long.clear();
         self.did_fill_short.clear();
         if self.trading_enabled.long {
-            let mut open_orders_keys_long: Vec<usize> =
-                self.open_orders.long.keys().cloned().collect();
-            open_orders_keys_long.sort();
-            for idx in open_orders_keys_long {
+            let mut open_orders_keys_long = std::mem::take(&mut self.coin_indices_buffer);
+            open_orders_keys_long.clear();
+            open_orders_keys_long.extend(self.open_orders.long.keys());
+            for &idx in &open_orders_keys_long {
                 // Process close fills long
                 if !self.open_orders.long[&idx].closes.is_empty() {
                     let mut closes_to_process = Vec::new();
@@ -671,12 +1650,13 @@ impl<'a> Backtest<'a> {
                     }
                 }
             }
+            self.coin_indices_buffer = open_orders_keys_long;
         }
         if self.trading_enabled.short {
-            let mut open_orders_keys_short: Vec<usize> =
-                self.open_orders.short.keys().cloned().collect();
-            open_orders_keys_short.sort();
-            for idx in open_orders_keys_short {
+            let mut open_orders_keys_short = std::mem::take(&mut self.coin_indices_buffer);
+            open_orders_keys_short.clear();
+            open_orders_keys_short.extend(self.open_orders.short.keys());
+            for &idx in &open_orders_keys_short {
                 // Process close fills short
                 if !self.open_orders.short[&idx].closes.is_empty() {
                     let mut closes_to_process = Vec::new();
@@ -710,6 +1690,7 @@ impl<'a> Backtest<'a> {
                     }
                 }
             }
+            self.coin_indices_buffer = open_orders_keys_short;
         }
     }
 
@@ -749,7 +1730,7 @@ impl<'a> Backtest<'a> {
         } else {
             self.positions.long.get_mut(&idx).unwrap().size = new_psize;
         }
-        self.fills.push(Fill {
+        self.record_fill(Fill {
             index: k,                                      // index minute
             coin: self.backtest_params.coins[idx].clone(), // coin
             pnl,                                           // realized pnl
@@ -801,7 +1782,7 @@ impl<'a> Backtest<'a> {
         } else {
             self.positions.short.get_mut(&idx).unwrap().size = new_psize;
         }
-        self.fills.push(Fill {
+        self.record_fill(Fill {
             index: k,                                      // index minute
             coin: self.backtest_params.coins[idx].clone(), // coin
             pnl,                                           // realized pnl
@@ -827,11 +1808,7 @@ impl<'a> Backtest<'a> {
         ) * self.backtest_params.maker_fee;
         self.update_balance(k, 0.0, fee_paid);
 
-        let position_entry = self
-            .positions
-            .long
-            .entry(idx)
-            .or_insert(Position::default());
+        let position_entry = self.positions.long.entry_or_default(idx);
         let (new_psize, new_pprice) = calc_new_psize_pprice(
             position_entry.size,
             position_entry.price,
@@ -841,7 +1818,7 @@ impl<'a> Backtest<'a> {
         );
         self.positions.long.get_mut(&idx).unwrap().size = new_psize;
         self.positions.long.get_mut(&idx).unwrap().price = new_pprice;
-        self.fills.push(Fill {
+        self.record_fill(Fill {
             index: k,                                        // index minute
             coin: self.backtest_params.coins[idx].clone(),   // coin
             pnl: 0.0,                                        // realized pnl
@@ -866,11 +1843,7 @@ impl<'a> Backtest<'a> {
             self.exchange_params_list[idx].c_mult,
         ) * self.backtest_params.maker_fee;
         self.update_balance(k, 0.0, fee_paid);
-        let position_entry = self
-            .positions
-            .short
-            .entry(idx)
-            .or_insert(Position::default());
+        let position_entry = self.positions.short.entry_or_default(idx);
         let (new_psize, new_pprice) = calc_new_psize_pprice(
             position_entry.size,
             position_entry.price,
@@ -880,7 +1853,7 @@ impl<'a> Backtest<'a> {
         );
         self.positions.short.get_mut(&idx).unwrap().size = new_psize;
         self.positions.short.get_mut(&idx).unwrap().price = new_pprice;
-        self.fills.push(Fill {
+        self.record_fill(Fill {
             index: k,                                         // index minute
             coin: self.backtest_params.coins[idx].clone(),    // coin
             pnl: 0.0,                                         // realized pnl
@@ -900,17 +1873,17 @@ impl<'a> Backtest<'a> {
     fn update_trailing_prices(&mut self, k: usize) {
         // ----- LONG side -----
         if self.trading_enabled.long && self.any_trailing_long {
-            for (&idx, _) in &self.positions.long {
+            for idx in self.positions.long.keys() {
                 if !self.trailing_enabled[idx].long {
                     continue;
                 }
-                let bundle = self.trailing_prices.long.entry(idx).or_default();
+                let bundle = &mut self.trailing_prices.long[idx];
                 if self.did_fill_long.contains(&idx) {
                     *bundle = TrailingPriceBundle::default();
                 } else {
-                    let low = self.hlcvs[[k, idx, LOW]];
-                    let high = self.hlcvs[[k, idx, HIGH]];
-                    let close = self.hlcvs[[k, idx, CLOSE]];
+                    let low = self.hlcvs[[k, idx, LOW]].to_f64();
+                    let high = self.hlcvs[[k, idx, HIGH]].to_f64();
+                    let close = self.hlcvs[[k, idx, CLOSE]].to_f64();
 
                     if low < bundle.min_since_open {
                         bundle.min_since_open = low;
@@ -931,17 +1904,17 @@ impl<'a> Backtest<'a> {
 
         // ----- SHORT side -----
         if self.trading_enabled.short && self.any_trailing_short {
-            for (&idx, _) in &self.positions.short {
+            for idx in self.positions.short.keys() {
                 if !self.trailing_enabled[idx].short {
                     continue;
                 }
-                let bundle = self.trailing_prices.short.entry(idx).or_default();
+                let bundle = &mut self.trailing_prices.short[idx];
                 if self.did_fill_short.contains(&idx) {
                     *bundle = TrailingPriceBundle::default();
                 } else {
-                    let low = self.hlcvs[[k, idx, LOW]];
-                    let high = self.hlcvs[[k, idx, HIGH]];
-                    let close = self.hlcvs[[k, idx, CLOSE]];
+                    let low = self.hlcvs[[k, idx, LOW]].to_f64();
+                    let high = self.hlcvs[[k, idx, HIGH]].to_f64();
+                    let close = self.hlcvs[[k, idx, CLOSE]].to_f64();
 
                     if low < bundle.min_since_open {
                         bundle.min_since_open = low;
@@ -972,13 +1945,13 @@ impl<'a> Backtest<'a> {
 
         // check if coin is delisted; if so, close pos as unstuck close
         if self.positions.long.contains_key(&idx) {
-            if let Some(&delist_timestamp) = self.last_valid_timestamps.get(&idx) {
+            if let Some(delist_timestamp) = self.last_valid_timestamps[idx] {
                 if k >= delist_timestamp {
-                    self.open_orders.long.entry(idx).or_default().closes = vec![Order {
+                    self.open_orders.long.entry_or_default(idx).closes = vec![Order {
                         qty: -self.positions.long[&idx].size,
                         price: round_(
                             f64::min(
-                                self.hlcvs[[k, idx, HIGH]]
+                                self.hlcvs[[k, idx, HIGH]].to_f64()
                                     - self.exchange_params_list[idx].price_step,
                                 self.positions.long[&idx].price,
                             ),
@@ -986,55 +1959,96 @@ impl<'a> Backtest<'a> {
                         ),
                         order_type: OrderType::CloseUnstuckLong,
                     }];
-                    self.open_orders
-                        .long
-                        .entry(idx)
-                        .or_default()
-                        .entries
-                        .clear();
+                    self.open_orders.long.entry_or_default(idx).entries.clear();
                     return;
                 }
             }
         }
 
-        let next_entry_order = calc_next_entry_long(
-            &self.exchange_params_list[idx],
+        let entry_inputs = OrderInputs::new(
             &state_params,
-            self.bp(idx, LONG),
+            self.bp(idx, LONG).wallet_exposure_limit,
             &position,
-            &self.trailing_prices.long[&idx],
+            &self.trailing_prices.long[idx],
+            true,
         );
+        let next_entry_order = match self.order_memos.long[idx].entry {
+            Some((inputs, order)) if inputs == entry_inputs => {
+                self.count(|counters| counters.next_order_memo_hits += 1);
+                order
+            }
+            _ => {
+                self.count(|counters| counters.next_order_calcs += 1);
+                let order = calc_next_entry_long(
+                    &self.exchange_params_list[idx],
+                    &state_params,
+                    self.bp(idx, LONG),
+                    &position,
+                    &self.trailing_prices.long[idx],
+                );
+                self.order_memos.long[idx].entry = Some((entry_inputs, order));
+                order
+            }
+        };
         // peek next candle to see if order will fill
         if self.order_filled(k + 1, idx, &next_entry_order) {
-            self.open_orders.long.entry(idx).or_default().entries = calc_entries_long(
+            let entries = calc_entries_long(
                 &self.exchange_params_list[idx],
                 &state_params,
                 self.bp(idx, LONG),
                 &position,
-                &self.trailing_prices.long[&idx],
+                &self.trailing_prices.long[idx],
             );
+            self.count(|counters| {
+                counters.grid_calcs += 1;
+                counters.grid_orders += entries.len() as u64;
+            });
+            self.open_orders.long.entry_or_default(idx).entries = entries;
         } else {
-            self.open_orders.long.entry(idx).or_default().entries = [next_entry_order].to_vec();
+            self.open_orders.long.entry_or_default(idx).entries = [next_entry_order].to_vec();
         }
-        let next_close_order = calc_next_close_long(
-            &self.exchange_params_list[idx],
+        let close_inputs = OrderInputs::new(
             &state_params,
-            self.bp(idx, LONG),
+            self.bp(idx, LONG).wallet_exposure_limit,
             &position,
-            &self.trailing_prices.long[&idx],
+            &self.trailing_prices.long[idx],
+            false,
         );
+        let next_close_order = match self.order_memos.long[idx].close {
+            Some((inputs, order)) if inputs == close_inputs => {
+                self.count(|counters| counters.next_order_memo_hits += 1);
+                order
+            }
+            _ => {
+                self.count(|counters| counters.next_order_calcs += 1);
+                let order = calc_next_close_long(
+                    &self.exchange_params_list[idx],
+                    &state_params,
+                    self.bp(idx, LONG),
+                    &position,
+                    &self.trailing_prices.long[idx],
+                );
+                self.order_memos.long[idx].close = Some((close_inputs, order));
+                order
+            }
+        };
         // peek next candle to see if order will fill
         if self.order_filled(k + 1, idx, &next_close_order) {
             // calc all orders
-            self.open_orders.long.entry(idx).or_default().closes = calc_closes_long(
+            let closes = calc_closes_long(
                 &self.exchange_params_list[idx],
                 &state_params,
                 self.bp(idx, LONG),
                 &position,
-                &self.trailing_prices.long[&idx],
+                &self.trailing_prices.long[idx],
             );
+            self.count(|counters| {
+                counters.grid_calcs += 1;
+                counters.grid_orders += closes.len() as u64;
+            });
+            self.open_orders.long.entry_or_default(idx).closes = closes;
         } else {
-            self.open_orders.long.entry(idx).or_default().closes = [next_close_order].to_vec();
+            self.open_orders.long.entry_or_default(idx).closes = [next_close_order].to_vec();
         }
     }
 
@@ -1049,13 +2063,13 @@ impl<'a> Backtest<'a> {
 
         // check if coin is delisted; if so, close pos as unstuck close
         if self.positions.short.contains_key(&idx) {
-            if let Some(&delist_timestamp) = self.last_valid_timestamps.get(&idx) {
+            if let Some(delist_timestamp) = self.last_valid_timestamps[idx] {
                 if k >= delist_timestamp {
-                    self.open_orders.short.entry(idx).or_default().closes = vec![Order {
+                    self.open_orders.short.entry_or_default(idx).closes = vec![Order {
                         qty: self.positions.short[&idx].size.abs(),
                         price: round_(
                             f64::max(
-                                self.hlcvs[[k, idx, LOW]]
+                                self.hlcvs[[k, idx, LOW]].to_f64()
                                     + self.exchange_params_list[idx].price_step,
                                 self.positions.short[&idx].price,
                             ),
@@ -1063,63 +2077,104 @@ impl<'a> Backtest<'a> {
                         ),
                         order_type: OrderType::CloseUnstuckShort,
                     }];
-                    self.open_orders
-                        .short
-                        .entry(idx)
-                        .or_default()
-                        .entries
-                        .clear();
+                    self.open_orders.short.entry_or_default(idx).entries.clear();
                     return;
                 }
             }
         }
-        let next_entry_order = calc_next_entry_short(
-            &self.exchange_params_list[idx],
+        let entry_inputs = OrderInputs::new(
             &state_params,
-            self.bp(idx, SHORT),
+            self.bp(idx, SHORT).wallet_exposure_limit,
             &position,
-            &self.trailing_prices.short[&idx],
+            &self.trailing_prices.short[idx],
+            true,
         );
+        let next_entry_order = match self.order_memos.short[idx].entry {
+            Some((inputs, order)) if inputs == entry_inputs => {
+                self.count(|counters| counters.next_order_memo_hits += 1);
+                order
+            }
+            _ => {
+                self.count(|counters| counters.next_order_calcs += 1);
+                let order = calc_next_entry_short(
+                    &self.exchange_params_list[idx],
+                    &state_params,
+                    self.bp(idx, SHORT),
+                    &position,
+                    &self.trailing_prices.short[idx],
+                );
+                self.order_memos.short[idx].entry = Some((entry_inputs, order));
+                order
+            }
+        };
         // peek next candle to see if order will fill
         if self.order_filled(k + 1, idx, &next_entry_order) {
-            self.open_orders.short.entry(idx).or_default().entries = calc_entries_short(
+            let entries = calc_entries_short(
                 &self.exchange_params_list[idx],
                 &state_params,
                 self.bp(idx, SHORT),
                 &position,
-                &self.trailing_prices.short[&idx],
+                &self.trailing_prices.short[idx],
             );
+            self.count(|counters| {
+                counters.grid_calcs += 1;
+                counters.grid_orders += entries.len() as u64;
+            });
+            self.open_orders.short.entry_or_default(idx).entries = entries;
         } else {
-            self.open_orders.short.entry(idx).or_default().entries = [next_entry_order].to_vec();
+            self.open_orders.short.entry_or_default(idx).entries = [next_entry_order].to_vec();
         }
 
-        let next_close_order = calc_next_close_short(
-            &self.exchange_params_list[idx],
+        let close_inputs = OrderInputs::new(
             &state_params,
-            self.bp(idx, SHORT),
+            self.bp(idx, SHORT).wallet_exposure_limit,
             &position,
-            &self.trailing_prices.short[&idx],
+            &self.trailing_prices.short[idx],
+            false,
         );
+        let next_close_order = match self.order_memos.short[idx].close {
+            Some((inputs, order)) if inputs == close_inputs => {
+                self.count(|counters| counters.next_order_memo_hits += 1);
+                order
+            }
+            _ => {
+                self.count(|counters| counters.next_order_calcs += 1);
+                let order = calc_next_close_short(
+                    &self.exchange_params_list[idx],
+                    &state_params,
+                    self.bp(idx, SHORT),
+                    &position,
+                    &self.trailing_prices.short[idx],
+                );
+                self.order_memos.short[idx].close = Some((close_inputs, order));
+                order
+            }
+        };
         // peek next candle to see if order will fill
         if self.order_filled(k + 1, idx, &next_close_order) {
-            self.open_orders.short.entry(idx).or_default().closes = calc_closes_short(
+            let closes = calc_closes_short(
                 &self.exchange_params_list[idx],
                 &state_params,
                 self.bp(idx, SHORT),
                 &position,
-                &self.trailing_prices.short[&idx],
+                &self.trailing_prices.short[idx],
             );
+            self.count(|counters| {
+                counters.grid_calcs += 1;
+                counters.grid_orders += closes.len() as u64;
+            });
+            self.open_orders.short.entry_or_default(idx).closes = closes;
         } else {
-            self.open_orders.short.entry(idx).or_default().closes = [next_close_order].to_vec()
+            self.open_orders.short.entry_or_default(idx).closes = [next_close_order].to_vec()
         }
     }
 
     fn order_filled(&self, k: usize, idx: usize, order: &Order) -> bool {
         // check if filled in current candle (pass k+1 to check if will fill in next candle)
         if order.qty > 0.0 {
-            self.hlcvs[[k, idx, LOW]] < order.price
+            self.hlcvs[[k, idx, LOW]].to_f64() < order.price
         } else if order.qty < 0.0 {
-            self.hlcvs[[k, idx, HIGH]] > order.price
+            self.hlcvs[[k, idx, HIGH]].to_f64() > order.price
         } else {
             false
         }
@@ -1142,7 +2197,7 @@ impl<'a> Backtest<'a> {
         };
 
         if long_allowance > 0.0 {
-            for (&idx, position) in &self.positions.long {
+            for (idx, position) in self.positions.long.iter() {
                 let wallet_exposure = calc_wallet_exposure(
                     self.exchange_params_list[idx].c_mult,
                     self.balance.usd_total_rounded,
@@ -1160,7 +2215,7 @@ impl<'a> Backtest<'a> {
                         self.exchange_params_list[idx].price_step,
                     );
 
-                    let current_price = self.hlcvs[[k, idx, CLOSE]];
+                    let current_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
                     if current_price >= ema_price {
                         let pprice_diff = calc_pprice_diff_int(LONG, position.price, current_price);
                         stuck_positions.push((idx, LONG, pprice_diff));
@@ -1183,7 +2238,7 @@ impl<'a> Backtest<'a> {
         };
 
         if short_allowance > 0.0 {
-            for (&idx, position) in &self.positions.short {
+            for (idx, position) in self.positions.short.iter() {
                 let wallet_exposure = calc_wallet_exposure(
                     self.exchange_params_list[idx].c_mult,
                     self.balance.usd_total_rounded,
@@ -1201,7 +2256,7 @@ impl<'a> Backtest<'a> {
                         self.exchange_params_list[idx].price_step,
                     );
 
-                    let current_price = self.hlcvs[[k, idx, CLOSE]];
+                    let current_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
                     if current_price <= ema_price {
                         let pprice_diff =
                             calc_pprice_diff_int(SHORT, position.price, current_price);
@@ -1225,7 +2280,7 @@ impl<'a> Backtest<'a> {
 
         // Process stuck positions
         for (idx, pside, _pprice_diff) in stuck_positions {
-            let close_price = self.hlcvs[[k, idx, CLOSE]];
+            let close_price = self.hlcvs[[k, idx, CLOSE]].to_f64();
 
             if pside == LONG {
                 let min_entry_qty =
@@ -1339,46 +2394,51 @@ impl<'a> Backtest<'a> {
     }
 
     fn update_open_orders_all(&mut self, k: usize) {
-        self.open_orders = OpenOrders::default();
+        self.open_orders.long.clear();
+        self.open_orders.short.clear();
         if self.trading_enabled.long {
-            let mut active_long_indices: Vec<usize> = self.positions.long.keys().cloned().collect();
+            let mut active_long_indices = std::mem::take(&mut self.coin_indices_buffer);
+            active_long_indices.clear();
             if self.positions.long.len() != self.effective_n_positions.long {
                 self.update_actives_long(k);
-                active_long_indices = self.actives.long.iter().cloned().collect();
+                active_long_indices.extend(self.actives.long.iter());
+            } else {
+                active_long_indices.extend(self.positions.long.keys());
             }
-            active_long_indices.sort();
             for &idx in &active_long_indices {
                 self.update_open_orders_long_single(k, idx);
             }
+            self.coin_indices_buffer = active_long_indices;
         }
         if self.trading_enabled.short {
-            let mut active_short_indices: Vec<usize> =
-                self.positions.short.keys().cloned().collect();
+            let mut active_short_indices = std::mem::take(&mut self.coin_indices_buffer);
+            active_short_indices.clear();
             if self.positions.short.len() != self.effective_n_positions.short {
                 self.update_actives_short(k);
-                active_short_indices = self.actives.short.iter().cloned().collect();
+                active_short_indices.extend(self.actives.short.iter());
+            } else {
+                active_short_indices.extend(self.positions.short.keys());
             }
-            active_short_indices.sort();
             for &idx in &active_short_indices {
                 self.update_open_orders_short_single(k, idx);
             }
+            self.coin_indices_buffer = active_short_indices;
         }
 
-        let (unstucking_idx, unstucking_pside, unstucking_close) = self.calc_unstucking_close(k);
+        let (unstucking_idx, unstucking_pside, unstucking_close) =
+            self.timed(Phase::CalcUnstuckingClose, |bt| bt.calc_unstucking_close(k));
         if unstucking_pside != NO_POS {
             match unstucking_pside {
                 LONG => {
                     self.open_orders
                         .long
-                        .entry(unstucking_idx)
-                        .or_default()
+                        .entry_or_default(unstucking_idx)
                         .closes = vec![unstucking_close];
                 }
                 SHORT => {
                     self.open_orders
                         .short
-                        .entry(unstucking_idx)
-                        .or_default()
+                        .entry_or_default(unstucking_idx)
                         .closes = vec![unstucking_close];
                 }
                 _ => unreachable!(),
@@ -1386,30 +2446,47 @@ impl<'a> Backtest<'a> {
         }
     }
 
+    /// EMAs of coins still within their flat leading rows were advanced in `prepare`.
     #[inline]
     fn update_emas(&mut self, k: usize) {
-        for i in 0..self.n_coins {
-            let close_price = self.hlcvs[[k, i, CLOSE]];
-
-            let long_alphas = &self.ema_alphas[i].long.alphas;
-            let long_alphas_inv = &self.ema_alphas[i].long.alphas_inv;
-            let short_alphas = &self.ema_alphas[i].short.alphas;
-            let short_alphas_inv = &self.ema_alphas[i].short.alphas_inv;
-
-            let emas = &mut self.emas[i];
-
-            for z in 0..3 {
-                emas.long[z] = close_price * long_alphas[z] + emas.long[z] * long_alphas_inv[z];
-                emas.short[z] = close_price * short_alphas[z] + emas.short[z] * short_alphas_inv[z];
+        let flat_close_until = &self.indexes.flat_close_until;
+        for (i, (emas, alphas)) in self.emas.iter_mut().zip(&self.ema_alphas).enumerate() {
+            if k < flat_close_until[i] {
+                continue;
             }
+            emas.update(self.hlcvs[[k, i, CLOSE]].to_f64(), alphas);
         }
     }
 }
 
+/// Run several backtests over the same dataset in one time-major loop.
+/// Every backtest reads the same minute of HLCV data before the loop advances,
+/// so each row is pulled into cache once per minute instead of once per config.
+pub fn run_backtests_time_major<H: HlcvElement>(
+    backtests: &mut [Backtest<H>],
+) -> Vec<(Vec<Fill>, Equities)> {
+    if backtests.is_empty() {
+        return Vec::new();
+    }
+    let n_timesteps = backtests[0].hlcvs.shape()[0];
+    for backtest in backtests.iter_mut() {
+        backtest.prepare();
+    }
+    for k in 1..(n_timesteps - 1) {
+        for backtest in backtests.iter_mut() {
+            backtest.step(k);
+        }
+        if backtests.iter().all(|bt| bt.aborted_at.is_some()) {
+            break;
+        }
+    }
+    backtests.iter_mut().map(|bt| bt.take_results()).collect()
+}
+
 /// Binary-search the **first** and **last** valid candle index for every coin.
 /// A candle is *invalid* when `high == low == close` **and** `volume <= 0.0`
 /// (volume is -1.0 in new data, 0.0 in older back/front-filled data).
-fn find_valid_timestamp_bounds(hlcvs: &ArrayView3<f64>) -> (Vec<usize>, Vec<usize>) {
+fn find_valid_timestamp_bounds<H: HlcvElement>(hlcvs: &ArrayView3<H>) -> (Vec<usize>, Vec<usize>) {
     let n_ts = hlcvs.shape()[0];
     let n_coins = hlcvs.shape()[1];
     let mut firsts = vec![0; n_coins];
@@ -1417,7 +2494,7 @@ fn find_valid_timestamp_bounds(hlcvs: &ArrayView3<f64>) -> (Vec<usize>, Vec<usiz
 
     for idx in 0..n_coins {
         // helper closure to keep the predicate in one place
-        let is_invalid = |k: usize| hlcvs[[k, idx, VOLUME]] < 0.0;
+        let is_invalid = |k: usize| hlcvs[[k, idx, VOLUME]].to_f64() < 0.0;
 
         /* ---------- first valid ---------- */
         let (mut lo, mut hi) = (0usize, n_ts - 1);
@@ -1453,6 +2530,23 @@ fn find_valid_timestamp_bounds(hlcvs: &ArrayView3<f64>) -> (Vec<usize>, Vec<usiz
     (firsts, lasts)
 }
 
+/// Copy of `bot_params` with EMA spans and rolling windows, given in minutes, converted
+/// to rows of `minutes_per_row` minutes each.
+fn bot_params_in_rows(bot_params: &BotParamsPair, minutes_per_row: usize) -> BotParamsPair {
+    let mut bot_params = bot_params.clone();
+    if minutes_per_row > 1 {
+        for bp in [&mut bot_params.long, &mut bot_params.short] {
+            bp.ema_span_0 = (bp.ema_span_0 / minutes_per_row as f64).max(1.0);
+            bp.ema_span_1 = (bp.ema_span_1 / minutes_per_row as f64).max(1.0);
+            bp.filter_volume_rolling_window =
+                (bp.filter_volume_rolling_window / minutes_per_row).max(1);
+            bp.filter_noisiness_rolling_window =
+                (bp.filter_noisiness_rolling_window / minutes_per_row).max(1);
+        }
+    }
+    bot_params
+}
+
 fn calc_ema_alphas(bot_params_pair: &BotParamsPair) -> EmaAlphas {
     let mut ema_spans_long = [
         bot_params_pair.long.ema_span_0,
@@ -1474,14 +2568,130 @@ fn calc_ema_alphas(bot_params_pair: &BotParamsPair) -> EmaAlphas {
     let ema_alphas_short = ema_spans_short.map(|x| 2.0 / (x + 1.0));
     let ema_alphas_short_inv = ema_alphas_short.map(|x| 1.0 - x);
 
-    EmaAlphas {
-        long: Alphas {
-            alphas: ema_alphas_long,
-            alphas_inv: ema_alphas_long_inv,
-        },
-        short: Alphas {
-            alphas: ema_alphas_short,
-            alphas_inv: ema_alphas_short_inv,
-        },
+    let mut ema_alphas = EmaAlphas::default();
+    ema_alphas.alphas[..3].copy_from_slice(&ema_alphas_long);
+    ema_alphas.alphas[3..].copy_from_slice(&ema_alphas_short);
+    ema_alphas.alphas_inv[..3].copy_from_slice(&ema_alphas_long_inv);
+    ema_alphas.alphas_inv[3..].copy_from_slice(&ema_alphas_short_inv);
+    ema_alphas
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const N_TIMESTEPS: usize = 400;
+    const N_COINS: usize = 4;
+
+    /// Time-major HLCVs with per-coin price levels and noise; volumes reach 1e12 per row.
+    fn fixed_hlcvs() -> Vec<f64> {
+        let mut data = Vec::with_capacity(N_TIMESTEPS * N_COINS * 4);
+        for k in 0..N_TIMESTEPS {
+            for idx in 0..N_COINS {
+                let t = k as f64;
+                let close =
+                    (10.0 + 90.0 * idx as f64) * (1.0 + 0.05 * (t / (17.0 + idx as f64)).sin());
+                let range = close * (0.002 + 0.001 * ((t * (idx + 1) as f64) / 7.0).cos().abs());
+                data.extend_from_slice(&[
+                    close + range / 2.0,
+                    close - range / 2.0,
+                    close,
+                    1e12 / (1.0 + (t + idx as f64) % 5.0),
+                ]);
+            }
+        }
+        data
+    }
+
+    fn assert_close(value: f64, expected: f64) {
+        assert!(
+            (value - expected).abs() <= 1e-12 * expected.abs(),
+            "{} != {}",
+            value,
+            expected
+        );
+    }
+
+    fn ranking(sums: impl Fn(usize) -> f64) -> Vec<usize> {
+        let mut ranked: Vec<(f64, usize)> = (0..N_COINS).map(|idx| (sums(idx), idx)).collect();
+        ranked.sort_unstable_by(|a, b| b.0.partial_cmp(&a.0).unwrap_or(Ordering::Equal));
+        ranked.into_iter().map(|(_, idx)| idx).collect()
+    }
+
+    #[test]
+    fn non_finite_rows_only_affect_windows_containing_them() {
+        let clean = fixed_hlcvs();
+        let mut data = clean.clone();
+        let at = |k: usize, idx: usize, field: usize| (k * N_COINS + idx) * 4 + field;
+        data[at(100, 1, CLOSE)] = 0.0; // infinite noisiness
+        data[at(100, 2, CLOSE)] = 0.0;
+        data[at(100, 2, HIGH)] = data[at(100, 2, LOW)]; // 0 / 0
+        data[at(150, 3, VOLUME)] = f64::NAN;
+        let shape = (N_TIMESTEPS, N_COINS, 4);
+        let clean = ArrayView3::from_shape(shape, &clean).unwrap();
+        let hlcvs = ArrayView3::from_shape(shape, &data).unwrap();
+        let clean_indexes = DatasetIndexes::new(&clean);
+        let indexes = DatasetIndexes::new(&hlcvs);
+        let (clean_sums, sums) = (
+            clean_indexes.forager_sums(&clean),
+            indexes.forager_sums(&hlcvs),
+        );
+
+        assert_eq!(sums.noisiness_sum(1, 90, 110), f64::INFINITY);
+        assert!(sums.noisiness_sum(2, 100, 101).is_nan());
+        assert!(sums.volume_sum(3, 0, N_TIMESTEPS).is_nan());
+        for (start, end) in [(0, 100), (101, 250), (151, 400), (300, 400)] {
+            for idx in 0..N_COINS {
+                if end <= 150 || start > 150 || idx != 3 {
+                    assert_close(
+                        sums.volume_sum(idx, start, end),
+                        clean_sums.volume_sum(idx, start, end),
+                    );
+                }
+                if end <= 100 || start > 100 {
+                    assert_close(
+                        sums.noisiness_sum(idx, start, end),
+                        clean_sums.noisiness_sum(idx, start, end),
+                    );
+                }
+            }
+        }
+        for (start, end) in [(151, 400), (200, 300), (101, 151)] {
+            assert_eq!(
+                ranking(|idx| sums.noisiness_sum(idx, start, end)),
+                ranking(|idx| clean_sums.noisiness_sum(idx, start, end))
+            );
+        }
+        assert_eq!(
+            ranking(|idx| sums.volume_sum(idx, 151, 400)),
+            ranking(|idx| clean_sums.volume_sum(idx, 151, 400))
+        );
+    }
+
+    #[test]
+    fn rolling_sums_match_direct_sums() {
+        let data = fixed_hlcvs();
+        let hlcvs = ArrayView3::from_shape((N_TIMESTEPS, N_COINS, 4), &data).unwrap();
+        let indexes = DatasetIndexes::new(&hlcvs);
+        let sums = indexes.forager_sums(&hlcvs);
+        for (start, end) in [(0, 1), (0, N_TIMESTEPS), (250, 310), (399, 400)] {
+            for idx in 0..N_COINS {
+                let volume: f64 = (start..end).map(|k| hlcvs[[k, idx, VOLUME]]).sum();
+                let noisiness: f64 = (start..end)
+                    .map(|k| {
+                        (hlcvs[[k, idx, HIGH]] - hlcvs[[k, idx, LOW]]) / hlcvs[[k, idx, CLOSE]]
+                    })
+                    .sum();
+                let volume_sum = sums.volume_sum(idx, start, end);
+                assert!(
+                    (volume_sum - volume).abs() <= 1e-12 * volume,
+                    "{} {}",
+                    volume_sum,
+                    volume
+                );
+                let noisiness_sum = sums.noisiness_sum(idx, start, end);
+                assert!((noisiness_sum - noisiness).abs() <= 1e-12 * noisiness);
+            }
+        }
     }
 }
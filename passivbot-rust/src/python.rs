@@ -1,5 +1,7 @@
-use crate::analysis::analyze_backtest_pair;
-use crate::backtest::Backtest;
+use crate::analysis::{analyze_backtest_pair, analyze_equity_stats_pair};
+use crate::backtest::{
+    run_backtests_time_major, Backtest, BacktestCheckpoint, BacktestProfile, DatasetIndexes, Phase,
+};
 use crate::closes::{
     calc_closes_long, calc_closes_short, calc_next_close_long, calc_next_close_short,
 };
@@ -8,20 +10,70 @@ use crate::entries::{
 };
 use crate::types::OrderType;
 use crate::types::{
-    BacktestParams, BotParams, BotParamsPair, EMABands, ExchangeParams, OrderBook, Position,
-    StateParams, TrailingPriceBundle,
+    Analysis, BacktestParams, BotParams, BotParamsPair, EMABands, Equities, ExchangeParams, Fill,
+    HlcvElement, OrderBook, Position, StateParams, TrailingPriceBundle,
+};
+use memmap::{Mmap, MmapOptions};
+use ndarray::{
+    s, Array1, Array2, ArrayView, ArrayView1, ArrayView3, Axis, CowArray, Ix3, ShapeBuilder,
 };
-use memmap::MmapOptions;
-use ndarray::{Array1, Array2, ArrayView};
-use numpy::{IntoPyArray, PyArray1, PyArray2};
+use numpy::{IntoPyArray, PyArray1};
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
-use pyo3::types::{PyDict, PyList};
+use pyo3::types::{PyBytes, PyDict, PyList};
+use rayon::prelude::*;
 use serde::Serialize;
+use std::collections::HashMap;
 use std::fs::File;
+use std::sync::Arc;
 
+/// Runs one backtest and returns (fills, equities_usd, equities_btc, analysis_usd, analysis_btc).
+///
+/// `fills_format` selects how fills are returned:
+/// - "objects": 2D object array, one row of 13 Python objects per fill (default).
+/// - "columns": dict of typed 1D arrays, one per fill field, with coins and order types
+///   as integer codes into the "coins" and "order_types" lookup lists of the same dict.
+/// - "none": fills are not converted at all and None is returned in their place.
+///
+/// `equity_sample_minutes` selects which equities are returned: 1 returns every minute
+/// (default), n > 1 every n-th minute, 0 none (empty arrays). For any value but 1 the
+/// engine keeps only the running daily stats the analysis needs rather than full curves.
+/// Analysis is then identical, except that the `_w` metrics of an aborted backtest use
+/// the last fractions of the planned range instead of the simulated one.
+///
+/// `start_idx`/`end_idx` restrict the backtest to rows `start_idx..end_idx` and
+/// `coin_indices` (sorted, unique) to a subset of the coins, without copying the data
+/// or writing new files. `bot_params`, `exchange_params_list` and the "coins" of
+/// `backtest_params_dict` are always given for all coins of the dataset and are filtered
+/// to match. The result is the same as a backtest on an array holding only that window,
+/// up to rounding in the forager's rolling volume and noisiness sums, which are taken from
+/// the prefix sums of the whole dataset.
+///
+/// If `profile` is a dict, the simulation is profiled and the dict is filled with the wall
+/// time (`<phase>_seconds`) and calls (`<phase>_calls`) of each phase, and work counters
+/// such as orders computed, full grid calculations and forager rankings. The return value
+/// is the same 5-tuple either way. Phase times are inclusive (`calc_unstucking_close` is
+/// part of `update_open_orders_all`). Profiling adds timer overhead but doesn't change
+/// results.
 #[pyfunction]
+#[pyo3(signature = (
+    shared_memory_file,
+    hlcvs_shape,
+    hlcvs_dtype,
+    btc_usd_shared_memory_file,
+    btc_usd_dtype,
+    bot_params,
+    exchange_params_list,
+    backtest_params_dict,
+    fills_format="objects",
+    equity_sample_minutes=1,
+    start_idx=None,
+    end_idx=None,
+    coin_indices=None,
+    profile=None
+))]
 pub fn run_backtest(
+    py: Python<'_>,
     shared_memory_file: &str,           // Existing HLCV shared memory file
     hlcvs_shape: (usize, usize, usize), // Shape of HLCV data
     hlcvs_dtype: &str,                  // Dtype of HLCV data
@@ -30,54 +82,1078 @@ pub fn run_backtest(
     bot_params: &PyAny,                 // Bot parameters per coin
     exchange_params_list: &PyAny,       // Exchange parameters
     backtest_params_dict: &PyDict,      // Backtest parameters
-) -> PyResult<(
-    Py<PyArray2<PyObject>>,
+    fills_format: &str,                 // "objects", "columns" or "none"
+    equity_sample_minutes: usize,       // 1: every minute, n: every n-th minute, 0: none
+    start_idx: Option<usize>,           // First row of the window (default 0)
+    end_idx: Option<usize>,             // End row of the window, exclusive (default all)
+    coin_indices: Option<Vec<usize>>,   // Coins to backtest (default all)
+    profile: Option<&PyDict>,           // Filled with per-phase timings and counters
+) -> PyResult<PyObject> {
+    let dataset = HlcvDataset::new(
+        shared_memory_file,
+        hlcvs_shape,
+        hlcvs_dtype,
+        btc_usd_shared_memory_file,
+        btc_usd_dtype,
+        "time_major",
+    )?;
+    dataset.run_backtest(
+        py,
+        bot_params,
+        exchange_params_list,
+        backtest_params_dict,
+        fills_format,
+        equity_sample_minutes,
+        start_idx,
+        end_idx,
+        coin_indices,
+        profile,
+    )
+}
+
+/// Same as `run_backtest`, but continues from `checkpoint` if given and also returns a new
+/// checkpoint: (fills, equities_usd, equities_btc, analysis_usd, analysis_btc, checkpoint).
+///
+/// A checkpoint is opaque bytes (JSON). It holds the simulation state at the last minute
+/// that appending data cannot change. Passing it to a later run over the same coins and
+/// parameters, on data that starts at the same time and only extends further, simulates
+/// only the minutes from the checkpoint on. Fills and analysis still cover the whole range.
+/// A checkpoint that does not match the parameters, `equity_sample_minutes` or any of the
+/// data before it raises ValueError.
+///
+/// Equities are streamed as with `equity_sample_minutes` > 1 in `run_backtest`, so only
+/// every `equity_sample_minutes`-th equity is returned and kept in the checkpoint (0: none).
+/// The suffixes of the `_w` metrics start at the day boundary nearest to their usual start,
+/// since the final length of the data is not known while streaming.
+#[pyfunction]
+#[pyo3(signature = (
+    shared_memory_file,
+    hlcvs_shape,
+    hlcvs_dtype,
+    btc_usd_shared_memory_file,
+    btc_usd_dtype,
+    bot_params,
+    exchange_params_list,
+    backtest_params_dict,
+    checkpoint=None,
+    fills_format="objects",
+    equity_sample_minutes=60
+))]
+pub fn run_backtest_resumable(
+    py: Python<'_>,
+    shared_memory_file: &str,
+    hlcvs_shape: (usize, usize, usize),
+    hlcvs_dtype: &str,
+    btc_usd_shared_memory_file: &str,
+    btc_usd_dtype: &str,
+    bot_params: &PyAny,
+    exchange_params_list: &PyAny,
+    backtest_params_dict: &PyDict,
+    checkpoint: Option<&[u8]>,
+    fills_format: &str,
+    equity_sample_minutes: usize,
+) -> PyResult<ResumableBacktestOutput> {
+    let dataset = HlcvDataset::new(
+        shared_memory_file,
+        hlcvs_shape,
+        hlcvs_dtype,
+        btc_usd_shared_memory_file,
+        btc_usd_dtype,
+        "time_major",
+    )?;
+    dataset.run_backtest_resumable(
+        py,
+        bot_params,
+        exchange_params_list,
+        backtest_params_dict,
+        checkpoint,
+        fills_format,
+        equity_sample_minutes,
+    )
+}
+
+/// Runs several bot configs against one HLCV dataset in a single call.
+///
+/// The shared memory files are mapped once, the per-coin valid timestamp bounds are
+/// computed once, and all backtests advance together minute by minute, so each candle
+/// is read from the mapping once per timestep rather than once per config.
+/// `bot_params_list` holds one list[dict] (one dict per coin) per config.
+/// Returns one (analysis_usd, analysis_btc) tuple per config, in input order. No equity
+/// curves are kept; analyses come from running stats as with `equity_sample_minutes=0`
+/// in `run_backtest`.
+///
+/// The simulation runs without the GIL. With `n_threads` > 1 the configs are split into
+/// that many chunks, each run time-major on its own thread of a rayon pool.
+/// `start_idx`, `end_idx` and `coin_indices` select a window as in `run_backtest`.
+#[pyfunction]
+#[pyo3(signature = (
+    shared_memory_file,
+    hlcvs_shape,
+    hlcvs_dtype,
+    btc_usd_shared_memory_file,
+    btc_usd_dtype,
+    bot_params_list,
+    exchange_params_list,
+    backtest_params_dict,
+    n_threads=None,
+    start_idx=None,
+    end_idx=None,
+    coin_indices=None
+))]
+pub fn run_backtest_batch(
+    py: Python<'_>,
+    shared_memory_file: &str,
+    hlcvs_shape: (usize, usize, usize),
+    hlcvs_dtype: &str,
+    btc_usd_shared_memory_file: &str,
+    btc_usd_dtype: &str,
+    bot_params_list: &PyAny,
+    exchange_params_list: &PyAny,
+    backtest_params_dict: &PyDict,
+    n_threads: Option<usize>,
+    start_idx: Option<usize>,
+    end_idx: Option<usize>,
+    coin_indices: Option<Vec<usize>>,
+) -> PyResult<Vec<(Py<PyDict>, Py<PyDict>)>> {
+    let dataset = HlcvDataset::new(
+        shared_memory_file,
+        hlcvs_shape,
+        hlcvs_dtype,
+        btc_usd_shared_memory_file,
+        btc_usd_dtype,
+        "time_major",
+    )?;
+    dataset.run_backtest_batch(
+        py,
+        bot_params_list,
+        exchange_params_list,
+        backtest_params_dict,
+        n_threads,
+        start_idx,
+        end_idx,
+        coin_indices,
+    )
+}
+
+type BacktestOutput = (
+    PyObject,
     Py<PyArray1<f64>>,
     Py<PyArray1<f64>>,
     Py<PyDict>,
     Py<PyDict>,
-)> {
-    // Open and map the HLCV shared memory file
-    let file = File::open(shared_memory_file)
-        .map_err(|e| PyValueError::new_err(format!("Unable to open shared memory file: {}", e)))?;
-    let mmap = unsafe {
-        MmapOptions::new()
-            .map(&file)
-            .map_err(|e| PyValueError::new_err(format!("Unable to map HLCV file: {}", e)))?
+);
+
+type ResumableBacktestOutput = (
+    PyObject,
+    Py<PyArray1<f64>>,
+    Py<PyArray1<f64>>,
+    Py<PyDict>,
+    Py<PyDict>,
+    Py<PyBytes>,
+);
+
+/// Element type of the mapped HLCV file.
+#[derive(Clone, Copy, Debug, PartialEq)]
+enum HlcvDtype {
+    F64,
+    F32,
+}
+
+/// Memory order of the mapped HLCV file.
+///
+/// The engine always indexes `hlcvs[[k, idx, field]]` on a logical `(T, n_coins, 4)`
+/// view; a coin-major file is exposed through a strided view of that shape.
+#[derive(Clone, Copy, Debug, PartialEq)]
+enum HlcvLayout {
+    /// `(T, n_coins, 4)`, all coins of one minute adjacent (default).
+    TimeMajor,
+    /// `(n_coins, 4, T)`, each field of one coin contiguous over time.
+    CoinMajor,
+}
+
+/// HLCV and BTC/USD shared memory files mapped once, together with the indexes derived
+/// from them (valid timestamp bounds, volume/noisiness prefix sums, fast-forward
+/// tables).
+///
+/// Create one per worker and run any number of backtests against it; this avoids
+/// reopening and remapping both files and rebuilding the indexes on every evaluation.
+/// The mappings stay valid for the lifetime of the object.
+///
+/// HLCVs may be float64 ("<f8") or float32 ("<f4"); BTC/USD prices are always float64.
+/// `hlcvs_shape` is always given as (n_timesteps, n_coins, 4); `hlcvs_layout` says whether
+/// the file holds that array as is ("time_major") or transposed to (n_coins, 4, T)
+/// ("coin_major"), which makes per-coin scans over time contiguous.
+///
+/// Backtests over a window of rows and/or a subset of coins (see `run_backtest`) read
+/// the same mapping through a strided view. Coin subsets that are not evenly spaced
+/// can't be expressed as a view; only the selected coins and rows are gathered then.
+/// Windows share the dataset's range tables and prefix sums, so a run over a window only
+/// computes the per-coin valid bounds of its rows.
+#[pyclass(frozen)]
+pub struct HlcvDataset {
+    hlcvs_mmap: Mmap,
+    btc_usd_mmap: Mmap,
+    hlcvs_shape: (usize, usize, usize),
+    hlcvs_dtype: HlcvDtype,
+    hlcvs_layout: HlcvLayout,
+    indexes: Arc<DatasetIndexes>,
+}
+
+/// Rows `start..end` and a subset of the coins of a dataset, in indexes of the full array.
+#[derive(Clone, Debug)]
+struct HlcvWindow {
+    start: usize,
+    end: usize,
+    /// Sorted, unique coin indexes; None for all coins.
+    coins: Option<Vec<usize>>,
+}
+
+impl HlcvWindow {
+    /// Keeps the entries of `items` (one per coin of the dataset) for the window's coins.
+    fn select_coins<T: Clone>(
+        &self,
+        items: Vec<T>,
+        n_coins: usize,
+        label: &str,
+    ) -> PyResult<Vec<T>> {
+        let coins = match &self.coins {
+            Some(coins) => coins,
+            None => return Ok(items),
+        };
+        if items.len() != n_coins {
+            return Err(PyValueError::new_err(format!(
+                "{} must have one entry per dataset coin ({}) when coin_indices is given, got {}",
+                label,
+                n_coins,
+                items.len()
+            )));
+        }
+        Ok(coins.iter().map(|&idx| items[idx].clone()).collect())
+    }
+}
+
+/// Step between consecutive `coins` if they are evenly spaced.
+fn coin_step(coins: &[usize]) -> Option<usize> {
+    let step = if coins.len() > 1 {
+        coins[1] - coins[0]
+    } else {
+        1
     };
-    let hlcvs_rust = unsafe {
-        match hlcvs_dtype {
-            "<f8" => ArrayView::from_shape_ptr(hlcvs_shape, mmap.as_ptr() as *const f64),
-            _ => return Err(PyValueError::new_err("Unsupported dtype for HLCV data")),
+    coins
+        .windows(2)
+        .all(|pair| pair[1] - pair[0] == step)
+        .then_some(step)
+}
+
+impl HlcvDataset {
+    fn hlcvs<H: HlcvElement>(&self) -> ArrayView3<'_, H> {
+        // shape and dtype were validated against the mapping in `new`
+        unsafe { hlcvs_view(&self.hlcvs_mmap, self.hlcvs_shape, self.hlcvs_layout) }
+    }
+
+    fn window(
+        &self,
+        start_idx: Option<usize>,
+        end_idx: Option<usize>,
+        coin_indices: Option<Vec<usize>>,
+    ) -> PyResult<HlcvWindow> {
+        let (n_timesteps, n_coins, _) = self.hlcvs_shape;
+        let start = start_idx.unwrap_or(0);
+        let end = end_idx.unwrap_or(n_timesteps);
+        if end > n_timesteps || start.checked_add(2).map_or(true, |min_end| min_end > end) {
+            return Err(PyValueError::new_err(format!(
+                "start_idx..end_idx ({}..{}) must select at least 2 of the {} rows",
+                start, end, n_timesteps
+            )));
+        }
+        if let Some(coins) = &coin_indices {
+            if coins.is_empty()
+                || coins.windows(2).any(|pair| pair[0] >= pair[1])
+                || coins[coins.len() - 1] >= n_coins
+            {
+                return Err(PyValueError::new_err(format!(
+                    "coin_indices must be sorted, unique and below the number of coins ({})",
+                    n_coins
+                )));
+            }
         }
+        Ok(HlcvWindow {
+            start,
+            end,
+            // all coins selected is the same as no selection
+            coins: coin_indices.filter(|coins| coins.len() < n_coins),
+        })
+    }
+
+    /// Runs `run` on the HLCVs, BTC/USD prices and indexes of `window`. `fast_forward`
+    /// tells whether the backtests will fast-forward, i.e. read the block tables.
+    fn run_in_window<H: HlcvElement, R>(
+        &self,
+        py: Python<'_>,
+        window: &HlcvWindow,
+        fast_forward: bool,
+        run: impl FnOnce(&ArrayView3<H>, &ArrayView1<f64>, &DatasetIndexes) -> R,
+    ) -> R {
+        let btc_usd_prices = self
+            .btc_usd_prices()
+            .slice_move(s![window.start..window.end]);
+        let rows = self
+            .hlcvs::<H>()
+            .slice_move(s![window.start..window.end, .., ..]);
+        let hlcvs: CowArray<'_, H, Ix3> = match window.coins.as_deref() {
+            None => rows.into(),
+            Some(coins) => match coin_step(coins) {
+                Some(step) => {
+                    let (first, last) = (coins[0], coins[coins.len() - 1]);
+                    rows.slice_move(s![.., first..last + 1;step, ..]).into()
+                }
+                None => py.allow_threads(|| rows.select(Axis(1), coins)).into(),
+            },
+        };
+        let hlcvs = hlcvs.view();
+        let indexes = self.indexes_for(py, window, &hlcvs, fast_forward);
+        run(&hlcvs, &btc_usd_prices, &*indexes)
+    }
+
+    /// Indexes of `window`, whose data is `hlcvs`: the dataset's own for the full array,
+    /// otherwise a window of them.
+    fn indexes_for<H: HlcvElement>(
+        &self,
+        py: Python<'_>,
+        window: &HlcvWindow,
+        hlcvs: &ArrayView3<H>,
+        fast_forward: bool,
+    ) -> Arc<DatasetIndexes> {
+        if window.start == 0 && window.end == self.hlcvs_shape.0 && window.coins.is_none() {
+            return self.indexes.clone();
+        }
+        let coins = match &window.coins {
+            Some(coins) => coins.clone(),
+            None => (0..self.hlcvs_shape.1).collect(),
+        };
+        let parent = self.hlcvs::<H>();
+        // built without the GIL, so threads running other windows aren't held up
+        Arc::new(py.allow_threads(|| {
+            self.indexes
+                .window(&parent, hlcvs, window.start, &coins, fast_forward)
+        }))
+    }
+
+    fn btc_usd_prices(&self) -> ArrayView1<'_, f64> {
+        unsafe {
+            ArrayView::from_shape_ptr(
+                (self.hlcvs_shape.0,),
+                self.btc_usd_mmap.as_ptr() as *const f64,
+            )
+        }
+    }
+}
+
+#[pymethods]
+impl HlcvDataset {
+    #[new]
+    #[pyo3(signature = (
+        shared_memory_file,
+        hlcvs_shape,
+        hlcvs_dtype,
+        btc_usd_shared_memory_file,
+        btc_usd_dtype,
+        hlcvs_layout="time_major"
+    ))]
+    fn new(
+        shared_memory_file: &str,
+        hlcvs_shape: (usize, usize, usize),
+        hlcvs_dtype: &str,
+        btc_usd_shared_memory_file: &str,
+        btc_usd_dtype: &str,
+        hlcvs_layout: &str,
+    ) -> PyResult<Self> {
+        let hlcvs_dtype = parse_hlcvs_dtype(hlcvs_dtype)?;
+        let hlcvs_layout = parse_hlcvs_layout(hlcvs_layout)?;
+        let hlcvs_mmap = map_shared_memory_file(shared_memory_file, "HLCV")?;
+        let btc_usd_mmap = map_shared_memory_file(btc_usd_shared_memory_file, "BTC/USD")?;
+        btc_usd_view_from_mmap(&btc_usd_mmap, hlcvs_shape.0, btc_usd_dtype)?;
+        let indexes = match hlcvs_dtype {
+            HlcvDtype::F64 => DatasetIndexes::new(&hlcvs_view_from_mmap::<f64>(
+                &hlcvs_mmap,
+                hlcvs_shape,
+                hlcvs_layout,
+            )?),
+            HlcvDtype::F32 => DatasetIndexes::new(&hlcvs_view_from_mmap::<f32>(
+                &hlcvs_mmap,
+                hlcvs_shape,
+                hlcvs_layout,
+            )?),
+        };
+        Ok(HlcvDataset {
+            hlcvs_mmap,
+            btc_usd_mmap,
+            hlcvs_shape,
+            hlcvs_dtype,
+            hlcvs_layout,
+            indexes: Arc::new(indexes),
+        })
+    }
+
+    #[getter]
+    fn shape(&self) -> (usize, usize, usize) {
+        self.hlcvs_shape
+    }
+
+    #[getter]
+    fn dtype(&self) -> &'static str {
+        match self.hlcvs_dtype {
+            HlcvDtype::F64 => "<f8",
+            HlcvDtype::F32 => "<f4",
+        }
+    }
+
+    #[getter]
+    fn layout(&self) -> &'static str {
+        match self.hlcvs_layout {
+            HlcvLayout::TimeMajor => "time_major",
+            HlcvLayout::CoinMajor => "coin_major",
+        }
+    }
+
+    /// Same as the module-level `run_backtest`, without the file arguments.
+    #[pyo3(signature = (
+        bot_params,
+        exchange_params_list,
+        backtest_params_dict,
+        fills_format="objects",
+        equity_sample_minutes=1,
+        start_idx=None,
+        end_idx=None,
+        coin_indices=None,
+        profile=None
+    ))]
+    fn run_backtest(
+        &self,
+        py: Python<'_>,
+        bot_params: &PyAny,
+        exchange_params_list: &PyAny,
+        backtest_params_dict: &PyDict,
+        fills_format: &str,
+        equity_sample_minutes: usize,
+        start_idx: Option<usize>,
+        end_idx: Option<usize>,
+        coin_indices: Option<Vec<usize>>,
+        profile: Option<&PyDict>,
+    ) -> PyResult<PyObject> {
+        check_fills_format(fills_format)?;
+        let window = self.window(start_idx, end_idx, coin_indices)?;
+        let n_coins = self.hlcvs_shape.1;
+        let bot_params_vec =
+            window.select_coins(bot_params_list_from_py(bot_params)?, n_coins, "bot_params")?;
+        let exchange_params = window.select_coins(
+            exchange_params_list_from_py(exchange_params_list)?,
+            n_coins,
+            "exchange_params_list",
+        )?;
+        let mut backtest_params = backtest_params_from_dict(backtest_params_dict)?;
+        backtest_params.coins =
+            window.select_coins(backtest_params.coins, n_coins, "backtest_params coins")?;
+        let fast_forward = backtest_params.fast_forward_max_minutes > 0;
+        let (fills, equities, analysis_usd, analysis_btc, backtest_profile) = match self.hlcvs_dtype
+        {
+            HlcvDtype::F64 => self.run_in_window::<f64, _>(
+                py,
+                &window,
+                fast_forward,
+                |hlcvs, btc_usd_prices, indexes| {
+                    run_and_analyze(
+                        py,
+                        hlcvs,
+                        btc_usd_prices,
+                        indexes,
+                        bot_params_vec,
+                        exchange_params,
+                        &backtest_params,
+                        equity_sample_minutes,
+                        profile.is_some(),
+                    )
+                },
+            ),
+            HlcvDtype::F32 => self.run_in_window::<f32, _>(
+                py,
+                &window,
+                fast_forward,
+                |hlcvs, btc_usd_prices, indexes| {
+                    run_and_analyze(
+                        py,
+                        hlcvs,
+                        btc_usd_prices,
+                        indexes,
+                        bot_params_vec,
+                        exchange_params,
+                        &backtest_params,
+                        equity_sample_minutes,
+                        profile.is_some(),
+                    )
+                },
+            ),
+        };
+        if let (Some(profile), Some(backtest_profile)) = (profile, backtest_profile) {
+            profile.update(profile_to_py_dict(py, &backtest_profile)?.as_mapping())?;
+        }
+        Ok(backtest_output(
+            py,
+            fills,
+            equities,
+            &analysis_usd,
+            &analysis_btc,
+            &backtest_params.coins,
+            fills_format,
+        )?
+        .into_py(py))
+    }
+
+    /// Same as the module-level `run_backtest_resumable`, without the file arguments.
+    #[pyo3(signature = (
+        bot_params,
+        exchange_params_list,
+        backtest_params_dict,
+        checkpoint=None,
+        fills_format="objects",
+        equity_sample_minutes=60
+    ))]
+    fn run_backtest_resumable(
+        &self,
+        py: Python<'_>,
+        bot_params: &PyAny,
+        exchange_params_list: &PyAny,
+        backtest_params_dict: &PyDict,
+        checkpoint: Option<&[u8]>,
+        fills_format: &str,
+        equity_sample_minutes: usize,
+    ) -> PyResult<ResumableBacktestOutput> {
+        check_fills_format(fills_format)?;
+        let resume_from = checkpoint
+            .map(|bytes| serde_json::from_slice::<BacktestCheckpoint>(bytes))
+            .transpose()
+            .map_err(|e| PyValueError::new_err(format!("Invalid backtest checkpoint: {}", e)))?;
+        let bot_params_vec = bot_params_list_from_py(bot_params)?;
+        let exchange_params = exchange_params_list_from_py(exchange_params_list)?;
+        let backtest_params = backtest_params_from_dict(backtest_params_dict)?;
+        let btc_usd_prices = self.btc_usd_prices();
+        let (fills, equities, analysis_usd, analysis_btc, checkpoint) = match self.hlcvs_dtype {
+            HlcvDtype::F64 => run_and_analyze_resumable(
+                py,
+                &self.hlcvs::<f64>(),
+                &btc_usd_prices,
+                &self.indexes,
+                bot_params_vec,
+                exchange_params,
+                &backtest_params,
+                resume_from,
+                equity_sample_minutes,
+            ),
+            HlcvDtype::F32 => run_and_analyze_resumable(
+                py,
+                &self.hlcvs::<f32>(),
+                &btc_usd_prices,
+                &self.indexes,
+                bot_params_vec,
+                exchange_params,
+                &backtest_params,
+                resume_from,
+                equity_sample_minutes,
+            ),
+        }
+        .map_err(PyValueError::new_err)?;
+        let (py_fills, py_equities_usd, py_equities_btc, py_analysis_usd, py_analysis_btc) =
+            backtest_output(
+                py,
+                fills,
+                equities,
+                &analysis_usd,
+                &analysis_btc,
+                &backtest_params.coins,
+                fills_format,
+            )?;
+        Ok((
+            py_fills,
+            py_equities_usd,
+            py_equities_btc,
+            py_analysis_usd,
+            py_analysis_btc,
+            PyBytes::new_bound(py, &checkpoint).unbind(),
+        ))
+    }
+
+    /// Same as the module-level `run_backtest_batch`, without the file arguments.
+    #[pyo3(signature = (
+        bot_params_list,
+        exchange_params_list,
+        backtest_params_dict,
+        n_threads=None,
+        start_idx=None,
+        end_idx=None,
+        coin_indices=None
+    ))]
+    fn run_backtest_batch(
+        &self,
+        py: Python<'_>,
+        bot_params_list: &PyAny,
+        exchange_params_list: &PyAny,
+        backtest_params_dict: &PyDict,
+        n_threads: Option<usize>,
+        start_idx: Option<usize>,
+        end_idx: Option<usize>,
+        coin_indices: Option<Vec<usize>>,
+    ) -> PyResult<Vec<(Py<PyDict>, Py<PyDict>)>> {
+        let window = self.window(start_idx, end_idx, coin_indices)?;
+        let n_coins = self.hlcvs_shape.1;
+        let configs = bot_params_list
+            .downcast::<PyList>()
+            .map_err(|_| PyValueError::new_err("bot_params_list must be a list of list[dict]"))?;
+        let mut bot_params_vecs = Vec::with_capacity(configs.len());
+        for item in configs {
+            bot_params_vecs.push(window.select_coins(
+                bot_params_list_from_py(item)?,
+                n_coins,
+                "bot_params",
+            )?);
+        }
+        let exchange_params = window.select_coins(
+            exchange_params_list_from_py(exchange_params_list)?,
+            n_coins,
+            "exchange_params_list",
+        )?;
+        let mut backtest_params = backtest_params_from_dict(backtest_params_dict)?;
+        backtest_params.coins =
+            window.select_coins(backtest_params.coins, n_coins, "backtest_params coins")?;
+        let fast_forward = backtest_params.fast_forward_max_minutes > 0;
+        let analyses = match self.hlcvs_dtype {
+            HlcvDtype::F64 => self.run_in_window::<f64, _>(
+                py,
+                &window,
+                fast_forward,
+                |hlcvs, btc_usd_prices, indexes| {
+                    run_and_analyze_batch(
+                        py,
+                        hlcvs,
+                        btc_usd_prices,
+                        indexes,
+                        bot_params_vecs,
+                        exchange_params,
+                        &backtest_params,
+                        n_threads,
+                    )
+                },
+            )?,
+            HlcvDtype::F32 => self.run_in_window::<f32, _>(
+                py,
+                &window,
+                fast_forward,
+                |hlcvs, btc_usd_prices, indexes| {
+                    run_and_analyze_batch(
+                        py,
+                        hlcvs,
+                        btc_usd_prices,
+                        indexes,
+                        bot_params_vecs,
+                        exchange_params,
+                        &backtest_params,
+                        n_threads,
+                    )
+                },
+            )?,
+        };
+
+        let mut py_results = Vec::with_capacity(analyses.len());
+        for (analysis_usd, analysis_btc) in analyses.iter() {
+            py_results.push((
+                struct_to_py_dict(py, analysis_usd)?.into(),
+                struct_to_py_dict(py, analysis_btc)?.into(),
+            ));
+        }
+        Ok(py_results)
+    }
+}
+
+fn check_fills_format(fills_format: &str) -> PyResult<()> {
+    if !matches!(fills_format, "objects" | "columns" | "none") {
+        return Err(PyValueError::new_err(format!(
+            "Unsupported fills_format '{}', expected 'objects', 'columns' or 'none'",
+            fills_format
+        )));
+    }
+    Ok(())
+}
+
+/// Converts the results of one backtest to the Python tuple returned by `run_backtest`.
+fn backtest_output(
+    py: Python<'_>,
+    fills: Vec<Fill>,
+    equities: Equities,
+    analysis_usd: &Analysis,
+    analysis_btc: &Analysis,
+    coins: &[String],
+    fills_format: &str,
+) -> PyResult<BacktestOutput> {
+    let py_analysis_usd = struct_to_py_dict(py, analysis_usd)?;
+    let py_analysis_btc = struct_to_py_dict(py, analysis_btc)?;
+    let py_fills = match fills_format {
+        "columns" => fills_to_py_columns(py, &fills, coins)?,
+        "none" => py.None(),
+        _ => fills_to_py_objects(py, &fills),
+    };
+    let py_equities_usd = Array1::from_vec(equities.usd)
+        .into_pyarray_bound(py)
+        .unbind();
+    let py_equities_btc = Array1::from_vec(equities.btc)
+        .into_pyarray_bound(py)
+        .unbind();
+    Ok((
+        py_fills,
+        py_equities_usd,
+        py_equities_btc,
+        py_analysis_usd.into(),
+        py_analysis_btc.into(),
+    ))
+}
+
+fn parse_hlcvs_dtype(hlcvs_dtype: &str) -> PyResult<HlcvDtype> {
+    match hlcvs_dtype {
+        "<f8" => Ok(HlcvDtype::F64),
+        "<f4" => Ok(HlcvDtype::F32),
+        _ => Err(PyValueError::new_err("Unsupported dtype for HLCV data")),
+    }
+}
+
+fn parse_hlcvs_layout(hlcvs_layout: &str) -> PyResult<HlcvLayout> {
+    match hlcvs_layout {
+        "time_major" => Ok(HlcvLayout::TimeMajor),
+        "coin_major" => Ok(HlcvLayout::CoinMajor),
+        _ => Err(PyValueError::new_err(format!(
+            "Unsupported HLCV layout: {} (expected \"time_major\" or \"coin_major\")",
+            hlcvs_layout
+        ))),
+    }
+}
+
+/// Runs one backtest and its analysis without holding the GIL, so other Python threads
+/// can run backtests concurrently. See `run_backtest` for `equity_sample_minutes` and
+/// `profile`.
+fn run_and_analyze<H: HlcvElement>(
+    py: Python<'_>,
+    hlcvs: &ArrayView3<H>,
+    btc_usd_prices: &ArrayView1<f64>,
+    indexes: &DatasetIndexes,
+    bot_params: Vec<BotParamsPair>,
+    exchange_params: Vec<ExchangeParams>,
+    backtest_params: &BacktestParams,
+    equity_sample_minutes: usize,
+    profile: bool,
+) -> (
+    Vec<Fill>,
+    Equities,
+    Analysis,
+    Analysis,
+    Option<BacktestProfile>,
+) {
+    let mut backtest = Backtest::new(
+        hlcvs,
+        btc_usd_prices,
+        indexes,
+        bot_params,
+        exchange_params,
+        backtest_params,
+    );
+    if equity_sample_minutes != 1 {
+        backtest.stream_equities(equity_sample_minutes);
+    }
+    if profile {
+        backtest.enable_profile();
+    }
+    py.allow_threads(|| {
+        let (fills, equities) = backtest.run();
+        let (analysis_usd, analysis_btc) = analyze_run(&backtest, &fills, &equities);
+        let backtest_profile = backtest.profile().cloned();
+        (
+            fills,
+            equities,
+            analysis_usd,
+            analysis_btc,
+            backtest_profile,
+        )
+    })
+}
+
+/// Like `run_and_analyze`, continuing from `resume_from` if given, and also returns the
+/// serialized checkpoint of the run.
+fn run_and_analyze_resumable<H: HlcvElement>(
+    py: Python<'_>,
+    hlcvs: &ArrayView3<H>,
+    btc_usd_prices: &ArrayView1<f64>,
+    indexes: &DatasetIndexes,
+    bot_params: Vec<BotParamsPair>,
+    exchange_params: Vec<ExchangeParams>,
+    backtest_params: &BacktestParams,
+    resume_from: Option<BacktestCheckpoint>,
+    equity_sample_minutes: usize,
+) -> Result<(Vec<Fill>, Equities, Analysis, Analysis, Vec<u8>), String> {
+    let mut backtest = Backtest::new(
+        hlcvs,
+        btc_usd_prices,
+        indexes,
+        bot_params,
+        exchange_params,
+        backtest_params,
+    );
+    py.allow_threads(|| {
+        let (fills, equities, checkpoint) =
+            backtest.run_resumable(resume_from, equity_sample_minutes)?;
+        let (analysis_usd, analysis_btc) = analyze_run(&backtest, &fills, &equities);
+        let checkpoint = serde_json::to_vec(&checkpoint).map_err(|e| e.to_string())?;
+        Ok((fills, equities, analysis_usd, analysis_btc, checkpoint))
+    })
+}
+
+fn analyze_run<H: HlcvElement>(
+    backtest: &Backtest<H>,
+    fills: &[Fill],
+    equities: &Equities,
+) -> (Analysis, Analysis) {
+    let (mut analysis_usd, mut analysis_btc) = match backtest.equity_stats() {
+        Some((stats_usd, stats_btc)) => analyze_equity_stats_pair(fills, stats_usd, stats_btc),
+        None => analyze_backtest_pair(
+            fills,
+            equities,
+            backtest.balance.use_btc_collateral,
+            backtest.minutes_per_row(),
+        ),
     };
+    analysis_usd.backtest_completion_ratio = backtest.completion_ratio();
+    analysis_btc.backtest_completion_ratio = backtest.completion_ratio();
+    (analysis_usd, analysis_btc)
+}
+
+/// Runs one backtest per bot params vec without holding the GIL; see `run_backtest_batch`.
+fn run_and_analyze_batch<H: HlcvElement>(
+    py: Python<'_>,
+    hlcvs: &ArrayView3<H>,
+    btc_usd_prices: &ArrayView1<f64>,
+    indexes: &DatasetIndexes,
+    bot_params_vecs: Vec<Vec<BotParamsPair>>,
+    exchange_params: Vec<ExchangeParams>,
+    backtest_params: &BacktestParams,
+    n_threads: Option<usize>,
+) -> PyResult<Vec<(Analysis, Analysis)>> {
+    let mut backtests: Vec<Backtest<H>> = bot_params_vecs
+        .into_iter()
+        .map(|bot_params_vec| {
+            let mut backtest = Backtest::new(
+                hlcvs,
+                btc_usd_prices,
+                indexes,
+                bot_params_vec,
+                exchange_params.clone(),
+                backtest_params,
+            );
+            // only analyses are returned, so no equity curve is kept
+            backtest.stream_equities(0);
+            backtest
+        })
+        .collect();
+
+    let n_threads = n_threads.unwrap_or(1).max(1).min(backtests.len().max(1));
+    if n_threads > 1 {
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(n_threads)
+            .build()
+            .map_err(|e| PyValueError::new_err(format!("Unable to build thread pool: {}", e)))?;
+        let chunk_size = (backtests.len() + n_threads - 1) / n_threads;
+        Ok(py.allow_threads(|| {
+            pool.install(|| {
+                backtests
+                    .par_chunks_mut(chunk_size)
+                    .flat_map_iter(run_and_analyze_time_major)
+                    .collect::<Vec<_>>()
+            })
+        }))
+    } else {
+        Ok(py.allow_threads(|| run_and_analyze_time_major(&mut backtests)))
+    }
+}
+
+fn fills_to_py_objects(py: Python<'_>, fills: &[Fill]) -> PyObject {
+    let mut py_fills = Array2::from_elem((fills.len(), 13), py.None());
+    for (i, fill) in fills.iter().enumerate() {
+        py_fills[(i, 0)] = fill.index.into_py(py);
+        py_fills[(i, 1)] = <String as Clone>::clone(&fill.coin).into_py(py);
+        py_fills[(i, 2)] = fill.pnl.into_py(py);
+        py_fills[(i, 3)] = fill.fee_paid.into_py(py);
+        py_fills[(i, 4)] = fill.balance_usd_total.into_py(py);
+        py_fills[(i, 5)] = fill.balance_btc.into_py(py);
+        py_fills[(i, 6)] = fill.balance_usd.into_py(py);
+        py_fills[(i, 7)] = fill.btc_price.into_py(py);
+        py_fills[(i, 8)] = fill.fill_qty.into_py(py);
+        py_fills[(i, 9)] = fill.fill_price.into_py(py);
+        py_fills[(i, 10)] = fill.position_size.into_py(py);
+        py_fills[(i, 11)] = fill.position_price.into_py(py);
+        py_fills[(i, 12)] = fill.order_type.to_string().into_py(py);
+    }
+    py_fills.into_pyarray_bound(py).unbind().into_py(py)
+}
+
+/// Converts fills to a dict of column arrays. Coins are encoded as indices into
+/// `coins` and order types as their ids; both lookup lists are included in the dict.
+fn fills_to_py_columns(py: Python<'_>, fills: &[Fill], coins: &[String]) -> PyResult<PyObject> {
+    let coin_codes: HashMap<&str, u32> = coins
+        .iter()
+        .enumerate()
+        .map(|(i, coin)| (coin.as_str(), i as u32))
+        .collect();
+    let order_types: Vec<&str> = (0u16..)
+        .map_while(|id| OrderType::try_from(id).ok())
+        .map(|order_type| order_type.snake())
+        .collect();
+
+    let float_column = |get: fn(&Fill) -> f64| -> Py<PyArray1<f64>> {
+        fills
+            .iter()
+            .map(get)
+            .collect::<Array1<f64>>()
+            .into_pyarray_bound(py)
+            .unbind()
+    };
+    let mut coin_column = Vec::with_capacity(fills.len());
+    for fill in fills {
+        let code = coin_codes.get(fill.coin.as_str()).ok_or_else(|| {
+            PyValueError::new_err(format!("Fill coin {} not in backtest coins", fill.coin))
+        })?;
+        coin_column.push(*code);
+    }
+
+    let dict = PyDict::new(py);
+    dict.set_item(
+        "index",
+        fills
+            .iter()
+            .map(|fill| fill.index as i64)
+            .collect::<Array1<i64>>()
+            .into_pyarray_bound(py)
+            .unbind(),
+    )?;
+    dict.set_item(
+        "coin",
+        Array1::from_vec(coin_column)
+            .into_pyarray_bound(py)
+            .unbind(),
+    )?;
+    dict.set_item("pnl", float_column(|fill| fill.pnl))?;
+    dict.set_item("fee_paid", float_column(|fill| fill.fee_paid))?;
+    dict.set_item(
+        "balance_usd_total",
+        float_column(|fill| fill.balance_usd_total),
+    )?;
+    dict.set_item("balance_btc", float_column(|fill| fill.balance_btc))?;
+    dict.set_item("balance_usd", float_column(|fill| fill.balance_usd))?;
+    dict.set_item("btc_price", float_column(|fill| fill.btc_price))?;
+    dict.set_item("fill_qty", float_column(|fill| fill.fill_qty))?;
+    dict.set_item("fill_price", float_column(|fill| fill.fill_price))?;
+    dict.set_item("position_size", float_column(|fill| fill.position_size))?;
+    dict.set_item("position_price", float_column(|fill| fill.position_price))?;
+    dict.set_item(
+        "order_type",
+        fills
+            .iter()
+            .map(|fill| fill.order_type.id())
+            .collect::<Array1<u16>>()
+            .into_pyarray_bound(py)
+            .unbind(),
+    )?;
+    dict.set_item("coins", PyList::new(py, coins))?;
+    dict.set_item("order_types", PyList::new(py, order_types))?;
+    Ok(dict.to_object(py))
+}
+
+fn run_and_analyze_time_major<H: HlcvElement>(
+    backtests: &mut [Backtest<H>],
+) -> Vec<(Analysis, Analysis)> {
+    let results = run_backtests_time_major(backtests);
+    backtests
+        .iter()
+        .zip(results.iter())
+        .map(|(backtest, (fills, equities))| analyze_run(backtest, fills, equities))
+        .collect()
+}
 
-    // Open and map the BTC/USD shared memory file
-    let btc_usd_file = File::open(btc_usd_shared_memory_file).map_err(|e| {
-        PyValueError::new_err(format!("Unable to open BTC/USD shared memory file: {}", e))
+fn map_shared_memory_file(path: &str, label: &str) -> PyResult<Mmap> {
+    let file = File::open(path).map_err(|e| {
+        PyValueError::new_err(format!(
+            "Unable to open {} shared memory file: {}",
+            label, e
+        ))
     })?;
-    let btc_usd_mmap = unsafe {
+    unsafe {
         MmapOptions::new()
-            .map(&btc_usd_file)
-            .map_err(|e| PyValueError::new_err(format!("Unable to map BTC/USD file: {}", e)))?
-    };
-    let n_timesteps = hlcvs_shape.0; // Number of timesteps from HLCV shape
-    let btc_usd_rust = unsafe {
-        match btc_usd_dtype {
-            "<f8" => ArrayView::from_shape_ptr((n_timesteps,), btc_usd_mmap.as_ptr() as *const f64),
-            _ => return Err(PyValueError::new_err("Unsupported dtype for BTC/USD data")),
+            .map(&file)
+            .map_err(|e| PyValueError::new_err(format!("Unable to map {} file: {}", label, e)))
+    }
+}
+
+fn hlcvs_view_from_mmap<'a, H: HlcvElement>(
+    mmap: &'a Mmap,
+    hlcvs_shape: (usize, usize, usize),
+    hlcvs_layout: HlcvLayout,
+) -> PyResult<ArrayView3<'a, H>> {
+    let n_elements = hlcvs_shape.0 * hlcvs_shape.1 * hlcvs_shape.2;
+    if mmap.len() < n_elements * std::mem::size_of::<H>() {
+        return Err(PyValueError::new_err(format!(
+            "HLCV file size ({} bytes) is too small for shape {:?}",
+            mmap.len(),
+            hlcvs_shape
+        )));
+    }
+    Ok(unsafe { hlcvs_view(mmap, hlcvs_shape, hlcvs_layout) })
+}
+
+/// Logical (T, n_coins, 4) view of a mapped HLCV file in either layout.
+///
+/// Safety: the mapping must hold at least `T * n_coins * 4` elements of type `H`.
+unsafe fn hlcvs_view<H: HlcvElement>(
+    mmap: &Mmap,
+    hlcvs_shape: (usize, usize, usize),
+    hlcvs_layout: HlcvLayout,
+) -> ArrayView3<'_, H> {
+    let ptr = mmap.as_ptr() as *const H;
+    match hlcvs_layout {
+        HlcvLayout::TimeMajor => ArrayView::from_shape_ptr(hlcvs_shape, ptr),
+        HlcvLayout::CoinMajor => {
+            let (n_timesteps, _, n_fields) = hlcvs_shape;
+            ArrayView::from_shape_ptr(
+                hlcvs_shape.strides((1, n_fields * n_timesteps, n_timesteps)),
+                ptr,
+            )
         }
-    };
+    }
+}
 
+fn btc_usd_view_from_mmap<'a>(
+    mmap: &'a Mmap,
+    n_timesteps: usize,
+    btc_usd_dtype: &str,
+) -> PyResult<ArrayView1<'a, f64>> {
+    match btc_usd_dtype {
+        "<f8" => {}
+        _ => return Err(PyValueError::new_err("Unsupported dtype for BTC/USD data")),
+    }
     // Ensure BTC/USD data length matches HLCV timesteps
-    if btc_usd_rust.len() != n_timesteps {
+    let btc_usd_len = mmap.len() / std::mem::size_of::<f64>();
+    if btc_usd_len < n_timesteps {
         return Err(PyValueError::new_err(format!(
             "BTC/USD data length ({}) does not match HLCV timesteps ({})",
-            btc_usd_rust.len(),
-            n_timesteps
+            btc_usd_len, n_timesteps
         )));
     }
+    Ok(unsafe { ArrayView::from_shape_ptr((n_timesteps,), mmap.as_ptr() as *const f64) })
+}
 
+fn bot_params_list_from_py(bot_params: &PyAny) -> PyResult<Vec<BotParamsPair>> {
     let bot_params_py_list = bot_params
         .downcast::<PyList>()
         .map_err(|_| PyValueError::new_err("bot_params must be a list[dict] (one per coin)"))?;
@@ -89,77 +1165,28 @@ pub fn run_backtest(
             .map_err(|_| PyValueError::new_err("each bot_params element must be a dict"))?;
         bot_params_vec.push(bot_params_pair_from_dict(dict)?);
     }
+    Ok(bot_params_vec)
+}
 
-    let exchange_params = {
-        let mut params_vec = Vec::new();
-        if let Ok(py_list) = exchange_params_list.downcast::<PyList>() {
-            for py_dict in py_list.iter() {
-                if let Ok(dict) = py_dict.downcast::<PyDict>() {
-                    let params = exchange_params_from_dict(dict)?;
-                    params_vec.push(params);
-                } else {
-                    return Err(PyValueError::new_err(
-                        "Unsupported data type in exchange_params_list",
-                    ));
-                }
+fn exchange_params_list_from_py(exchange_params_list: &PyAny) -> PyResult<Vec<ExchangeParams>> {
+    let mut params_vec = Vec::new();
+    if let Ok(py_list) = exchange_params_list.downcast::<PyList>() {
+        for py_dict in py_list.iter() {
+            if let Ok(dict) = py_dict.downcast::<PyDict>() {
+                let params = exchange_params_from_dict(dict)?;
+                params_vec.push(params);
+            } else {
+                return Err(PyValueError::new_err(
+                    "Unsupported data type in exchange_params_list",
+                ));
             }
-        } else {
-            return Err(PyValueError::new_err(
-                "Unsupported data type for exchange_params_list",
-            ));
-        }
-        params_vec
-    };
-
-    let backtest_params = backtest_params_from_dict(backtest_params_dict)?;
-    let mut backtest = Backtest::new(
-        &hlcvs_rust,
-        &btc_usd_rust,
-        bot_params_vec,
-        exchange_params,
-        &backtest_params,
-    );
-
-    // Run the backtest and process results
-    Python::with_gil(|py| {
-        let (fills, equities) = backtest.run();
-        let (analysis_usd, analysis_btc) =
-            analyze_backtest_pair(&fills, &equities, backtest.balance.use_btc_collateral);
-
-        // Create a dictionary to store analysis results using a more concise approach
-        let py_analysis_usd = struct_to_py_dict(py, &analysis_usd)?;
-        let py_analysis_btc = struct_to_py_dict(py, &analysis_btc)?;
-        let mut py_fills = Array2::from_elem((fills.len(), 13), py.None());
-        for (i, fill) in fills.iter().enumerate() {
-            py_fills[(i, 0)] = fill.index.into_py(py);
-            py_fills[(i, 1)] = <String as Clone>::clone(&fill.coin).into_py(py);
-            py_fills[(i, 2)] = fill.pnl.into_py(py);
-            py_fills[(i, 3)] = fill.fee_paid.into_py(py);
-            py_fills[(i, 4)] = fill.balance_usd_total.into_py(py);
-            py_fills[(i, 5)] = fill.balance_btc.into_py(py);
-            py_fills[(i, 6)] = fill.balance_usd.into_py(py);
-            py_fills[(i, 7)] = fill.btc_price.into_py(py);
-            py_fills[(i, 8)] = fill.fill_qty.into_py(py);
-            py_fills[(i, 9)] = fill.fill_price.into_py(py);
-            py_fills[(i, 10)] = fill.position_size.into_py(py);
-            py_fills[(i, 11)] = fill.position_price.into_py(py);
-            py_fills[(i, 12)] = fill.order_type.to_string().into_py(py);
         }
-
-        let py_equities_usd = Array1::from_vec(equities.usd)
-            .into_pyarray_bound(py)
-            .unbind();
-        let py_equities_btc = Array1::from_vec(equities.btc)
-            .into_pyarray_bound(py)
-            .unbind();
-        Ok((
-            py_fills.into_pyarray_bound(py).unbind(),
-            py_equities_usd,
-            py_equities_btc,
-            py_analysis_usd.into(),
-            py_analysis_btc.into(),
-        ))
-    })
+    } else {
+        return Err(PyValueError::new_err(
+            "Unsupported data type for exchange_params_list",
+        ));
+    }
+    Ok(params_vec)
 }
 
 fn struct_to_py_dict<'py, T: Serialize + ?Sized>(
@@ -181,11 +1208,51 @@ fn struct_to_py_dict<'py, T: Serialize + ?Sized>(
     })
 }
 
+/// Flat dict of a backtest profile: `<phase>_seconds` and `<phase>_calls` per phase,
+/// followed by the work counters.
+fn profile_to_py_dict<'py>(py: Python<'py>, profile: &BacktestProfile) -> PyResult<&'py PyDict> {
+    let dict = PyDict::new(py);
+    for phase in Phase::ALL {
+        dict.set_item(
+            format!("{}_seconds", phase.name()),
+            profile.durations[phase as usize].as_secs_f64(),
+        )?;
+        dict.set_item(
+            format!("{}_calls", phase.name()),
+            profile.calls[phase as usize],
+        )?;
+    }
+    for (key, value) in struct_to_py_dict(py, &profile.counters)?.iter() {
+        dict.set_item(key, value)?;
+    }
+    Ok(dict)
+}
+
 fn backtest_params_from_dict(dict: &PyDict) -> PyResult<BacktestParams> {
+    let fidelity_minutes: usize = extract_value(dict, "fidelity_minutes").unwrap_or(1);
+    if fidelity_minutes == 0 || 1440 % fidelity_minutes != 0 {
+        return Err(PyValueError::new_err(format!(
+            "fidelity_minutes must divide 1440, got {}",
+            fidelity_minutes
+        )));
+    }
     Ok(BacktestParams {
         starting_balance: extract_value(dict, "starting_balance").unwrap_or_default(),
         maker_fee: extract_value(dict, "maker_fee").unwrap_or_default(),
         coins: extract_value(dict, "coins").unwrap_or_default(),
+        fast_forward_max_minutes: extract_value(dict, "fast_forward_max_minutes")
+            .unwrap_or_default(),
+        fidelity_minutes,
+        abort_drawdown_worst: extract_value(dict, "abort_drawdown_worst").unwrap_or_default(),
+        abort_equity_balance_diff_neg_max: extract_value(dict, "abort_equity_balance_diff_neg_max")
+            .unwrap_or_default(),
+        abort_btc_drawdown_worst: extract_value(dict, "abort_btc_drawdown_worst")
+            .unwrap_or_default(),
+        abort_btc_equity_balance_diff_neg_max: extract_value(
+            dict,
+            "abort_btc_equity_balance_diff_neg_max",
+        )
+        .unwrap_or_default(),
     })
 }
 
@@ -1,8 +1,7 @@
-use serde::Serialize;
-use std::collections::HashMap;
+use serde::{Deserialize, Serialize};
 use std::fmt;
 
-#[derive(Debug)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub struct ExchangeParams {
     pub qty_step: f64,
     pub price_step: f64,
@@ -23,23 +22,236 @@ impl Default for ExchangeParams {
     }
 }
 
-#[derive(Clone, Debug)]
+#[derive(Clone, Debug, PartialEq, Serialize, Deserialize)]
 pub struct BacktestParams {
     pub starting_balance: f64,
     pub maker_fee: f64,
     pub coins: Vec<String>,
+    /// Max minutes to fast-forward over when no resting order can fill; 0 disables.
+    pub fast_forward_max_minutes: usize,
+    /// Minutes per HLCV row: 1 for 1m candles, or the bar size of aggregated candles.
+    /// EMA spans, rolling windows and the fast-forward span are converted to rows.
+    /// Must divide 1440.
+    pub fidelity_minutes: usize,
+    /// Stop the backtest once the running value of the metric exceeds the threshold;
+    /// 0.0 disables. Metrics are computed the same way as in the analysis.
+    pub abort_drawdown_worst: f64,
+    pub abort_equity_balance_diff_neg_max: f64,
+    pub abort_btc_drawdown_worst: f64,
+    pub abort_btc_equity_balance_diff_neg_max: f64,
 }
 
-#[derive(Default, Debug, Clone, Copy)]
+#[derive(Default, Debug, Clone, Copy, Serialize, Deserialize)]
 pub struct Position {
     pub size: f64,
     pub price: f64,
 }
 
-#[derive(Debug, Default)]
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
 pub struct Positions {
-    pub long: HashMap<usize, Position>,
-    pub short: HashMap<usize, Position>,
+    pub long: CoinMap<Position>,
+    pub short: CoinMap<Position>,
+}
+
+/// Set of coin indices backed by a bitset. Coin indices are dense (`0..n_coins`),
+/// so membership tests are a shift and a mask, and iteration is in ascending order.
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
+pub struct CoinSet {
+    words: Vec<u64>,
+    len: usize,
+}
+
+impl CoinSet {
+    pub fn with_capacity(n_coins: usize) -> Self {
+        CoinSet {
+            words: vec![0; (n_coins + 63) / 64],
+            len: 0,
+        }
+    }
+
+    #[inline]
+    pub fn contains(&self, idx: &usize) -> bool {
+        self.words
+            .get(idx / 64)
+            .map_or(false, |w| w & (1u64 << (idx % 64)) != 0)
+    }
+
+    /// Returns true if `idx` was not already present.
+    #[inline]
+    pub fn insert(&mut self, idx: usize) -> bool {
+        let word = idx / 64;
+        if word >= self.words.len() {
+            self.words.resize(word + 1, 0);
+        }
+        let mask = 1u64 << (idx % 64);
+        if self.words[word] & mask != 0 {
+            return false;
+        }
+        self.words[word] |= mask;
+        self.len += 1;
+        true
+    }
+
+    /// Returns true if `idx` was present.
+    #[inline]
+    pub fn remove(&mut self, idx: &usize) -> bool {
+        if !self.contains(idx) {
+            return false;
+        }
+        self.words[idx / 64] &= !(1u64 << (idx % 64));
+        self.len -= 1;
+        true
+    }
+
+    #[inline]
+    pub fn clear(&mut self) {
+        if self.len > 0 {
+            self.words.iter_mut().for_each(|w| *w = 0);
+            self.len = 0;
+        }
+    }
+
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    #[inline]
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    /// Iterate over the members in ascending order.
+    pub fn iter(&self) -> impl Iterator<Item = usize> + '_ {
+        self.words.iter().enumerate().flat_map(|(i, &word)| {
+            let mut w = word;
+            std::iter::from_fn(move || {
+                if w == 0 {
+                    return None;
+                }
+                let bit = w.trailing_zeros() as usize;
+                w &= w - 1;
+                Some(i * 64 + bit)
+            })
+        })
+    }
+}
+
+/// Map from coin index to `T` stored in a dense `Vec`, with a `CoinSet` tracking
+/// which entries are present. Keys iterate in ascending order.
+#[derive(Debug, Default, Clone, Serialize, Deserialize)]
+pub struct CoinMap<T> {
+    values: Vec<T>,
+    keys: CoinSet,
+}
+
+impl<T: Default> CoinMap<T> {
+    pub fn with_capacity(n_coins: usize) -> Self {
+        CoinMap {
+            values: (0..n_coins).map(|_| T::default()).collect(),
+            keys: CoinSet::with_capacity(n_coins),
+        }
+    }
+
+    #[inline]
+    pub fn contains_key(&self, idx: &usize) -> bool {
+        self.keys.contains(idx)
+    }
+
+    #[inline]
+    pub fn get(&self, idx: &usize) -> Option<&T> {
+        if self.keys.contains(idx) {
+            Some(&self.values[*idx])
+        } else {
+            None
+        }
+    }
+
+    #[inline]
+    pub fn get_mut(&mut self, idx: &usize) -> Option<&mut T> {
+        if self.keys.contains(idx) {
+            Some(&mut self.values[*idx])
+        } else {
+            None
+        }
+    }
+
+    /// Returns the value for `idx`, inserting `T::default()` if absent.
+    #[inline]
+    pub fn entry_or_default(&mut self, idx: usize) -> &mut T {
+        if idx >= self.values.len() {
+            self.values.resize_with(idx + 1, T::default);
+        }
+        if self.keys.insert(idx) {
+            self.values[idx] = T::default();
+        }
+        &mut self.values[idx]
+    }
+
+    #[inline]
+    pub fn insert(&mut self, idx: usize, value: T) {
+        *self.entry_or_default(idx) = value;
+    }
+
+    /// Values of removed keys are left in place and reset on the next insert.
+    #[inline]
+    pub fn remove(&mut self, idx: &usize) -> bool {
+        self.keys.remove(idx)
+    }
+
+    #[inline]
+    pub fn clear(&mut self) {
+        self.keys.clear();
+    }
+
+    #[inline]
+    pub fn len(&self) -> usize {
+        self.keys.len()
+    }
+
+    #[inline]
+    pub fn is_empty(&self) -> bool {
+        self.keys.is_empty()
+    }
+
+    /// Present keys in ascending order.
+    pub fn keys(&self) -> impl Iterator<Item = usize> + '_ {
+        self.keys.iter()
+    }
+
+    /// Present (key, value) pairs in ascending key order.
+    pub fn iter(&self) -> impl Iterator<Item = (usize, &T)> + '_ {
+        self.keys.iter().map(move |idx| (idx, &self.values[idx]))
+    }
+}
+
+impl<T: Default> std::ops::Index<&usize> for CoinMap<T> {
+    type Output = T;
+
+    #[inline]
+    fn index(&self, idx: &usize) -> &T {
+        self.get(idx).expect("coin index not present in CoinMap")
+    }
+}
+
+/// Element type of an HLCV array. Candles may be stored as f32 to halve memory and
+/// bandwidth; the backtest reads every value through `to_f64` and computes in f64.
+pub trait HlcvElement: Copy + Send + Sync + 'static {
+    fn to_f64(self) -> f64;
+}
+
+impl HlcvElement for f64 {
+    #[inline(always)]
+    fn to_f64(self) -> f64 {
+        self
+    }
+}
+
+impl HlcvElement for f32 {
+    #[inline(always)]
+    fn to_f64(self) -> f64 {
+        self as f64
+    }
 }
 
 #[derive(Debug, Default, Clone)]
@@ -48,7 +260,7 @@ pub struct EMABands {
     pub lower: f64,
 }
 
-#[derive(Debug, Clone, Copy)]
+#[derive(Debug, Clone, Copy, Serialize, Deserialize)]
 pub struct Order {
     pub qty: f64,
     pub price: f64,
@@ -78,13 +290,13 @@ pub struct StateParams {
     pub ema_bands: EMABands,
 }
 
-#[derive(Clone, Default, Debug)]
+#[derive(Clone, Default, Debug, PartialEq, Serialize, Deserialize)]
 pub struct BotParamsPair {
     pub long: BotParams,
     pub short: BotParams,
 }
 
-#[derive(Clone, Default, Debug)]
+#[derive(Clone, Default, Debug, PartialEq, Serialize, Deserialize)]
 pub struct BotParams {
     pub close_grid_markup_end: f64,
     pub close_grid_markup_start: f64,
@@ -117,7 +329,7 @@ pub struct BotParams {
     pub unstuck_threshold: f64,
 }
 
-#[derive(Debug)]
+#[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct TrailingPriceBundle {
     pub min_since_open: f64,
     pub max_since_min: f64,
@@ -136,7 +348,7 @@ impl Default for TrailingPriceBundle {
 }
 
 #[repr(u16)]
-#[derive(Debug, PartialEq, Eq, Clone, Copy)]
+#[derive(Debug, PartialEq, Eq, Clone, Copy, Serialize, Deserialize)]
 pub enum OrderType {
     EntryInitialNormalLong = 0,
     EntryInitialPartialLong = 1,
@@ -296,7 +508,7 @@ impl OrderType {
     }
 }
 
-#[derive(Default)]
+#[derive(Default, Clone, Serialize, Deserialize)]
 pub struct Balance {
     pub usd: f64,                 // usd balance
     pub usd_total: f64,           // total in usd
@@ -306,13 +518,13 @@ pub struct Balance {
     pub use_btc_collateral: bool, // whether to use btc as collateral
 }
 
-#[derive(Default, Clone)]
+#[derive(Default, Clone, Serialize, Deserialize)]
 pub struct Equities {
     pub usd: Vec<f64>,
     pub btc: Vec<f64>,
 }
 
-#[derive(Debug, Clone)]
+#[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct Fill {
     pub index: usize,
     pub coin: String,
@@ -371,6 +583,9 @@ pub struct Analysis {
     pub loss_profit_ratio_w: f64,
     pub volume_pct_per_day_avg: f64,
     pub volume_pct_per_day_avg_w: f64,
+
+    /// Fraction of timesteps simulated; below 1.0 if the backtest was aborted.
+    pub backtest_completion_ratio: f64,
 }
 
 impl Default for Analysis {
@@ -413,6 +628,7 @@ impl Default for Analysis {
             exponential_fit_error_w: 1.0,
             volume_pct_per_day_avg: 0.0,
             volume_pct_per_day_avg_w: 0.0,
+            backtest_completion_ratio: 1.0,
         }
     }
 }
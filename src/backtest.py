@@ -33,6 +33,7 @@ from pure_funcs import (
 import pprint
 from copy import deepcopy
 from downloader import (
+    get_hlcvs_dtype,
     prepare_hlcvs,
     prepare_hlcvs_combined,
 )
@@ -43,10 +44,12 @@ import matplotlib.pyplot as plt
 import logging
 from main import manage_rust_compilation
 import gzip
+import hashlib
 import traceback
 
 import tempfile
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -84,25 +87,50 @@ def oj(*x):
     return os.path.join(*x)
 
 
-def process_forager_fills(fills, coins, hlcvs, equities, equities_btc):
-    fdf = pd.DataFrame(
-        fills,
-        columns=[
-            "minute",
-            "coin",
-            "pnl",
-            "fee_paid",
-            "balance",
-            "balance_btc",
-            "balance_usd",
-            "btc_price",
-            "qty",
-            "price",
-            "psize",
-            "pprice",
-            "type",
-        ],
+FILLS_COLUMNS = {
+    "index": "minute",
+    "coin": "coin",
+    "pnl": "pnl",
+    "fee_paid": "fee_paid",
+    "balance_usd_total": "balance",
+    "balance_btc": "balance_btc",
+    "balance_usd": "balance_usd",
+    "btc_price": "btc_price",
+    "fill_qty": "qty",
+    "fill_price": "price",
+    "position_size": "psize",
+    "position_price": "pprice",
+    "order_type": "type",
+}
+
+
+def fills_to_dataframe(fills):
+    """
+    Builds the fills DataFrame from the output of pbr.run_backtest.
+
+    Accepts either fills_format="objects" (2D object array) or fills_format="columns"
+    (dict of column arrays with coin and order type codes). Coded columns are decoded
+    to categoricals, which avoids materializing one Python string per fill.
+    """
+    if not isinstance(fills, dict):
+        return pd.DataFrame(fills, columns=list(FILLS_COLUMNS.values()))
+    data = {new: fills[old] for old, new in FILLS_COLUMNS.items()}
+    data["coin"] = pd.Categorical.from_codes(fills["coin"].astype(np.int64), fills["coins"])
+    data["type"] = pd.Categorical.from_codes(
+        fills["order_type"].astype(np.int64), fills["order_types"]
     )
+    return pd.DataFrame(data)
+
+
+def process_forager_fills(fills, coins, hlcvs, equities, equities_btc, minutes_per_row=1):
+    """
+    The backtest indexes fills and equities by row; with minutes_per_row > 1 (fidelity_minutes)
+    both are converted to minutes since the start, so fills.csv and balance_and_equity.csv read
+    the same at any fidelity. equities may be a Series holding only some rows (resumed
+    backtests keep hourly equities), indexed by row.
+    """
+    fdf = fills_to_dataframe(fills)
+    fdf["minute"] = fdf.minute.astype(np.int64) * minutes_per_row
     analysis_appendix = {}
     pnls = {}
     for pside in ["long", "short"]:
@@ -116,13 +144,18 @@ def process_forager_fills(fills, coins, hlcvs, equities, equities_btc):
         pnls[pside] = profit + loss
         analysis_appendix[f"loss_profit_ratio_{pside}"] = abs(loss / profit)
 
-    div_by = 60  # save some disk space. Set to 1 to dump uncropped
+    div_by = max(1, 60 // minutes_per_row)  # save some disk space. Set to 1 to dump uncropped
     analysis_appendix["pnl_ratio_long_short"] = pnls["long"] / (pnls["long"] + pnls["short"])
-    bdf = fdf.groupby((fdf.minute // div_by) * div_by).balance.last()
-    bbdf = fdf.groupby((fdf.minute // div_by) * div_by).balance_btc.last()
-    edf = pd.Series(equities).iloc[::div_by]
-    ebdf = pd.Series(equities_btc).iloc[::div_by]
-    nidx = np.arange(min(bdf.index[0], edf.index[0]), max(bdf.index[-1], edf.index[-1]), div_by)
+    bucket = div_by * minutes_per_row
+    bdf = fdf.groupby((fdf.minute // bucket) * bucket).balance.last()
+    bbdf = fdf.groupby((fdf.minute // bucket) * bucket).balance_btc.last()
+    edf = pd.Series(equities)
+    edf = edf[edf.index % div_by == 0]
+    edf.index = edf.index * minutes_per_row
+    ebdf = pd.Series(equities_btc)
+    ebdf = ebdf[ebdf.index % div_by == 0]
+    ebdf.index = ebdf.index * minutes_per_row
+    nidx = np.arange(min(bdf.index[0], edf.index[0]), max(bdf.index[-1], edf.index[-1]), bucket)
     bal_eq = (
         pd.DataFrame(
             {"balance": bdf, "equity": edf, "balance_btc": bbdf, "equity_btc": ebdf}, index=nidx
@@ -182,9 +215,31 @@ def get_cache_hash(config, exchange):
         "gap_tolerance_ohlcvs_minutes": config["backtest"]["gap_tolerance_ohlcvs_minutes"],
         "config_has_mimic_backtest_1m_delay": "mimic_backtest_1m_delay" in config["live"],
     }
+    if get_hlcvs_dtype(config) != np.float64:
+        # keep hashes of existing float64 caches unchanged
+        to_hash["hlcvs_dtype"] = config["backtest"]["hlcvs_dtype"]
     return calc_hash(to_hash)
 
 
+def get_dataset_fingerprint(config, exchange, hlcvs, btc_usd_prices):
+    """
+    Identifies the exact arrays a backtest runs on: the cache hash of the data request plus a
+    hash of the (possibly aggregated) hlcvs and BTC/USD contents.
+    """
+    content_hash = hashlib.blake2b(digest_size=16)
+    for arr in (hlcvs, btc_usd_prices):
+        arr = np.ascontiguousarray(arr)
+        content_hash.update(f"{arr.dtype.str}{arr.shape}".encode())
+        content_hash.update(arr.data)
+    return calc_hash(
+        {
+            "cache_hash": get_cache_hash(config, exchange),
+            "fidelity_minutes": get_fidelity_minutes(config),
+            "content_hash": content_hash.hexdigest(),
+        }
+    )
+
+
 def load_coins_hlcvs_from_cache(config, exchange):
     cache_hash = get_cache_hash(config, exchange)
     cache_dir = Path("caches") / "hlcvs_data" / cache_hash[:16]
@@ -272,6 +327,61 @@ def save_coins_hlcvs_to_cache(config, coins, hlcvs, exchange, mss, btc_usd_price
     return cache_dir
 
 
+def get_fidelity_minutes(config) -> int:
+    fidelity_minutes = int(config["backtest"].get("fidelity_minutes", 1))
+    if fidelity_minutes < 1 or 1440 % fidelity_minutes != 0:
+        raise ValueError(f"backtest.fidelity_minutes must divide 1440, got {fidelity_minutes}")
+    return fidelity_minutes
+
+
+def aggregate_hlcvs(hlcvs, btc_usd_prices, fidelity_minutes):
+    """
+    Aggregates 1m hlcvs of shape (n_timesteps, n_coins, 4) into candles of fidelity_minutes:
+    max high, min low, last close and summed volume. A candle has volume -1.0 (no data) only
+    if none of its minutes has data. The last candle may cover fewer minutes.
+    BTC/USD prices are taken at each candle's last minute.
+    """
+    starts = np.arange(0, len(hlcvs), fidelity_minutes)
+    ends = np.minimum(starts + fidelity_minutes, len(hlcvs)) - 1
+    volumes = hlcvs[:, :, 3]
+    has_data = volumes >= 0.0
+    aggregated = np.empty((len(starts), hlcvs.shape[1], 4), dtype=hlcvs.dtype)
+    aggregated[:, :, 0] = np.maximum.reduceat(hlcvs[:, :, 0], starts, axis=0)
+    aggregated[:, :, 1] = np.minimum.reduceat(hlcvs[:, :, 1], starts, axis=0)
+    aggregated[:, :, 2] = hlcvs[ends, :, 2]
+    aggregated[:, :, 3] = np.where(
+        np.logical_or.reduceat(has_data, starts, axis=0),
+        np.add.reduceat(np.where(has_data, volumes, 0.0), starts, axis=0),
+        -1.0,
+    )
+    return aggregated, btc_usd_prices[ends]
+
+
+def load_or_aggregate_hlcvs(config, cache_dir, hlcvs, btc_usd_prices):
+    """
+    Returns hlcvs and btc_usd_prices at the candle size of backtest.fidelity_minutes.
+    The 1m arrays are aggregated once and cached next to them in cache_dir.
+    """
+    fidelity_minutes = get_fidelity_minutes(config)
+    if fidelity_minutes == 1:
+        return hlcvs, btc_usd_prices
+    if cache_dir:
+        fname = Path(cache_dir) / f"hlcvs_{fidelity_minutes}m.npy"
+        btc_fname = Path(cache_dir) / f"btc_usd_prices_{fidelity_minutes}m.npy"
+        if fname.exists() and btc_fname.exists():
+            logging.info(f"Loading {fidelity_minutes}m hlcvs data from cache {fname}...")
+            return np.load(fname), np.load(btc_fname)
+    logging.info(f"Aggregating hlcvs data to {fidelity_minutes}m candles...")
+    hlcvs, btc_usd_prices = aggregate_hlcvs(hlcvs, btc_usd_prices, fidelity_minutes)
+    if cache_dir:
+        try:
+            np.save(fname, hlcvs)
+            np.save(btc_fname, btc_usd_prices)
+        except Exception as e:
+            logging.error(f"Failed to save {fidelity_minutes}m hlcvs to cache: {e}")
+    return hlcvs, btc_usd_prices
+
+
 async def prepare_hlcvs_mss(config, exchange):
     results_path = oj(config["backtest"]["base_dir"], exchange, "")
     try:
@@ -332,6 +442,10 @@ def prep_backtest_args(config, mss, exchange, exchange_params=None, backtest_par
             "maker_fee": mss[coins[0]]["maker"],
             "coins": coins,
             "use_btc_collateral": config["backtest"].get("use_btc_collateral", False),
+            "fast_forward_max_minutes": int(
+                config["backtest"].get("fast_forward_max_minutes", 0)
+            ),
+            "fidelity_minutes": get_fidelity_minutes(config),
         }
     return bot_params_list, exchange_params, backtest_params
 
@@ -363,6 +477,47 @@ def expand_analysis(analysis_usd, analysis_btc, fills, config):
     }
 
 
+def get_checkpoint_path(config, exchange, bot_params_list, exchange_params, backtest_params):
+    to_hash = {
+        "bot_params_list": bot_params_list,
+        "exchange_params": exchange_params,
+        "backtest_params": backtest_params,
+        "start_date": config["backtest"]["start_date"],
+        "exchange": config["backtest"]["exchanges"] if exchange == "combined" else exchange,
+        "hlcvs_dtype": config["backtest"].get("hlcvs_dtype", "float64"),
+    }
+    return Path("caches") / "backtest_checkpoints" / f"{calc_hash(to_hash)[:16]}.json.gz"
+
+
+def run_backtest_from_checkpoint(checkpoint_path, *args, **kwargs):
+    """
+    Runs pbr.run_backtest_resumable, continuing from the checkpoint stored at
+    checkpoint_path by a previous run over a shorter date range, if there is one.
+    Falls back to a full run if the checkpoint does not match the data.
+    The new checkpoint then replaces the stored one.
+    """
+    checkpoint = None
+    if os.path.exists(checkpoint_path):
+        with gzip.open(checkpoint_path, "rb") as f:
+            checkpoint = f.read()
+        logging.info(f"Resuming backtest from checkpoint {checkpoint_path}")
+    try:
+        *results, checkpoint = pbr.run_backtest_resumable(
+            *args, checkpoint=checkpoint, fills_format="columns", **kwargs
+        )
+    except ValueError as e:
+        if checkpoint is None:
+            raise
+        logging.info(f"Unable to resume from {checkpoint_path}: {e}. Running full backtest")
+        *results, checkpoint = pbr.run_backtest_resumable(
+            *args, fills_format="columns", **kwargs
+        )
+    make_get_filepath(str(checkpoint_path))
+    with gzip.open(checkpoint_path, "wb") as f:
+        f.write(checkpoint)
+    return results
+
+
 def run_backtest(hlcvs, mss, config: dict, exchange: str, btc_usd_prices):
     bot_params_list, exchange_params, backtest_params = prep_backtest_args(config, mss, exchange)
     if not config["backtest"]["use_btc_collateral"]:
@@ -374,7 +529,7 @@ def run_backtest(hlcvs, mss, config: dict, exchange: str, btc_usd_prices):
     with create_shared_memory_file(hlcvs) as shared_memory_file, create_shared_memory_file(
         btc_usd_prices
     ) as btc_usd_shared_memory_file:
-        fills, equities_usd, equities_btc, analysis_usd, analysis_btc = pbr.run_backtest(
+        args = (
             shared_memory_file,
             hlcvs.shape,
             hlcvs.dtype.str,
@@ -384,6 +539,28 @@ def run_backtest(hlcvs, mss, config: dict, exchange: str, btc_usd_prices):
             exchange_params,
             backtest_params,
         )
+        if config["backtest"].get("resume_from_checkpoint", False):
+            checkpoint_path = get_checkpoint_path(
+                config, exchange, bot_params_list, exchange_params, backtest_params
+            )
+            # checkpoints keep hourly equities only, the resolution balance_and_equity.csv has
+            sample_rows = max(1, 60 // get_fidelity_minutes(config))
+            fills, equities_usd, equities_btc, analysis_usd, analysis_btc = (
+                run_backtest_from_checkpoint(
+                    checkpoint_path, *args, equity_sample_minutes=sample_rows
+                )
+            )
+            equities_usd, equities_btc = (
+                pd.Series(equities, index=np.arange(len(equities)) * sample_rows)
+                for equities in (equities_usd, equities_btc)
+            )
+        else:
+            profile = {} if config.get("profile_backtest", False) else None
+            fills, equities_usd, equities_btc, analysis_usd, analysis_btc = pbr.run_backtest(
+                *args, fills_format="columns", profile=profile
+            )
+            if profile is not None:
+                logging.info(f"backtest profile:\n{pprint.pformat(profile, sort_dicts=False)}")
 
     logging.info(f"seconds elapsed for backtest: {(utc_ms() - sts) / 1000:.4f}")
     return (
@@ -394,6 +571,303 @@ def run_backtest(hlcvs, mss, config: dict, exchange: str, btc_usd_prices):
     )
 
 
+def fidelity_consistency_report(
+    config, bot_configs, hlcvs, mss, exchange, btc_usd_prices, cache_dir=""
+):
+    """
+    Backtests each config in bot_configs, whose "bot" sections replace config["bot"], on
+    1m candles and on candles of backtest.fidelity_minutes, and compares the analyses.
+    Returns (per_config, summary): per_config has one row per config and a (metric,
+    fidelity) column per value, summary one row per metric with the Spearman rank
+    correlation across configs and the median relative difference of coarse to fine.
+    """
+    coarse_hlcvs, coarse_btc_usd_prices = load_or_aggregate_hlcvs(
+        config, cache_dir, hlcvs, btc_usd_prices
+    )
+    if not config["backtest"]["use_btc_collateral"]:
+        btc_usd_prices = np.ones(len(btc_usd_prices))
+        coarse_btc_usd_prices = np.ones(len(coarse_btc_usd_prices))
+    fine_config = deepcopy(config)
+    fine_config["backtest"]["fidelity_minutes"] = 1
+    rows = []
+    for fidelity, fidelity_config, data, btc_data in [
+        ("fine", fine_config, hlcvs, btc_usd_prices),
+        ("coarse", config, coarse_hlcvs, coarse_btc_usd_prices),
+    ]:
+        with create_shared_memory_file(data) as shared_memory_file, create_shared_memory_file(
+            btc_data
+        ) as btc_usd_shared_memory_file:
+            dataset = pbr.HlcvDataset(
+                shared_memory_file,
+                data.shape,
+                data.dtype.str,
+                btc_usd_shared_memory_file,
+                btc_data.dtype.str,
+            )
+            for i, bot_config in enumerate(bot_configs):
+                config_i = {**fidelity_config, "bot": bot_config["bot"]}
+                bot_params_list, exchange_params, backtest_params = prep_backtest_args(
+                    config_i, mss, exchange
+                )
+                sts = utc_ms()
+                fills, _, _, analysis_usd, analysis_btc = dataset.run_backtest(
+                    bot_params_list,
+                    exchange_params,
+                    backtest_params,
+                    fills_format="none",
+                    equity_sample_minutes=0,
+                )
+                analysis = expand_analysis(analysis_usd, analysis_btc, fills, config_i)
+                analysis["seconds_elapsed"] = (utc_ms() - sts) / 1000
+                rows.append({"config": i, "fidelity": fidelity, **analysis})
+    per_config = pd.DataFrame(rows).pivot(index="config", columns="fidelity")
+    summary = {}
+    for metric in per_config.columns.get_level_values(0).unique():
+        fine, coarse = per_config[(metric, "fine")], per_config[(metric, "coarse")]
+        summary[metric] = {
+            "spearman": fine.rank().corr(coarse.rank()),
+            # metrics that are 0 on 1m candles (e.g. no losses) would divide by zero
+            "median_rel_diff": ((coarse - fine).abs() / np.maximum(fine.abs(), 1e-12)).median(),
+        }
+    return per_config, pd.DataFrame(summary).T
+
+
+def write_fidelity_report(
+    config, exchange, hlcvs, mss, btc_usd_prices, cache_dir, results_path, configs_path
+):
+    if os.path.isdir(configs_path):
+        config_paths = sorted(Path(configs_path).glob("*.json"))
+    else:
+        config_paths = [Path(configs_path)]
+    bot_configs = [load_config(str(path), verbose=False) for path in config_paths]
+    logging.info(
+        f"{exchange} Comparing analyses of {len(bot_configs)} configs at 1m and "
+        f"{get_fidelity_minutes(config)}m candles..."
+    )
+    per_config, summary = fidelity_consistency_report(
+        config, bot_configs, hlcvs, mss, exchange, btc_usd_prices, cache_dir
+    )
+    results_path = make_get_filepath(
+        oj(results_path, f"{ts_to_date(utc_ms())[:19].replace(':', '_')}_fidelity_report", "")
+    )
+    per_config.to_csv(oj(results_path, "per_config.csv"))
+    summary.to_csv(oj(results_path, "summary.csv"))
+    pprint.pprint(summary.to_dict(orient="index"))
+    logging.info(f"Fidelity report written to {results_path}")
+
+
+def walk_forward_windows(n_timesteps, n_windows, mode="rolling"):
+    """
+    Splits rows 0..n_timesteps into n_windows consecutive windows of equal length.
+    "rolling" returns those windows; "anchored" returns windows that all start at row 0 and
+    end where the rolling ones do, so each extends the previous one.
+    Returns a list of (start_idx, end_idx).
+    """
+    if mode not in ("rolling", "anchored"):
+        raise ValueError(f"walk-forward mode must be 'rolling' or 'anchored', got {mode}")
+    if n_windows < 1 or n_timesteps // n_windows < 2:
+        raise ValueError(f"unable to split {n_timesteps} candles into {n_windows} windows")
+    bounds = np.linspace(0, n_timesteps, n_windows + 1).round().astype(int)
+    return [
+        (0 if mode == "anchored" else int(start), int(end))
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def backtest_views(config, hlcvs, mss, exchange, btc_usd_prices, views, n_cpus=None):
+    """
+    Backtests config once per view, a dict of start_idx, end_idx and/or coin_indices as
+    taken by HlcvDataset.run_backtest. hlcvs is mapped once and the views run in parallel
+    threads against that mapping. Returns one expanded analysis per view, in order, with
+    the seconds each backtest took.
+    """
+    bot_params_list, exchange_params, backtest_params = prep_backtest_args(config, mss, exchange)
+    if not config["backtest"]["use_btc_collateral"]:
+        btc_usd_prices = np.ones(len(btc_usd_prices))
+    with create_shared_memory_file(hlcvs) as shared_memory_file, create_shared_memory_file(
+        btc_usd_prices
+    ) as btc_usd_shared_memory_file:
+        dataset = pbr.HlcvDataset(
+            shared_memory_file,
+            hlcvs.shape,
+            hlcvs.dtype.str,
+            btc_usd_shared_memory_file,
+            btc_usd_prices.dtype.str,
+        )
+
+        def run_view(view):
+            sts = utc_ms()
+            fills, _, _, analysis_usd, analysis_btc = dataset.run_backtest(
+                bot_params_list,
+                exchange_params,
+                backtest_params,
+                fills_format="none",
+                equity_sample_minutes=0,
+                **view,
+            )
+            analysis = expand_analysis(analysis_usd, analysis_btc, fills, config)
+            analysis["seconds_elapsed"] = (utc_ms() - sts) / 1000
+            return analysis
+
+        # backtests release the GIL; threads share the dataset and its mmaps
+        with ThreadPool(processes=n_cpus or min(len(views), os.cpu_count() or 1)) as pool:
+            return pool.map(run_view, views)
+
+
+def walk_forward_report(
+    config, hlcvs, mss, exchange, btc_usd_prices, n_windows, mode="rolling", n_cpus=None
+):
+    """
+    Backtests config on each window of walk_forward_windows, see backtest_views.
+    Returns (per_window, summary): per_window has one row per window with its bounds (also
+    in days from the first candle) and analysis, summary one row per metric with its
+    mean, std, min, median and max across windows.
+    """
+    windows = walk_forward_windows(len(hlcvs), n_windows, mode)
+    analyses = backtest_views(
+        config,
+        hlcvs,
+        mss,
+        exchange,
+        btc_usd_prices,
+        [{"start_idx": start_idx, "end_idx": end_idx} for start_idx, end_idx in windows],
+        n_cpus,
+    )
+    rows_per_day = 1440 / get_fidelity_minutes(config)
+    per_window = pd.DataFrame(
+        [
+            {
+                "start_idx": start_idx,
+                "end_idx": end_idx,
+                "start_day": round(start_idx / rows_per_day, 2),
+                "end_day": round(end_idx / rows_per_day, 2),
+                **analysis,
+            }
+            for (start_idx, end_idx), analysis in zip(windows, analyses)
+        ]
+    ).rename_axis("window")
+    metrics = per_window.drop(
+        columns=["start_idx", "end_idx", "start_day", "end_day", "seconds_elapsed"]
+    ).astype(float)
+    summary = pd.DataFrame(
+        {
+            "mean": metrics.mean(),
+            "std": metrics.std(),
+            "min": metrics.min(),
+            "median": metrics.median(),
+            "max": metrics.max(),
+        }
+    )
+    return per_window, summary
+
+
+def write_walk_forward_report(
+    config, exchange, hlcvs, mss, btc_usd_prices, results_path, n_windows, mode
+):
+    logging.info(f"{exchange} Backtesting on {n_windows} {mode} walk-forward windows...")
+    sts = utc_ms()
+    per_window, summary = walk_forward_report(
+        config, hlcvs, mss, exchange, btc_usd_prices, n_windows, mode
+    )
+    logging.info(f"seconds elapsed for walk-forward backtests: {(utc_ms() - sts) / 1000:.4f}")
+    results_path = make_get_filepath(
+        oj(results_path, f"{ts_to_date(utc_ms())[:19].replace(':', '_')}_walk_forward", "")
+    )
+    per_window.to_csv(oj(results_path, "per_window.csv"))
+    summary.to_csv(oj(results_path, "summary.csv"))
+    pprint.pprint(summary.to_dict(orient="index"))
+    logging.info(f"Walk-forward report written to {results_path}")
+
+
+def coin_subsets(n_coins, subset_sizes, n_samples, seed=0):
+    """
+    Draws n_samples random coin subsets of each size in subset_sizes, without replacement
+    within a subset. Sample i of every size uses seed + i, so adding sizes or samples
+    keeps the earlier draws. Returns a list of (seed, sorted coin indices).
+    """
+    for size in subset_sizes:
+        if not 1 <= size <= n_coins:
+            raise ValueError(f"coin subset size must be between 1 and {n_coins}, got {size}")
+    subsets = []
+    for size in subset_sizes:
+        for i in range(n_samples):
+            rng = np.random.default_rng([seed + i, size])
+            subsets.append((seed + i, sorted(rng.choice(n_coins, size, replace=False).tolist())))
+    return subsets
+
+
+def monte_carlo_report(
+    config, hlcvs, mss, exchange, btc_usd_prices, subset_sizes, n_samples, seed=0, n_cpus=None
+):
+    """
+    Backtests config on random subsets of its coins drawn by coin_subsets, see
+    backtest_views. Returns (per_sample, summary): per_sample has one row per subset with
+    its seed, size, coins and analysis, summary one row per (n_coins, metric) with the
+    mean, std and quantiles of the metric across the subsets of that size.
+    """
+    coins = sorted(set(config["backtest"]["coins"][exchange]))
+    subsets = coin_subsets(len(coins), subset_sizes, n_samples, seed)
+    analyses = backtest_views(
+        config,
+        hlcvs,
+        mss,
+        exchange,
+        btc_usd_prices,
+        [{"coin_indices": coin_indices} for _, coin_indices in subsets],
+        n_cpus,
+    )
+    per_sample = pd.DataFrame(
+        [
+            {
+                "seed": seed_i,
+                "n_coins": len(coin_indices),
+                "coins": ",".join(coins[i] for i in coin_indices),
+                **analysis,
+            }
+            for (seed_i, coin_indices), analysis in zip(subsets, analyses)
+        ]
+    ).rename_axis("sample")
+    metrics = (
+        per_sample.drop(columns=["seed", "n_coins", "coins", "seconds_elapsed"])
+        .astype(float)
+        .assign(n_coins=per_sample["n_coins"])
+    )
+    summary = (
+        metrics.melt(id_vars="n_coins", var_name="metric")
+        .groupby(["n_coins", "metric"])["value"]
+        .describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95])
+        .drop(columns="count")
+    )
+    return per_sample, summary
+
+
+def write_monte_carlo_report(
+    config, exchange, hlcvs, mss, btc_usd_prices, results_path, n_samples, subset_sizes, seed
+):
+    n_coins = len(set(config["backtest"]["coins"][exchange]))
+    subset_sizes = subset_sizes or [max(1, n_coins // 2)]
+    logging.info(
+        f"{exchange} Backtesting on {n_samples} random subsets of each size {subset_sizes} "
+        f"of {n_coins} coins..."
+    )
+    sts = utc_ms()
+    per_sample, summary = monte_carlo_report(
+        config, hlcvs, mss, exchange, btc_usd_prices, subset_sizes, n_samples, seed
+    )
+    logging.info(f"seconds elapsed for monte carlo backtests: {(utc_ms() - sts) / 1000:.4f}")
+    results_path = make_get_filepath(
+        oj(results_path, f"{ts_to_date(utc_ms())[:19].replace(':', '_')}_monte_carlo", "")
+    )
+    per_sample.to_csv(oj(results_path, "per_sample.csv"))
+    summary.to_csv(oj(results_path, "summary.csv"))
+    pprint.pprint(
+        summary.loc[(slice(None), ["adg", "drawdown_worst", "sharpe_ratio"]), :].to_dict(
+            orient="index"
+        )
+    )
+    logging.info(f"Monte Carlo report written to {results_path}")
+
+
 def post_process(
     config,
     hlcvs,
@@ -409,7 +883,12 @@ def post_process(
     equities = pd.Series(equities)
     equities_btc = pd.Series(equities_btc)
     fdf, analysis_py, bal_eq = process_forager_fills(
-        fills, config["backtest"]["coins"][exchange], hlcvs, equities, equities_btc
+        fills,
+        config["backtest"]["coins"][exchange],
+        hlcvs,
+        equities,
+        equities_btc,
+        minutes_per_row=get_fidelity_minutes(config),
     )
     for k in analysis_py:
         if k not in analysis:
@@ -462,7 +941,11 @@ def plot_forager(
         for i, coin in enumerate(config["backtest"]["coins"][exchange]):
             try:
                 logging.info(f"Plotting fills for {coin}")
-                hlcvs_df = pd.DataFrame(hlcvs[:, i, :3], columns=["high", "low", "close"])
+                hlcvs_df = pd.DataFrame(
+                    hlcvs[:, i, :3],
+                    columns=["high", "low", "close"],
+                    index=np.arange(len(hlcvs)) * get_fidelity_minutes(config),
+                )
                 fdfc = fdf[fdf.coin == coin]
                 plt.clf()
                 plot_fills_forager(fdfc, hlcvs_df)
@@ -487,6 +970,60 @@ async def main():
         action="store_true",
         help="disable plotting",
     )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store_true",
+        help="log the time spent in each phase of the backtest and counts of work done",
+    )
+    parser.add_argument(
+        "--fidelity_report",
+        dest="fidelity_report",
+        type=str,
+        default=None,
+        help="path to a config, or a directory of configs, to backtest at 1m and at "
+        "backtest.fidelity_minutes candles, writing a comparison of the analyses "
+        "instead of running a regular backtest",
+    )
+    parser.add_argument(
+        "--walk_forward",
+        dest="walk_forward",
+        type=int,
+        default=None,
+        help="number of windows to split the date range into, backtesting the config on "
+        "each and writing per-window analyses and their dispersion instead of running a "
+        "regular backtest",
+    )
+    parser.add_argument(
+        "--walk_forward_mode",
+        dest="walk_forward_mode",
+        type=str,
+        choices=["rolling", "anchored"],
+        default="rolling",
+        help="rolling: consecutive windows; anchored: all windows start at the start date",
+    )
+    parser.add_argument(
+        "--monte_carlo",
+        dest="monte_carlo",
+        type=int,
+        default=None,
+        help="number of random coin subsets of each size to backtest the config on, writing "
+        "per-subset analyses and their distribution instead of running a regular backtest",
+    )
+    parser.add_argument(
+        "--monte_carlo_sizes",
+        dest="monte_carlo_sizes",
+        type=lambda x: [int(size) for size in x.split(",")],
+        default=None,
+        help="comma separated coin subset sizes for --monte_carlo (default: half the coins)",
+    )
+    parser.add_argument(
+        "--monte_carlo_seed",
+        dest="monte_carlo_seed",
+        type=int,
+        default=0,
+        help="seed of the first random coin subset of each size for --monte_carlo",
+    )
     template_config = get_template_live_config("v7")
     del template_config["optimize"]
     keep_live_keys = {
@@ -512,6 +1049,7 @@ async def main():
     config = parse_overrides(config, verbose=True)
     await format_approved_ignored_coins(config, config["backtest"]["exchanges"])
     config["disable_plotting"] = args.disable_plotting
+    config["profile_backtest"] = args.profile
     config["backtest"]["cache_dir"] = {}
     config["backtest"]["coins"] = {}
     if config["backtest"]["combine_ohlcvs"]:
@@ -526,6 +1064,44 @@ async def main():
             logging.info(f"chose {ex} for {','.join(exchange_preference[ex])}")
         config["backtest"]["coins"][exchange] = coins
         config["backtest"]["cache_dir"][exchange] = str(cache_dir)
+        if args.fidelity_report:
+            write_fidelity_report(
+                config,
+                exchange,
+                hlcvs,
+                mss,
+                btc_usd_prices,
+                cache_dir,
+                results_path,
+                args.fidelity_report,
+            )
+            return
+        hlcvs, btc_usd_prices = load_or_aggregate_hlcvs(config, cache_dir, hlcvs, btc_usd_prices)
+        if args.walk_forward:
+            write_walk_forward_report(
+                config,
+                exchange,
+                hlcvs,
+                mss,
+                btc_usd_prices,
+                results_path,
+                args.walk_forward,
+                args.walk_forward_mode,
+            )
+            return
+        if args.monte_carlo:
+            write_monte_carlo_report(
+                config,
+                exchange,
+                hlcvs,
+                mss,
+                btc_usd_prices,
+                results_path,
+                args.monte_carlo,
+                args.monte_carlo_sizes,
+                args.monte_carlo_seed,
+            )
+            return
         fills, equities, equities_btc, analysis = run_backtest(
             hlcvs, mss, config, exchange, btc_usd_prices
         )
@@ -549,6 +1125,46 @@ async def main():
             coins, hlcvs, mss, results_path, cache_dir, btc_usd_prices = await tasks[exchange]
             configs[exchange]["backtest"]["coins"][exchange] = coins
             configs[exchange]["backtest"]["cache_dir"][exchange] = str(cache_dir)
+            if args.fidelity_report:
+                write_fidelity_report(
+                    configs[exchange],
+                    exchange,
+                    hlcvs,
+                    mss,
+                    btc_usd_prices,
+                    cache_dir,
+                    results_path,
+                    args.fidelity_report,
+                )
+                continue
+            hlcvs, btc_usd_prices = load_or_aggregate_hlcvs(
+                configs[exchange], cache_dir, hlcvs, btc_usd_prices
+            )
+            if args.walk_forward:
+                write_walk_forward_report(
+                    configs[exchange],
+                    exchange,
+                    hlcvs,
+                    mss,
+                    btc_usd_prices,
+                    results_path,
+                    args.walk_forward,
+                    args.walk_forward_mode,
+                )
+                continue
+            if args.monte_carlo:
+                write_monte_carlo_report(
+                    configs[exchange],
+                    exchange,
+                    hlcvs,
+                    mss,
+                    btc_usd_prices,
+                    results_path,
+                    args.monte_carlo,
+                    args.monte_carlo_sizes,
+                    args.monte_carlo_seed,
+                )
+                continue
             fills, equities, equities_btc, analysis = run_backtest(
                 hlcvs, mss, configs[exchange], exchange, btc_usd_prices
             )
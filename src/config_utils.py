@@ -827,7 +827,11 @@ def get_template_live_config(passivbot_mode="v7"):
             "compress_cache": True,
             "end_date": "now",
             "exchanges": ["binance", "bybit", "gateio", "bitget"],
+            "fast_forward_max_minutes": 0,
+            "fidelity_minutes": 1,
             "gap_tolerance_ohlcvs_minutes": 120.0,
+            "hlcvs_dtype": "float64",
+            "resume_from_checkpoint": False,
             "start_date": "2021-04-01",
             "starting_balance": 100000.0,
             "use_btc_collateral": False,
@@ -919,6 +923,7 @@ def get_template_live_config(passivbot_mode="v7"):
             "user": "bybit_01",
         },
         "optimize": {
+            "abort_on_limit_breach": False,
             "bounds": {
                 "long_close_grid_markup_end": [0.001, 0.03],
                 "long_close_grid_markup_start": [0.001, 0.03],
@@ -978,6 +983,8 @@ def get_template_live_config(passivbot_mode="v7"):
             "compress_results_file": True,
             "crossover_probability": 0.7,
             "enable_overrides": [],
+            "eval_cache_max_mb": 0.0,
+            "hlcvs_layout": "time_major",
             "iters": 30000,
             "limits": "--drawdown_worst 0.333 --loss_profit_ratio: 0.9 --position_unchanged_hours_max 300.0",
             "mutation_probability": 0.45,
@@ -985,6 +992,11 @@ def get_template_live_config(passivbot_mode="v7"):
             "population_size": 1000,
             "round_to_n_significant_digits": 5,
             "scoring": ["adg", "sharpe_ratio"],
+            "steady_state": False,
+            "successive_halving_eta": 3,
+            "successive_halving_rungs": [],
+            "surrogate_keep_fraction": 1.0,
+            "use_threads": False,
             "write_all_results": True,
         },
     }
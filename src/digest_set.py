@@ -0,0 +1,101 @@
+from __future__ import annotations
+import hashlib
+import logging
+import tempfile
+import numpy as np
+
+
+def calc_digest(individual) -> int:
+    # 64-bit digest of the raw float values; adding 0.0 folds -0.0 into 0.0. 0 marks an empty slot
+    values = np.asarray(individual, dtype=np.float64) + 0.0
+    digest = int.from_bytes(hashlib.blake2b(values.tobytes(), digest_size=8).digest(), "little")
+    return digest or 1
+
+
+class SharedDigestSet:
+    """
+    Fixed-size open-addressing hash set of 64-bit digests in a memory-mapped file, shared by all
+    optimizer workers without a manager process or locks. Each digest slot has a row of
+    n_objectives scores next to it, NaN until set_score() fills it in.
+
+    Every write is an aligned 8-byte store. Two workers racing for the same empty slot may
+    lose one entry, which costs a missed duplicate, never a false one. A row is read as a
+    score only once none of its values is NaN, so a half-written row reads as not yet scored.
+    Inserts beyond MAX_PROBES collisions are dropped; add() then returns False.
+    """
+
+    MAX_PROBES = 64
+
+    def __init__(self, filepath, n_slots, n_objectives):
+        self.filepath = filepath
+        self.n_slots = n_slots
+        self.n_objectives = n_objectives
+        self.table = np.memmap(filepath, dtype=np.uint64, mode="r+", shape=(n_slots,))
+        self.scores = np.memmap(
+            filepath,
+            dtype=np.float64,
+            mode="r+",
+            offset=n_slots * 8,
+            shape=(n_slots, n_objectives),
+        )
+
+    @classmethod
+    def create(cls, capacity, n_objectives):
+        # power-of-two table kept at most half full at capacity
+        n_slots = 1 << max(10, (2 * int(capacity) - 1).bit_length())
+        temp_file = tempfile.NamedTemporaryFile(delete=False)
+        temp_file.truncate(n_slots * 8 * (1 + n_objectives))
+        temp_file.close()
+        digest_set = cls(temp_file.name, n_slots, n_objectives)
+        digest_set.scores[:] = np.nan
+        digest_set.scores.flush()
+        logging.info(f"Created shared digest set: {temp_file.name} ({n_slots} slots)")
+        return digest_set
+
+    def _slots(self, digest):
+        mask = self.n_slots - 1
+        for i in range(self.MAX_PROBES):
+            yield (digest + i) & mask
+
+    def _find(self, digest):
+        for slot in self._slots(digest):
+            val = int(self.table[slot])
+            if val == digest:
+                return slot
+            if val == 0:
+                return None
+        return None
+
+    def __contains__(self, digest):
+        return self._find(digest) is not None
+
+    def add(self, digest) -> bool:
+        for slot in self._slots(digest):
+            val = int(self.table[slot])
+            if val == digest:
+                return True
+            if val == 0:
+                self.table[slot] = digest
+                return True
+        # probe chain exhausted: the digest stays known only to this worker
+        return False
+
+    def set_score(self, digest, objectives):
+        if self.add(digest) and (slot := self._find(digest)) is not None:
+            self.scores[slot] = objectives
+
+    def get_score(self, digest):
+        slot = self._find(digest)
+        if slot is None:
+            return None
+        row = np.array(self.scores[slot])
+        return None if np.isnan(row).any() else tuple(row.tolist())
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["table"]
+        del state["scores"]
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state["filepath"], state["n_slots"], state["n_objectives"])
@@ -1118,6 +1118,19 @@ class OHLCVManager:
             logging.error(f"Error with {get_function_name()} {e}")
 
 
+HLCVS_DTYPES = {"float64": np.float64, "float32": np.float32}
+
+
+def get_hlcvs_dtype(config: dict) -> np.dtype:
+    """Element type of the unified HLCV array, from config.backtest.hlcvs_dtype."""
+    name = config["backtest"].get("hlcvs_dtype", "float64")
+    if name not in HLCVS_DTYPES:
+        raise ValueError(
+            f"unsupported backtest.hlcvs_dtype {name}, expected one of {sorted(HLCVS_DTYPES)}"
+        )
+    return np.dtype(HLCVS_DTYPES[name])
+
+
 async def prepare_hlcvs(config: dict, exchange: str):
     coins = sorted(
         set([symbol_to_coin(c) for c in config["live"]["approved_coins"]["long"]])
@@ -1252,7 +1265,7 @@ async def prepare_hlcvs_internal(config, coins, exchange, start_date, end_date,
     timestamps = np.arange(global_start_time, global_end_time + interval_ms, interval_ms)
 
     # Pre-allocate the unified array
-    unified_array = np.full((n_timesteps, n_coins, 4), -1.0, dtype=np.float64)
+    unified_array = np.full((n_timesteps, n_coins, 4), -1.0, dtype=get_hlcvs_dtype(config))
 
     # Second pass: Load data from disk and populate the unified array
     logging.info(
@@ -1491,7 +1504,7 @@ async def _prepare_hlcvs_combined_impl(config, om_dict):
     pprint.pprint(dict(exchange_volume_ratios_mapped))
 
     # We'll store [high, low, close, volume] in the last dimension
-    unified_array = np.full((n_timesteps, n_coins, 4), -1.0, dtype=np.float64)
+    unified_array = np.full((n_timesteps, n_coins, 4), -1.0, dtype=get_hlcvs_dtype(config))
 
     # For each coin i, reindex its DataFrame onto the full timestamps
     for i, coin in enumerate(valid_coins):
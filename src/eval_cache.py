@@ -0,0 +1,137 @@
+from __future__ import annotations
+import os
+import json
+import hashlib
+import zlib
+import sqlite3
+import threading
+import time
+import logging
+
+
+class EvalCache:
+    """
+    On-disk cache of optimizer backtest analyses shared across runs and workers.
+
+    Entries are keyed by make_key() over everything that determines a backtest's outcome: the
+    dataset fingerprint, the bot, exchange and backtest params passed to the backtester, and
+    version, which identifies the backtester build. ANALYSIS_SCHEMA_VERSION covers the Python
+    side and must be bumped whenever expand_analysis or the analysis keys change.
+    Objectives are not stored; they are recomputed from the cached analyses so that changing
+    scoring or limits does not invalidate the cache.
+
+    Storage is a single sqlite database in WAL mode, so any number of worker processes can read
+    and write it concurrently. When the live data grows past max_mb, the least recently used
+    entries are deleted. Cache errors are logged and otherwise ignored.
+    """
+
+    EVICT_CHECK_INTERVAL = 256  # puts per connection between size checks
+    ANALYSIS_SCHEMA_VERSION = 1
+
+    def __init__(self, path: str, max_mb: float, version: str):
+        self.path = path
+        self.version = version
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._failed = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS evals "
+                "(key TEXT PRIMARY KEY, analysis BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS evals_last_used ON evals (last_used)")
+        finally:
+            conn.close()
+
+    def make_key(
+        self, dataset_fingerprint, bot_params_list, exchange_params, backtest_params
+    ) -> str:
+        to_hash = {
+            "version": [self.version, self.ANALYSIS_SCHEMA_VERSION],
+            "dataset": dataset_fingerprint,
+            "bot_params_list": bot_params_list,
+            "exchange_params": exchange_params,
+            "backtest_params": backtest_params,
+        }
+        # same encoding as pure_funcs.calc_hash, which would pull in passivbot_rust
+        return hashlib.sha256(json.dumps(to_hash, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self):
+        # one connection per thread and process; connections must not cross a fork
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+            self._local.n_puts = 0
+        return self._local.conn
+
+    def _log_failure(self, action, e):
+        if not self._failed:
+            logging.warning(f"evaluation cache {action} failed ({self.path}): {e}")
+            self._failed = True
+
+    def get(self, key: str) -> dict | None:
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT analysis FROM evals WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE evals SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            self._log_failure("read", e)
+            return None
+
+    def put(self, key: str, analysis: dict):
+        try:
+            conn = self._conn()
+            blob = zlib.compress(json.dumps(analysis).encode())
+            conn.execute(
+                "INSERT OR REPLACE INTO evals (key, analysis, last_used) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+            self._local.n_puts += 1
+            if self._local.n_puts % self.EVICT_CHECK_INTERVAL == 1:
+                self.evict()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._log_failure("write", e)
+
+    def size_bytes(self) -> int:
+        conn = self._conn()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the live data is back to about 90% of max_mb.
+        Freed pages are reused by later inserts, so the file itself stops growing.
+        """
+        used = self.size_bytes()
+        if used <= self.max_bytes:
+            return
+        conn = self._conn()
+        n_entries = conn.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+        n_delete = max(1, int(n_entries * (1.0 - 0.9 * self.max_bytes / used)))
+        conn.execute(
+            "DELETE FROM evals WHERE key IN (SELECT key FROM evals ORDER BY last_used LIMIT ?)",
+            (n_delete,),
+        )
+        logging.info(f"evaluation cache over {self.max_bytes / 1024**2:.0f} MB: evicted {n_delete}")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
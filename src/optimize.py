@@ -25,15 +25,21 @@ import shutil
 import passivbot_rust as pbr
 import asyncio
 import argparse
+import itertools
 import multiprocessing
+import threading
 import mmap
 from multiprocessing import Queue, Process
-from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+from queue import SimpleQueue
+from collections import defaultdict, deque
 from contextlib import nullcontext
 from backtest import (
     prepare_hlcvs_mss,
+    load_or_aggregate_hlcvs,
     prep_backtest_args,
     expand_analysis,
+    get_dataset_fingerprint,
 )
 from config_utils import (
     get_template_live_config,
@@ -64,10 +70,14 @@ import tempfile
 import time
 import math
 import fcntl
+import hashlib
 from tqdm import tqdm
 from optimizer_overrides import optimizer_overrides
-from opt_utils import make_json_serializable, generate_incremental_diff, round_floats
+from opt_utils import make_json_serializable, generate_incremental_diff, round_floats, dominates
 from pareto_store import ParetoStore
+from eval_cache import EvalCache
+from surrogate import KnnSurrogate
+from digest_set import SharedDigestSet, calc_digest
 import msgpack
 from typing import Sequence, Tuple, List
 
@@ -79,6 +89,7 @@ logging.basicConfig(
 
 
 TEMPLATE_CONFIG_MODE = "v7"
+EVAL_CACHE_PATH = os.path.join("caches", "optimize_eval_cache.sqlite")
 
 # === bounds helpers =========================================================
 
@@ -236,6 +247,25 @@ def results_writer_process(
             traceback.print_exc()
 
 
+def get_engine_version():
+    # hash of the compiled passivbot_rust extension: any rebuild invalidates cached analyses
+    path = pbr.__file__
+    if os.path.basename(path).startswith("__init__."):
+        package_dir = os.path.dirname(path)
+        paths = sorted(
+            os.path.join(package_dir, fname)
+            for fname in os.listdir(package_dir)
+            if fname.endswith((".so", ".pyd", ".dylib"))
+        )
+    else:
+        paths = [path]
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
 def create_shared_memory_file(hlcvs):
     temp_file = tempfile.NamedTemporaryFile(delete=False)
     logging.info(f"Creating shared memory file: {temp_file.name}...")
@@ -263,6 +293,19 @@ def create_shared_memory_file(hlcvs):
     return shared_memory_file
 
 
+def hlcvs_in_layout(hlcvs, layout):
+    """
+    Returns hlcvs (n_timesteps, n_coins, 4) in the memory order given by
+    config.optimize.hlcvs_layout, ready to be written to a shared memory file.
+    "coin_major" stores it transposed to (n_coins, 4, n_timesteps).
+    """
+    if layout == "time_major":
+        return hlcvs
+    if layout == "coin_major":
+        return np.ascontiguousarray(hlcvs.transpose(1, 2, 0))
+    raise ValueError(f"unknown hlcvs_layout {layout}, expected time_major or coin_major")
+
+
 def check_disk_space(path, required_space):
     total, used, free = shutil.disk_usage(path)
     logging.info(
@@ -387,11 +430,19 @@ def config_to_individual(config, bounds, sig_digits=None):
 
 
 @contextmanager
-def managed_mmap(filename, dtype, shape):
+def managed_mmap(filename, dtype, shape, layout="time_major"):
+    # shape is always (n_timesteps, n_coins, 4); a coin_major file is mapped transposed
     mmap = None
     try:
-        mmap = np.memmap(filename, dtype=dtype, mode="r", shape=shape)
-        yield mmap
+        if layout == "coin_major":
+            n_timesteps, n_coins, n_fields = shape
+            mmap = np.memmap(
+                filename, dtype=dtype, mode="r", shape=(n_coins, n_fields, n_timesteps)
+            )
+            yield mmap.transpose(2, 0, 1)
+        else:
+            mmap = np.memmap(filename, dtype=dtype, mode="r", shape=shape)
+            yield mmap
     except FileNotFoundError:
         if shutdown_event.is_set():
             yield None
@@ -420,8 +471,9 @@ class Evaluator:
         msss,
         config,
         results_queue,
-        seen_hashes=None,
-        duplicate_counter=None,
+        seen_digests=None,
+        eval_cache=None,
+        dataset_fingerprints=None,
     ):
         logging.info("Initializing Evaluator...")
         self.shared_memory_files = shared_memory_files
@@ -430,20 +482,24 @@ class Evaluator:
         self.btc_usd_shared_memory_files = btc_usd_shared_memory_files
         self.btc_usd_dtypes = btc_usd_dtypes
         self.msss = msss
+        self.hlcvs_layout = config["optimize"].get("hlcvs_layout", "time_major")
         self.exchanges = list(shared_memory_files.keys())
 
         self.mmap_contexts = {}
         self.shared_hlcvs_np = {}
         self.exchange_params = {}
         self.backtest_params = {}
+        self.datasets = {}
         for exchange in self.exchanges:
             logging.info(f"Setting up managed_mmap for {exchange}...")
             self.mmap_contexts[exchange] = managed_mmap(
                 self.shared_memory_files[exchange],
                 self.hlcvs_dtypes[exchange],
                 self.hlcvs_shapes[exchange],
+                self.hlcvs_layout,
             )
             self.shared_hlcvs_np[exchange] = self.mmap_contexts[exchange].__enter__()
+            self.datasets[exchange] = self.open_dataset(exchange)
             _, self.exchange_params[exchange], self.backtest_params[exchange] = prep_backtest_args(
                 config, self.msss[exchange], exchange
             )
@@ -452,8 +508,18 @@ class Evaluator:
         self.config = config
         logging.info("Evaluator initialization complete.")
         self.results_queue = results_queue
-        self.seen_hashes = seen_hashes if seen_hashes is not None else {}
-        self.duplicate_counter = duplicate_counter
+        # digest -> objectives of this worker's evaluations (None while in progress);
+        # seen_digests shares digests and scores across workers
+        self.local_scores = {}
+        self.seen_digests = seen_digests
+        self.n_duplicates = 0
+        # threads of a ThreadPool share this evaluator: duplicate resolution runs under the
+        # lock, and perturbations draw from the evaluator's own generator
+        self.dedup_lock = threading.Lock()
+        self.rng = np.random.default_rng()
+        self.eval_cache = eval_cache
+        self.dataset_fingerprints = dataset_fingerprints
+        self.rungs = get_successive_halving_rungs(config)
         self.bounds = extract_bounds_tuple_list_from_config(self.config)
         self.sig_digits = config.get("optimize", {}).get("round_to_n_significant_digits", 6)
         self.scoring_weights = {
@@ -547,11 +613,23 @@ class Evaluator:
         }
 
         self.build_limit_checks()
+        self.apply_abort_thresholds()
+
+    def open_dataset(self, exchange):
+        # maps the shared memory files and builds the per-coin indexes once per worker
+        return pbr.HlcvDataset(
+            self.shared_memory_files[exchange],
+            self.hlcvs_shapes[exchange],
+            self.hlcvs_dtypes[exchange].str,
+            self.btc_usd_shared_memory_files[exchange],
+            self.btc_usd_dtypes[exchange].str,
+            self.hlcvs_layout,
+        )
 
     def perturb_step_digits(self, individual, change_chance=0.5):
         perturbed = []
         for i, val in enumerate(individual):
-            if np.random.random() < change_chance:  # x% chance of leaving unchanged
+            if self.rng.random() < change_chance:  # x% chance of leaving unchanged
                 perturbed.append(val)
                 continue
             low, high = self.bounds[i]
@@ -565,7 +643,7 @@ class Evaluator:
             else:
                 step = (high - low) * 10 ** -(self.sig_digits - 1)
 
-            direction = np.random.choice([-1.0, 1.0])
+            direction = self.rng.choice([-1.0, 1.0])
             perturbed.append(pbr.round_dynamic(val + step * direction, self.sig_digits))
 
         return perturbed
@@ -578,7 +656,7 @@ class Evaluator:
                 perturbed.append(val)
                 continue
             new_val = pbr.round_dynamic(
-                val * (1 + np.random.uniform(-magnitude, magnitude)), self.sig_digits
+                val * (1 + self.rng.uniform(-magnitude, magnitude)), self.sig_digits
             )
             perturbed.append(new_val)
         return perturbed
@@ -586,23 +664,23 @@ class Evaluator:
     def perturb_random_subset(self, individual, frac=0.2):
         perturbed = individual.copy()
         n = len(individual)
-        indices = np.random.choice(n, max(1, int(frac * n)), replace=False)
+        indices = self.rng.choice(n, max(1, int(frac * n)), replace=False)
         for i in indices:
             low, high = self.bounds[i]
             if low != high:
                 delta = (high - low) * 0.01
-                step = delta * np.random.uniform(-1.0, 1.0)
+                step = delta * self.rng.uniform(-1.0, 1.0)
                 perturbed[i] = individual[i] + step
         return perturbed
 
     def perturb_sample_some(self, individual, frac=0.2):
         perturbed = individual.copy()
         n = len(individual)
-        indices = np.random.choice(n, max(1, int(frac * n)), replace=False)
+        indices = self.rng.choice(n, max(1, int(frac * n)), replace=False)
         for i in indices:
             low, high = self.bounds[i]
             if low != high:
-                perturbed[i] = np.random.uniform(low, high)
+                perturbed[i] = self.rng.uniform(low, high)
         return perturbed
 
     def perturb_gaussian(self, individual, scale=0.01):
@@ -612,7 +690,7 @@ class Evaluator:
             if high == low:
                 perturbed.append(val)
                 continue
-            noise = np.random.normal(0, scale * (high - low))
+            noise = self.rng.normal(0, scale * (high - low))
             perturbed.append(val + noise)
         return perturbed
 
@@ -623,47 +701,60 @@ class Evaluator:
             if low == high:
                 perturbed.append(low)
             else:
-                perturbed.append(np.random.uniform(low, high))
+                perturbed.append(self.rng.uniform(low, high))
         return perturbed
 
-    def evaluate(self, individual, overrides_list):
+    def evaluate(self, individual, overrides_list, rung=None):
+        """
+        Backtests individual on the full datasets and sends the result to the results queue.
+
+        With successive halving, rung < len(self.rungs) screens the individual instead: only the
+        most recent self.rungs[rung] fraction of each dataset is backtested and nothing is
+        reported. rung == len(self.rungs) is the full evaluation of a promoted individual.
+        Duplicates are resolved on first contact only, i.e. with rung None or 0.
+        """
         individual[:] = enforce_bounds(individual, self.bounds, self.sig_digits)
         config = individual_to_config(individual, optimizer_overrides, overrides_list, self.config)
-        individual_hash = calc_hash(individual)
-        if individual_hash in self.seen_hashes:
-            existing_score = self.seen_hashes[individual_hash]
-            self.duplicate_counter["count"] += 1
-            dup_ct = self.duplicate_counter["count"]
-            perturbation_funcs = [
-                self.perturb_x_pct,
-                self.perturb_step_digits,
-                self.perturb_gaussian,
-                self.perturb_random_subset,
-                self.perturb_sample_some,
-                self.perturb_large_uniform,
-            ]
-            for perturb_fn in perturbation_funcs:
-                perturbed = perturb_fn(individual)
-                perturbed = enforce_bounds(perturbed, self.bounds, self.sig_digits)
-                new_hash = calc_hash(perturbed)
-                if new_hash not in self.seen_hashes:
-                    logging.info(
-                        f"[DUPLICATE {dup_ct}] resolved with {perturb_fn.__name__} Hash: {new_hash}"
-                    )
-                    individual[:] = perturbed
-                    self.seen_hashes[new_hash] = None
-                    config = individual_to_config(
-                        perturbed, optimizer_overrides, overrides_list, self.config
-                    )
-                    break
-            else:
-                logging.info(f"[DUPLICATE {dup_ct}] All perturbations failed.")
-                if existing_score is not None:
-                    return existing_score
-        else:
-            self.seen_hashes[individual_hash] = None
+        digest = calc_digest(individual)
+        first_contact = rung in (None, 0)
+        if first_contact:
+            with self.dedup_lock:
+                if self.is_seen(digest):
+                    existing_score = self.get_score(digest)
+                    self.n_duplicates += 1
+                    dup_ct = self.n_duplicates
+                    perturbation_funcs = [
+                        self.perturb_x_pct,
+                        self.perturb_step_digits,
+                        self.perturb_gaussian,
+                        self.perturb_random_subset,
+                        self.perturb_sample_some,
+                        self.perturb_large_uniform,
+                    ]
+                    for perturb_fn in perturbation_funcs:
+                        perturbed = perturb_fn(individual)
+                        perturbed = enforce_bounds(perturbed, self.bounds, self.sig_digits)
+                        new_digest = calc_digest(perturbed)
+                        if not self.is_seen(new_digest):
+                            logging.info(
+                                f"[DUPLICATE {dup_ct}] resolved with {perturb_fn.__name__} Digest: {new_digest:016x}"
+                            )
+                            individual[:] = perturbed
+                            self.mark_seen(new_digest)
+                            config = individual_to_config(
+                                perturbed, optimizer_overrides, overrides_list, self.config
+                            )
+                            break
+                    else:
+                        logging.info(f"[DUPLICATE {dup_ct}] All perturbations failed.")
+                        if existing_score is not None:
+                            return existing_score
+                else:
+                    self.mark_seen(digest)
+        screening = rung is not None and rung < len(self.rungs)
         analyses = {}
         for exchange in self.exchanges:
+            view = self.rung_view(exchange, rung) if screening else {}
             bot_params_list, _, _ = prep_backtest_args(
                 config,
                 [],
@@ -671,19 +762,34 @@ class Evaluator:
                 exchange_params=self.exchange_params[exchange],
                 backtest_params=self.backtest_params[exchange],
             )
-            fills, equities_usd, equities_btc, analysis_usd, analysis_btc = pbr.run_backtest(
-                self.shared_memory_files[exchange],
-                self.hlcvs_shapes[exchange],
-                self.hlcvs_dtypes[exchange].str,
-                self.btc_usd_shared_memory_files[exchange],
-                self.btc_usd_dtypes[exchange].str,
+            if self.eval_cache is not None:
+                fingerprint = self.dataset_fingerprints[exchange]
+                cache_key = self.eval_cache.make_key(
+                    [fingerprint, view] if view else fingerprint,
+                    bot_params_list,
+                    self.exchange_params[exchange],
+                    self.backtest_params[exchange],
+                )
+                if (cached := self.eval_cache.get(cache_key)) is not None:
+                    analyses[exchange] = cached
+                    continue
+            fills, equities_usd, equities_btc, analysis_usd, analysis_btc = self.datasets[
+                exchange
+            ].run_backtest(
                 bot_params_list,
                 self.exchange_params[exchange],
                 self.backtest_params[exchange],
+                fills_format="none",
+                equity_sample_minutes=0,
+                **view,
             )
             analyses[exchange] = expand_analysis(analysis_usd, analysis_btc, fills, config)
+            if self.eval_cache is not None:
+                self.eval_cache.put(cache_key, analyses[exchange])
         analyses_combined = self.combine_analyses(analyses)
         objectives = self.calc_fitness(analyses_combined)
+        if screening:
+            return tuple(objectives)
         for i, val in enumerate(objectives):
             analyses_combined[f"w_{i}"] = val
         data = {
@@ -692,10 +798,32 @@ class Evaluator:
             "analyses": analyses,
         }
         self.results_queue.put(data)
-        actual_hash = calc_hash(individual)
-        self.seen_hashes[actual_hash] = tuple(objectives)
+        digest = calc_digest(individual)
+        with self.dedup_lock:
+            self.local_scores[digest] = tuple(objectives)
+        if self.seen_digests is not None:
+            self.seen_digests.set_score(digest, objectives)
         return tuple(objectives)
 
+    def rung_view(self, exchange, rung):
+        n_timesteps = self.hlcvs_shapes[exchange][0]
+        return {"start_idx": n_timesteps - max(2, int(round(n_timesteps * self.rungs[rung])))}
+
+    def is_seen(self, digest):
+        if digest in self.local_scores:
+            return True
+        return self.seen_digests is not None and digest in self.seen_digests
+
+    def get_score(self, digest):
+        if (score := self.local_scores.get(digest)) is not None:
+            return score
+        return self.seen_digests.get_score(digest) if self.seen_digests is not None else None
+
+    def mark_seen(self, digest):
+        self.local_scores.setdefault(digest, None)
+        if self.seen_digests is not None:
+            self.seen_digests.add(digest)
+
     def combine_analyses(self, analyses):
         analyses_combined = {}
         keys = analyses[next(iter(analyses))].keys()
@@ -752,8 +880,28 @@ class Evaluator:
                 }
             )
 
+    def apply_abort_thresholds(self):
+        # let the Rust backtester stop early once a run is certain to breach an upper limit
+        if not self.config["optimize"].get("abort_on_limit_breach", False):
+            return
+        abortable = {
+            "drawdown_worst_max": "abort_drawdown_worst",
+            "equity_balance_diff_neg_max_max": "abort_equity_balance_diff_neg_max",
+            "btc_drawdown_worst_max": "abort_btc_drawdown_worst",
+            "btc_equity_balance_diff_neg_max_max": "abort_btc_equity_balance_diff_neg_max",
+        }
+        for check in self.limit_checks:
+            key = abortable.get(check["metric_key"])
+            if key is None or check["penalize_if"] != "greater" or check["bound"] <= 0.0:
+                continue
+            for exchange in self.exchanges:
+                self.backtest_params[exchange][key] = float(check["bound"])
+
     def calc_fitness(self, analyses_combined):
         modifier = 0.0
+        completion_ratio = analyses_combined.get("backtest_completion_ratio_min", 1.0)
+        if completion_ratio < 1.0:
+            modifier += (1.0 - completion_ratio) * 1e6
         for check in self.limit_checks:
             val = analyses_combined.get(check["metric_key"])
             if val is None:
@@ -785,17 +933,25 @@ class Evaluator:
         state = self.__dict__.copy()
         del state["mmap_contexts"]
         del state["shared_hlcvs_np"]
+        del state["datasets"]
+        del state["dedup_lock"]
+        del state["rng"]
         return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
         self.mmap_contexts = {}
         self.shared_hlcvs_np = {}
+        self.datasets = {}
+        self.dedup_lock = threading.Lock()
+        self.rng = np.random.default_rng()
         for exchange in self.exchanges:
+            self.datasets[exchange] = self.open_dataset(exchange)
             self.mmap_contexts[exchange] = managed_mmap(
                 self.shared_memory_files[exchange],
                 self.hlcvs_dtypes[exchange],
                 self.hlcvs_shapes[exchange],
+                self.hlcvs_layout,
             )
             self.shared_hlcvs_np[exchange] = self.mmap_contexts[exchange].__enter__()
             if self.shared_hlcvs_np[exchange] is None:
@@ -870,6 +1026,295 @@ def configs_to_individuals(cfgs, bounds, sig_digits=0):
     return list(inds.values())
 
 
+# === pool evaluation and steady-state evolution =============================
+
+_worker_evaluate = None
+
+
+def init_worker_evaluate(evaluate):
+    # pool initializer: the evaluator is unpickled once per worker, not once per task
+    global _worker_evaluate
+    _worker_evaluate = evaluate
+
+
+def evaluate_in_worker(values, rung=None):
+    # evaluate() may replace duplicate values with a perturbed copy; send back what was scored
+    fitness = _worker_evaluate(values, rung=rung)
+    return values, fitness
+
+
+def map_in_workers(pool, evaluate, individuals):
+    """
+    toolbox.map for generational runs: evaluates individuals on a pool initialized with
+    init_worker_evaluate and copies the scored values back into them. evaluate is ignored.
+    """
+    individuals = list(individuals)
+    results = pool.map(evaluate_in_worker, [list(ind) for ind in individuals])
+    for individual, (values, _) in zip(individuals, results):
+        individual[:] = values
+    return [fitness for _, fitness in results]
+
+
+def ea_steady_state(
+    population,
+    toolbox,
+    pool,
+    mu,
+    cxpb,
+    mutpb,
+    n_evals,
+    n_in_flight,
+    stats=None,
+    halloffame=None,
+    rungs=(),
+    eta=3,
+    surrogate=None,
+    keep_fraction=1.0,
+):
+    """
+    Asynchronous steady-state counterpart of algorithms.eaMuPlusLambda.
+
+    Keeps n_in_flight evaluations queued on a pool initialized with init_worker_evaluate. Each
+    finished individual joins the population and its freed slot is refilled right away with an
+    offspring bred by algorithms.varOr from the population as it stands, so workers never wait
+    for the slowest backtest of a generation. Once the population exceeds mu by n_in_flight it
+    is trimmed back to mu with toolbox.select, which amortizes the non-dominated sort over many
+    evaluations. Stats are recorded every mu evaluations.
+
+    With successive halving rungs, offspring are screened asynchronously (ASHA): a screening
+    result is promoted to the next rung right away if it ranks in the top 1/eta of the last mu
+    results at its rung (see asha_promotes), and is discarded otherwise. n_evals is counted in
+    full-backtest equivalents, a screening backtest costing its rung's fraction.
+
+    With a surrogate, each submitted offspring is the one picked by surrogate_pick from
+    1/keep_fraction candidates; full results train the surrogate.
+    """
+    if cxpb + mutpb <= 0.0:
+        raise ValueError(
+            "steady-state evolution needs crossover_probability + mutation_probability > 0"
+        )
+    logbook = tools.Logbook()
+    logbook.header = ["gen", "evals"] + (stats.fields if stats else [])
+
+    evaluated = [ind for ind in population if ind.fitness.valid]
+    pending = [ind for ind in population if not ind.fitness.valid]
+    first_rung = 0 if rungs else None
+    rung_results = [deque(maxlen=mu) for _ in rungs]
+    done = SimpleQueue()
+    in_flight = {}
+    task_ids = itertools.count()
+    spent = 0.0
+    n_since_record = 0
+
+    def breed_one():
+        while True:
+            # varOr may return a plain clone of a parent; only bred offspring need evaluating
+            (offspring,) = algorithms.varOr(evaluated, toolbox, 1, cxpb, mutpb)
+            if not offspring.fitness.valid:
+                return offspring
+
+    def breed():
+        if pending:
+            return pending.pop()
+        if len(evaluated) < 2:
+            return None
+        if surrogate is None or not surrogate.is_ready():
+            return breed_one()
+        candidates = [breed_one() for _ in range(math.ceil(1.0 / keep_fraction))]
+        (kept,), _ = surrogate_pick(candidates, surrogate, toolbox.select, 1)
+        return kept
+
+    def submit(individual, rung):
+        nonlocal spent
+        spent += rungs[rung] if rung is not None and rung < len(rungs) else 1.0
+        task_id = next(task_ids)
+        in_flight[task_id] = (individual, rung)
+        pool.apply_async(
+            evaluate_in_worker,
+            (list(individual), rung),
+            callback=lambda result: done.put((task_id, result, None)),
+            error_callback=lambda error: done.put((task_id, None, error)),
+        )
+
+    def record():
+        if len(evaluated) > mu:
+            evaluated[:] = toolbox.select(evaluated, mu)
+        compiled = stats.compile(evaluated) if stats else {}
+        logbook.record(gen=len(logbook), evals=n_since_record, **compiled)
+
+    while True:
+        while len(in_flight) < n_in_flight and (pending or spent < n_evals):
+            individual = breed()
+            if individual is None:
+                break
+            submit(individual, first_rung)
+        if not in_flight:
+            break
+        task_id, result, error = done.get()
+        individual, rung = in_flight.pop(task_id)
+        if error is not None:
+            raise error
+        values, fitness = result
+        individual[:] = values
+        if rung is not None and rung < len(rungs):
+            if asha_promotes(rung_results[rung], fitness, eta):
+                submit(individual, rung + 1)
+            rung_results[rung].append(fitness)
+            continue
+        individual.fitness.values = fitness
+        evaluated.append(individual)
+        if surrogate is not None:
+            train_surrogate(surrogate, individual, fitness)
+        n_since_record += 1
+        if halloffame is not None:
+            halloffame.update([individual])
+        if len(evaluated) >= mu + n_in_flight:
+            evaluated[:] = toolbox.select(evaluated, mu)
+        if n_since_record >= mu:
+            record()
+            n_since_record = 0
+    if n_since_record or not len(logbook):
+        record()
+    return evaluated, logbook
+
+
+# === successive halving =====================================================
+
+SCREENED_OUT_PENALTY = 1e6
+
+
+def get_successive_halving_rungs(config):
+    """
+    Returns optimize.successive_halving_rungs: ascending fractions of the most recent data on
+    which offspring are screened before a full backtest. Empty disables successive halving.
+    """
+    rungs = [float(x) for x in config["optimize"].get("successive_halving_rungs", [])]
+    if any(not 0.0 < x < 1.0 for x in rungs) or rungs != sorted(set(rungs)):
+        raise ValueError(
+            f"optimize.successive_halving_rungs must be ascending fractions in (0, 1): {rungs}"
+        )
+    return rungs
+
+
+def successive_halving_cost(rungs, eta):
+    # full-backtest equivalents spent per individual entering the first rung
+    return sum(x / eta**i for i, x in enumerate(rungs)) + 1.0 / eta ** len(rungs)
+
+
+def asha_promotes(rung_results, fitness, eta):
+    # in the top 1/eta if fewer than that share of the other results at this rung dominate it
+    n_dominating = sum(dominates(other, fitness) for other in rung_results)
+    return n_dominating < (len(rung_results) + 1) / eta
+
+
+def successive_halving_map(pool, select, rungs, eta, evaluate, individuals):
+    """
+    toolbox.map replacement for generational runs with successive halving.
+
+    All individuals are screened on rungs[0]; the top 1/eta by select (NSGA-II) move on to the
+    next rung, and so on until the survivors of the last rung get a full backtest. Individuals
+    dropped at rung i get their screening objectives plus SCREENED_OUT_PENALTY times the number
+    of rungs they missed, so they rank below every fully evaluated individual and below those
+    dropped later. evaluate is ignored: workers call the evaluator installed by
+    init_worker_evaluate.
+    """
+    individuals = list(individuals)
+    fitnesses = {}
+    candidates = individuals
+    for rung in range(len(rungs) + 1):
+        results = pool.starmap(evaluate_in_worker, [(list(ind), rung) for ind in candidates])
+        for individual, (values, fitness) in zip(candidates, results):
+            individual[:] = values
+            fitnesses[id(individual)] = fitness
+        if rung == len(rungs):
+            break
+        for individual in candidates:
+            individual.fitness.values = fitnesses[id(individual)]
+        promoted = {id(ind) for ind in select(candidates, max(1, math.ceil(len(candidates) / eta)))}
+        for individual in candidates:
+            del individual.fitness.values
+            if id(individual) not in promoted:
+                penalty = SCREENED_OUT_PENALTY * (len(rungs) - rung)
+                fitnesses[id(individual)] = tuple(x + penalty for x in fitnesses[id(individual)])
+        candidates = [ind for ind in candidates if id(ind) in promoted]
+    return [fitnesses[id(ind)] for ind in individuals]
+
+
+# === surrogate pre-screening ================================================
+
+SURROGATE_EXPLORE_SHARE = 0.25  # share of kept offspring picked for novelty, not prediction
+SURROGATE_SKIPPED_PENALTY = 1e12  # far beyond limit, abort and successive-halving penalties
+
+
+def surrogate_pick(individuals, surrogate, select, n_keep):
+    """
+    Picks n_keep of individuals for backtesting with a trained KnnSurrogate: most by select
+    (NSGA-II) on the predicted objectives, SURROGATE_EXPLORE_SHARE of them as the ones farthest
+    from anything evaluated so far. Returns (kept, predicted objectives of all individuals).
+    """
+    predicted, novelty = surrogate.predict(individuals)
+    # stochastic rounding, so that single picks explore SURROGATE_EXPLORE_SHARE of the time
+    n_explore = int(n_keep * SURROGATE_EXPLORE_SHARE + np.random.random())
+    for individual, objectives in zip(individuals, predicted):
+        individual.fitness.values = tuple(objectives)
+    kept = {id(ind) for ind in select(individuals, n_keep - n_explore)}
+    for individual in individuals:
+        del individual.fitness.values
+    for i in np.argsort(-novelty):
+        if len(kept) >= n_keep:
+            break
+        kept.add(id(individuals[i]))
+    return [ind for ind in individuals if id(ind) in kept], predicted
+
+
+def train_surrogate(surrogate, individual, fitness):
+    # screened-out and aborted results are offset by SCREENED_OUT_PENALTY-sized penalties; they
+    # would swamp the neighbour means
+    if fitness is not None and max(fitness) < SCREENED_OUT_PENALTY:
+        surrogate.add(individual, fitness)
+
+
+def surrogate_map(map_fn, surrogate, select, keep_fraction, evaluate, individuals):
+    """
+    toolbox.map wrapper that backtests only keep_fraction of individuals, chosen by
+    surrogate_pick once the surrogate has enough training data, via map_fn (map_in_workers or
+    successive_halving_map). The rest are flagged surrogate_skipped and get their predicted
+    objectives plus SURROGATE_SKIPPED_PENALTY, ranking them below anything backtested,
+    penalized or not; EvaluatedParetoFront leaves them out. Backtested results train the
+    surrogate.
+    """
+    individuals = list(individuals)
+    if not surrogate.is_ready():
+        kept, predicted = individuals, None
+    else:
+        n_keep = max(1, math.ceil(len(individuals) * keep_fraction))
+        kept, predicted = surrogate_pick(individuals, surrogate, select, n_keep)
+    fitnesses = {}
+    for individual, fitness in zip(kept, map_fn(evaluate, kept)):
+        fitnesses[id(individual)] = fitness
+        train_surrogate(surrogate, individual, fitness)
+    results = []
+    for i, individual in enumerate(individuals):
+        individual.surrogate_skipped = id(individual) not in fitnesses
+        if individual.surrogate_skipped:
+            results.append(tuple(x + SURROGATE_SKIPPED_PENALTY for x in predicted[i]))
+        else:
+            results.append(fitnesses[id(individual)])
+    return results
+
+
+class EvaluatedParetoFront(tools.ParetoFront):
+    """
+    Hall of fame over backtested individuals only: offspring flagged surrogate_skipped by
+    surrogate_map carry a predicted fitness and are ignored.
+    """
+
+    def update(self, population):
+        super().update(
+            [ind for ind in population if not getattr(ind, "surrogate_skipped", False)]
+        )
+
+
 async def main():
     manage_rust_compilation()
     parser = argparse.ArgumentParser(prog="optimize", description="run optimizer")
@@ -912,6 +1357,8 @@ async def main():
         btc_usd_data_dict = {}
         btc_usd_shared_memory_files = {}
         btc_usd_dtypes = {}
+        dataset_fingerprints = {}
+        eval_cache_max_mb = config["optimize"].get("eval_cache_max_mb", 0.0)
 
         config["backtest"]["coins"] = {}
         if config["backtest"]["combine_ohlcvs"]:
@@ -919,6 +1366,9 @@ async def main():
             coins, hlcvs, mss, results_path, cache_dir, btc_usd_prices = await prepare_hlcvs_mss(
                 config, exchange
             )
+            hlcvs, btc_usd_prices = load_or_aggregate_hlcvs(
+                config, cache_dir, hlcvs, btc_usd_prices
+            )
             exchange_preference = defaultdict(list)
             for coin in coins:
                 exchange_preference[mss[coin]["exchange"]].append(coin)
@@ -933,7 +1383,9 @@ async def main():
             check_disk_space(tempfile.gettempdir(), required_space)
             logging.info(f"Starting to create shared memory file for {exchange}...")
             validate_array(hlcvs, "hlcvs")
-            shared_memory_file = create_shared_memory_file(hlcvs)
+            shared_memory_file = create_shared_memory_file(
+                hlcvs_in_layout(hlcvs, config["optimize"].get("hlcvs_layout", "time_major"))
+            )
             shared_memory_files[exchange] = shared_memory_file
             if config["backtest"].get("use_btc_collateral", False):
                 # Use the fetched array
@@ -942,6 +1394,10 @@ async def main():
                 # Fall back to all ones
                 btc_usd_data_dict[exchange] = np.ones(hlcvs.shape[0], dtype=np.float64)
             validate_array(btc_usd_data_dict[exchange], f"btc_usd_data for {exchange}")
+            if eval_cache_max_mb > 0:
+                dataset_fingerprints[exchange] = get_dataset_fingerprint(
+                    config, exchange, hlcvs, btc_usd_data_dict[exchange]
+                )
             btc_usd_shared_memory_files[exchange] = create_shared_memory_file(
                 btc_usd_data_dict[exchange]
             )
@@ -953,6 +1409,9 @@ async def main():
                 tasks[exchange] = asyncio.create_task(prepare_hlcvs_mss(config, exchange))
             for exchange in config["backtest"]["exchanges"]:
                 coins, hlcvs, mss, results_path, cache_dir, btc_usd_prices = await tasks[exchange]
+                hlcvs, btc_usd_prices = load_or_aggregate_hlcvs(
+                    config, cache_dir, hlcvs, btc_usd_prices
+                )
                 config["backtest"]["coins"][exchange] = coins
                 hlcvs_dict[exchange] = hlcvs
                 hlcvs_shapes[exchange] = hlcvs.shape
@@ -962,7 +1421,9 @@ async def main():
                 check_disk_space(tempfile.gettempdir(), required_space)
                 logging.info(f"Starting to create shared memory file for {exchange}...")
                 validate_array(hlcvs, "hlcvs")
-                shared_memory_file = create_shared_memory_file(hlcvs)
+                shared_memory_file = create_shared_memory_file(
+                    hlcvs_in_layout(hlcvs, config["optimize"].get("hlcvs_layout", "time_major"))
+                )
                 shared_memory_files[exchange] = shared_memory_file
                 # Create the BTC array for this exchange
                 if config["backtest"].get("use_btc_collateral", False):
@@ -971,6 +1432,10 @@ async def main():
                     btc_usd_data_dict[exchange] = np.ones(hlcvs.shape[0], dtype=np.float64)
 
                 validate_array(btc_usd_data_dict[exchange], f"btc_usd_data for {exchange}")
+                if eval_cache_max_mb > 0:
+                    dataset_fingerprints[exchange] = get_dataset_fingerprint(
+                        config, exchange, hlcvs, btc_usd_data_dict[exchange]
+                    )
                 btc_usd_shared_memory_files[exchange] = create_shared_memory_file(
                     btc_usd_data_dict[exchange]
                 )
@@ -1005,9 +1470,16 @@ async def main():
         # Create results queue and start manager process
         manager = multiprocessing.Manager()
         results_queue = manager.Queue()
-        seen_hashes = manager.dict()
-        duplicate_counter = manager.dict()
-        duplicate_counter["count"] = 0
+        # every individual reaching a worker marks its digest, plus one per resolved duplicate;
+        # successive halving spends less than one full backtest per individual
+        n_individuals = config["optimize"]["iters"] / successive_halving_cost(
+            get_successive_halving_rungs(config),
+            config["optimize"].get("successive_halving_eta", 3),
+        )
+        seen_digests = SharedDigestSet.create(
+            2 * (n_individuals + config["optimize"]["population_size"]),
+            len(config["optimize"]["scoring"]),
+        )
         flush_interval = 60  # or read from your config
         sig_digits = config["optimize"]["round_to_n_significant_digits"]
         writer_process = multiprocessing.Process(
@@ -1044,8 +1516,15 @@ async def main():
             msss=msss,
             config=config,
             results_queue=results_queue,
-            seen_hashes=seen_hashes,
-            duplicate_counter=duplicate_counter,
+            seen_digests=seen_digests,
+            eval_cache=(
+                EvalCache(
+                    EVAL_CACHE_PATH, max_mb=eval_cache_max_mb, version=get_engine_version()
+                )
+                if eval_cache_max_mb > 0
+                else None
+            ),
+            dataset_fingerprints=dataset_fingerprints,
         )
 
         logging.info(f"Finished initializing evaluator...")
@@ -1091,10 +1570,44 @@ async def main():
         toolbox.register("select", tools.selNSGA2)
 
         # Parallelization setup
-        logging.info(f"Initializing multiprocessing pool. N cpus: {config['optimize']['n_cpus']}")
-        pool = multiprocessing.Pool(processes=config["optimize"]["n_cpus"])
-        toolbox.register("map", pool.map)
-        logging.info(f"Finished initializing multiprocessing pool.")
+        steady_state = config["optimize"].get("steady_state", False)
+        rungs = get_successive_halving_rungs(config)
+        eta = config["optimize"].get("successive_halving_eta", 3)
+        # every mode maps evaluate_in_worker: the evaluator is unpickled once per worker
+        pool_kwargs = dict(initializer=init_worker_evaluate, initargs=(toolbox.evaluate,))
+        if config["optimize"].get("use_threads", False):
+            # backtests release the GIL; threads share the evaluator and its mmaps
+            logging.info(f"Initializing thread pool. N threads: {config['optimize']['n_cpus']}")
+            pool = ThreadPool(processes=config["optimize"]["n_cpus"], **pool_kwargs)
+        else:
+            logging.info(
+                f"Initializing multiprocessing pool. N cpus: {config['optimize']['n_cpus']}"
+            )
+            pool = multiprocessing.Pool(processes=config["optimize"]["n_cpus"], **pool_kwargs)
+        if rungs:
+            logging.info(f"Successive halving on {rungs} of the data, promoting 1/{eta} per rung")
+            toolbox.register("map", successive_halving_map, pool, toolbox.select, rungs, eta)
+        else:
+            toolbox.register("map", map_in_workers, pool)
+        keep_fraction = config["optimize"].get("surrogate_keep_fraction", 1.0)
+        surrogate = None
+        if keep_fraction < 1.0:
+            if keep_fraction <= 0.0:
+                raise ValueError(
+                    f"optimize.surrogate_keep_fraction must be in (0, 1]: {keep_fraction}"
+                )
+            logging.info(f"Surrogate pre-screening: backtesting {keep_fraction:.0%} of offspring")
+            surrogate = KnnSurrogate(bounds)
+            if not steady_state:
+                toolbox.register(
+                    "map",
+                    surrogate_map,
+                    toolbox.map,
+                    surrogate,
+                    toolbox.select,
+                    keep_fraction,
+                )
+        logging.info(f"Finished initializing pool.")
 
         # Create initial population
         logging.info(f"Creating initial population...")
@@ -1136,22 +1649,50 @@ async def main():
         # logbook.header = "gen", "evals", "std", "min", "avg", "max"
         logbook.header = "gen", "evals", "min", "max"
 
-        hof = tools.ParetoFront()
+        hof = EvaluatedParetoFront()
 
         # Run the optimization
         logging.info(f"Starting optimize...")
-        population, logbook = algorithms.eaMuPlusLambda(
-            population,
-            toolbox,
-            mu=config["optimize"]["population_size"],
-            lambda_=config["optimize"]["population_size"],
-            cxpb=config["optimize"]["crossover_probability"],
-            mutpb=config["optimize"]["mutation_probability"],
-            ngen=max(1, int(config["optimize"]["iters"] / len(population))),
-            stats=stats,
-            halloffame=hof,
-            verbose=False,
-        )
+        if steady_state:
+            population, logbook = ea_steady_state(
+                population,
+                toolbox,
+                pool,
+                mu=config["optimize"]["population_size"],
+                cxpb=config["optimize"]["crossover_probability"],
+                mutpb=config["optimize"]["mutation_probability"],
+                n_evals=config["optimize"]["iters"],
+                n_in_flight=2 * config["optimize"]["n_cpus"],
+                stats=stats,
+                halloffame=hof,
+                rungs=rungs,
+                eta=eta,
+                surrogate=surrogate,
+                keep_fraction=keep_fraction,
+            )
+        else:
+            population, logbook = algorithms.eaMuPlusLambda(
+                population,
+                toolbox,
+                mu=config["optimize"]["population_size"],
+                lambda_=config["optimize"]["population_size"],
+                cxpb=config["optimize"]["crossover_probability"],
+                mutpb=config["optimize"]["mutation_probability"],
+                ngen=max(
+                    1,
+                    int(
+                        config["optimize"]["iters"]
+                        / (
+                            len(population)
+                            * successive_halving_cost(rungs, eta)
+                            * min(1.0, keep_fraction)
+                        )
+                    ),
+                ),
+                stats=stats,
+                halloffame=hof,
+                verbose=False,
+            )
 
         # Print statistics
         print(logbook)
@@ -1167,7 +1708,7 @@ async def main():
             results_queue.put("DONE")
             writer_process.join()
         if "pool" in locals():
-            logging.info("Closing and terminating the process pool...")
+            logging.info("Closing and terminating the pool...")
             pool.close()
             pool.terminate()
             pool.join()
@@ -1181,6 +1722,12 @@ async def main():
                         os.unlink(shared_memory_file)
                     except Exception as e:
                         logging.error(f"Error removing shared memory file: {e}")
+        if "seen_digests" in locals() and os.path.exists(seen_digests.filepath):
+            logging.info(f"Removing shared digest set: {seen_digests.filepath}")
+            try:
+                os.unlink(seen_digests.filepath)
+            except Exception as e:
+                logging.error(f"Error removing shared digest set: {e}")
         if "btc_usd_shared_memory_file" in locals():
             if btc_usd_shared_memory_file and os.path.exists(btc_usd_shared_memory_file):
                 logging.info(f"Removing BTC/USD shared memory file: {btc_usd_shared_memory_file}")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import numpy as np
+
+
+class KnnSurrogate:
+    """
+    Online k-nearest-neighbour model of the optimizer's objectives.
+
+    Parameter vectors are scaled to [0, 1] by their bounds (as from
+    extract_bounds_tuple_list_from_config); fixed parameters are ignored. predict() returns the
+    inverse-distance weighted mean objectives of the k nearest evaluated individuals, plus the
+    mean distance to them as a novelty measure: far from any evaluated point, the prediction
+    is least trustworthy. Only the most recent max_points evaluations are kept.
+    """
+
+    def __init__(self, bounds, k: int = 8, max_points: int = 20000):
+        lows, highs = np.array(bounds, dtype=np.float64).T
+        self.free = highs > lows
+        self.lows = lows[self.free]
+        self.spans = (highs - lows)[self.free]
+        self.k = k
+        self.max_points = max_points
+        self.xs = []
+        self.ys = []
+        self._cache = None
+
+    def __len__(self):
+        return len(self.xs)
+
+    def is_ready(self) -> bool:
+        return len(self.xs) >= 2 * self.k
+
+    def _scale(self, values) -> np.ndarray:
+        return (np.asarray(values, dtype=np.float64)[..., self.free] - self.lows) / self.spans
+
+    def add(self, values, objectives):
+        self.xs.append(self._scale(values))
+        self.ys.append(np.asarray(objectives, dtype=np.float64))
+        if len(self.xs) > self.max_points:
+            del self.xs[: len(self.xs) - self.max_points]
+            del self.ys[: len(self.ys) - self.max_points]
+        self._cache = None
+
+    def predict(self, values_list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (objectives, novelty) with shapes (n, n_objectives) and (n,).
+        """
+        if self._cache is None:
+            xs = np.array(self.xs)
+            self._cache = xs, np.array(self.ys), (xs**2).sum(axis=1)
+        xs, ys, xs_sq = self._cache
+        queries = self._scale(np.array([list(v) for v in values_list]))
+        # squared distances via |a|^2 + |b|^2 - 2ab: one (n, n_points) matrix instead of a 3-d diff
+        dist_sq = (queries**2).sum(axis=1)[:, None] + xs_sq[None, :] - 2.0 * queries @ xs.T
+        k = min(self.k, len(xs))
+        nearest = np.argpartition(dist_sq, k - 1, axis=1)[:, :k]
+        dists = np.sqrt(np.maximum(np.take_along_axis(dist_sq, nearest, axis=1), 0.0))
+        weights = 1.0 / (dists + 1e-9)
+        weights /= weights.sum(axis=1, keepdims=True)
+        objectives = (weights[:, :, None] * ys[nearest]).sum(axis=1)
+        return objectives, dists.mean(axis=1)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from backtest import aggregate_hlcvs, coin_subsets, walk_forward_windows
+
+
+def make_hlcvs(n_timesteps, n_coins, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100.0 + rng.standard_normal((n_timesteps, n_coins)).cumsum(axis=0)
+    hlcvs = np.empty((n_timesteps, n_coins, 4))
+    hlcvs[:, :, 0] = closes + rng.random((n_timesteps, n_coins))
+    hlcvs[:, :, 1] = closes - rng.random((n_timesteps, n_coins))
+    hlcvs[:, :, 2] = closes
+    hlcvs[:, :, 3] = rng.random((n_timesteps, n_coins)) * 1000.0
+    return hlcvs
+
+
+def test_aggregate_hlcvs_matches_candle_loop():
+    hlcvs = make_hlcvs(23, 3)
+    btc_usd_prices = np.arange(23, dtype=np.float64) + 50000.0
+    aggregated, btc_aggregated = aggregate_hlcvs(hlcvs, btc_usd_prices, 5)
+    assert aggregated.shape == (5, 3, 4)
+    for i, start in enumerate(range(0, 23, 5)):
+        candle = hlcvs[start : start + 5]
+        np.testing.assert_array_equal(aggregated[i, :, 0], candle[:, :, 0].max(axis=0))
+        np.testing.assert_array_equal(aggregated[i, :, 1], candle[:, :, 1].min(axis=0))
+        np.testing.assert_array_equal(aggregated[i, :, 2], candle[-1, :, 2])
+        np.testing.assert_allclose(aggregated[i, :, 3], candle[:, :, 3].sum(axis=0))
+        assert btc_aggregated[i] == btc_usd_prices[min(start + 5, 23) - 1]
+
+
+def test_aggregate_hlcvs_volume_marks_missing_data():
+    hlcvs = make_hlcvs(8, 2)
+    hlcvs[:4, 0, 3] = -1.0  # coin 0 has no data in the first candle
+    hlcvs[4:6, 1, 3] = -1.0  # coin 1 has data in half of the second candle
+    aggregated, _ = aggregate_hlcvs(hlcvs, np.ones(8), 4)
+    assert aggregated[0, 0, 3] == -1.0
+    assert aggregated[1, 0, 3] == pytest.approx(hlcvs[4:, 0, 3].sum())
+    assert aggregated[1, 1, 3] == pytest.approx(hlcvs[6:, 1, 3].sum())
+
+
+def test_aggregate_hlcvs_fidelity_one_is_identity():
+    hlcvs = make_hlcvs(10, 2)
+    btc_usd_prices = np.linspace(1.0, 2.0, 10)
+    aggregated, btc_aggregated = aggregate_hlcvs(hlcvs, btc_usd_prices, 1)
+    np.testing.assert_array_equal(aggregated, hlcvs)
+    np.testing.assert_array_equal(btc_aggregated, btc_usd_prices)
+
+
+def test_walk_forward_windows_rolling_partition():
+    windows = walk_forward_windows(100, 3)
+    assert windows == [(0, 33), (33, 67), (67, 100)]
+    assert all(isinstance(idx, int) for window in windows for idx in window)
+
+
+def test_walk_forward_windows_anchored_share_start():
+    rolling = walk_forward_windows(1000, 4)
+    anchored = walk_forward_windows(1000, 4, mode="anchored")
+    assert [start for start, _ in anchored] == [0, 0, 0, 0]
+    assert [end for _, end in anchored] == [end for _, end in rolling]
+
+
+def test_walk_forward_windows_rejects_bad_input():
+    with pytest.raises(ValueError):
+        walk_forward_windows(100, 3, mode="expanding")
+    with pytest.raises(ValueError):
+        walk_forward_windows(5, 3)
+    with pytest.raises(ValueError):
+        walk_forward_windows(100, 0)
+
+
+def test_coin_subsets_shapes_and_seeds():
+    subsets = coin_subsets(10, [2, 5], 3, seed=7)
+    assert [seed for seed, _ in subsets] == [7, 8, 9, 7, 8, 9]
+    assert [len(coins) for _, coins in subsets] == [2, 2, 2, 5, 5, 5]
+    for _, coins in subsets:
+        assert coins == sorted(set(coins))
+        assert all(0 <= idx < 10 for idx in coins)
+    assert coin_subsets(10, [10], 1) == [(0, list(range(10)))]
+
+
+def test_coin_subsets_stable_when_extended():
+    subsets = coin_subsets(20, [4], 3, seed=1)
+    assert coin_subsets(20, [4], 3, seed=1) == subsets
+    assert coin_subsets(20, [4], 5, seed=1)[:3] == subsets
+    assert coin_subsets(20, [3, 4], 3, seed=1)[3:] == subsets
+
+
+def test_coin_subsets_rejects_bad_size():
+    with pytest.raises(ValueError):
+        coin_subsets(5, [0], 1)
+    with pytest.raises(ValueError):
+        coin_subsets(5, [6], 1)
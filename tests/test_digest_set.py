@@ -0,0 +1,67 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from digest_set import SharedDigestSet, calc_digest
+
+
+@pytest.fixture
+def digest_set():
+    digest_set = SharedDigestSet.create(100, n_objectives=2)
+    yield digest_set
+    os.unlink(digest_set.filepath)
+
+
+def test_calc_digest_is_stable_and_nonzero():
+    assert calc_digest([1.0, 2.0]) == calc_digest(np.array([1.0, 2.0]))
+    assert calc_digest([0.0, 1.0]) == calc_digest([-0.0, 1.0])
+    assert calc_digest([1.0, 2.0]) != calc_digest([2.0, 1.0])
+    assert calc_digest([1.0]) != 0
+
+
+def test_insert_and_contains(digest_set):
+    digests = [calc_digest([float(i)]) for i in range(100)]
+    for digest in digests[:50]:
+        assert digest_set.add(digest)
+    assert all(digest in digest_set for digest in digests[:50])
+    assert not any(digest in digest_set for digest in digests[50:])
+    assert digest_set.add(digests[0])  # re-adding is a no-op
+
+
+def test_collision_chain(digest_set):
+    # digests congruent modulo n_slots share a home slot and probe linearly
+    chain = [5 + i * digest_set.n_slots for i in range(10)]
+    for digest in chain:
+        assert digest_set.add(digest)
+    assert all(digest in digest_set for digest in chain)
+    assert [int(x) for x in digest_set.table[5:15]] == chain
+    assert 5 + 10 * digest_set.n_slots not in digest_set
+
+
+def test_full_probe_chain_drops_inserts(digest_set):
+    n_probes = SharedDigestSet.MAX_PROBES
+    chain = [1 + i * digest_set.n_slots for i in range(n_probes + 1)]
+    assert all(digest_set.add(digest) for digest in chain[:n_probes])
+    assert not digest_set.add(chain[-1])
+    assert chain[-1] not in digest_set
+    assert all(digest in digest_set for digest in chain[:n_probes])
+
+
+def test_scores_are_shared_across_pickles(digest_set):
+    digest = calc_digest([3.0, 4.0])
+    digest_set.add(digest)
+    assert digest_set.get_score(digest) is None
+    other = pickle.loads(pickle.dumps(digest_set))
+    other.set_score(digest, (-0.5, 0.25))
+    assert digest_set.get_score(digest) == (-0.5, 0.25)
+    assert digest_set.get_score(calc_digest([9.0])) is None
+
+
+def test_half_written_score_reads_as_unscored(digest_set):
+    digest = calc_digest([1.0])
+    digest_set.add(digest)
+    slot = int(np.flatnonzero(np.asarray(digest_set.table) == digest)[0])
+    digest_set.scores[slot, 0] = 1.0
+    assert digest_set.get_score(digest) is None
@@ -0,0 +1,49 @@
+import pickle
+
+from eval_cache import EvalCache
+
+
+def make_cache(tmp_path, max_mb=16.0, version="build-a"):
+    return EvalCache(str(tmp_path / "evals.sqlite"), max_mb=max_mb, version=version)
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.make_key("dataset", [{"long": {"n_positions": 3}}], [{"c_mult": 1.0}], {})
+    assert cache.get(key) is None
+    analysis = {"adg": 0.001, "drawdown_worst": 0.2, "gain": float("inf"), "sharpe": None}
+    cache.put(key, analysis)
+    assert cache.get(key) == analysis
+
+
+def test_key_depends_on_inputs_and_version(tmp_path):
+    cache = make_cache(tmp_path)
+    args = ("dataset", [{"a": 1}], [{"b": 2}], {"c": 3})
+    assert cache.make_key(*args) == cache.make_key(*args)
+    assert cache.make_key(*args) != cache.make_key("other", *args[1:])
+    assert cache.make_key(*args) != cache.make_key(*args[:3], {"c": 4})
+    rebuilt = make_cache(tmp_path, version="build-b")
+    assert rebuilt.make_key(*args) != cache.make_key(*args)
+
+
+def test_shared_between_instances_and_pickling(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.make_key("dataset", [], [], {})
+    cache.put(key, {"adg": 1.0})
+    assert make_cache(tmp_path).get(key) == {"adg": 1.0}
+    assert pickle.loads(pickle.dumps(cache)).get(key) == {"adg": 1.0}
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_mb=0.25)
+    payload = {f"metric_{i}": i * 0.123456789 for i in range(200)}
+    keys = [cache.make_key("dataset", [{"i": i}], [], {}) for i in range(600)]
+    cache.put(keys[0], payload)
+    for key in keys[1:]:
+        cache.get(keys[0])  # keep the first entry recently used
+        cache.put(key, payload)
+    cache.evict()
+    assert cache.size_bytes() <= cache.max_bytes
+    assert cache.get(keys[0]) == payload
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[-1]) == payload
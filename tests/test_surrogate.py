@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from surrogate import KnnSurrogate
+
+BOUNDS = [(0.0, 10.0), (-1.0, 1.0), (5.0, 5.0)]  # last parameter is fixed
+
+
+def make_trained(k=2, max_points=100):
+    surrogate = KnnSurrogate(BOUNDS, k=k, max_points=max_points)
+    for x in np.linspace(0.0, 10.0, 11):
+        for y in (-1.0, 0.0, 1.0):
+            surrogate.add([x, y, 5.0], (x, -y))
+    return surrogate
+
+
+def test_not_ready_until_two_k_points():
+    surrogate = KnnSurrogate(BOUNDS, k=4)
+    for i in range(7):
+        surrogate.add([float(i), 0.0, 5.0], (float(i),))
+        assert not surrogate.is_ready()
+    surrogate.add([7.0, 0.0, 5.0], (7.0,))
+    assert surrogate.is_ready()
+
+
+def test_predicts_training_points_exactly():
+    surrogate = make_trained()
+    objectives, novelty = surrogate.predict([[3.0, 1.0, 5.0], [10.0, -1.0, 5.0]])
+    np.testing.assert_allclose(objectives, [[3.0, -1.0], [10.0, 1.0]], atol=1e-6)
+    assert objectives.shape == (2, 2)
+    assert novelty.shape == (2,)
+
+
+def test_interpolates_between_neighbours():
+    surrogate = make_trained()
+    objectives, _ = surrogate.predict([[4.5, 0.0, 5.0]])
+    # equidistant from x=4 and x=5 at y=0
+    np.testing.assert_allclose(objectives[0], [4.5, 0.0], atol=1e-6)
+
+
+def test_novelty_grows_with_distance_and_ignores_fixed_params():
+    surrogate = make_trained()
+    _, novelty = surrogate.predict([[5.0, 0.0, 5.0], [5.0, 0.5, 5.0], [5.0, 0.5, 123.0]])
+    assert novelty[0] < novelty[1]
+    assert novelty[1] == pytest.approx(novelty[2])
+
+
+def test_max_points_keeps_most_recent():
+    surrogate = KnnSurrogate(BOUNDS, k=1, max_points=5)
+    for i in range(10):
+        surrogate.add([float(i), 0.0, 5.0], (float(i),))
+    assert len(surrogate) == 5
+    objectives, _ = surrogate.predict([[0.0, 0.0, 5.0]])
+    assert objectives[0, 0] == pytest.approx(5.0)  # nearest remaining point is x=5